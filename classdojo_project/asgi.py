@@ -3,6 +3,12 @@ ASGI config for classdojo_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server, e.g.
+    gunicorn classdojo_project.asgi:application -k uvicorn.workers.UvicornWorker
+Under ASGI the feed, chart and roster GETs use the async views in
+core.async_views / core.accounts.async_read_views (ASYNC_READ_VIEWS) and
+/api/v1/notifications/stream/ is available.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +18,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'classdojo_project.settings')
+os.environ.setdefault('DJANGO_ASYNC_READ_VIEWS', 'True')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.WARMUP_ON_STARTUP:
+    from core.warmup import warm_up
+    warm_up()
@@ -39,6 +39,15 @@ DEBUG = True
 ALLOWED_HOSTS = []
 
 
+# API docs: with this off drf_yasg is not imported at all (smaller, faster-starting
+# workers); a schema written by `manage.py generate_api_schema` is still served
+API_DOCS_ENABLED = os.environ.get('DJANGO_API_DOCS_ENABLED', 'True').lower() == 'true'
+API_SCHEMA_DIR = BASE_DIR / 'api_schema'  # Written by generate_api_schema, served at /swagger.json and /swagger.yaml
+
+# Load URLconfs, serializers and the DB connection when a wsgi.py/asgi.py worker
+# starts rather than on its first request (core.warmup); on by default outside DEBUG
+WARMUP_ON_STARTUP = os.environ.get('DJANGO_WARMUP_ON_STARTUP', str(not DEBUG)).lower() == 'true'
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -54,12 +63,15 @@ INSTALLED_APPS = [
     'drf_yasg',
     'core'
 ]
+if not API_DOCS_ENABLED:
+    INSTALLED_APPS.remove('drf_yasg')
 
 AUTH_USER_MODEL = 'core.User'
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',  # Before anything else that touches the response body
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'core.middleware.DisableCSRFForAPIMiddleware',
@@ -112,9 +124,21 @@ DATABASES = {
 #         'OPTIONS': {
 #             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
 #         },
+#         'CONN_MAX_AGE': 60,  # Reuse connections, including the one opened by core.warmup
+#         'CONN_HEALTH_CHECKS': True,
 #     }
 # }
 
+# Cache
+# Local memory cache is per-process; point this at Redis/Memcached when more
+# than one worker needs to share cached data.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'jamie-aale-abba',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -155,6 +179,25 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Image attachment variants: long edge in pixels, JPEG quality, background worker
+IMAGE_VARIANT_SIZES = {'thumbnail': 320, 'medium': 1280}
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_VARIANTS_ASYNC = True
+
+# How /media/ is served: 'django' streams from Python (with Range support),
+# 'x-sendfile' (Apache mod_xsendfile) or 'x-accel-redirect' (nginx) hand the file to the web server
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'django')
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'  # nginx internal location aliased to MEDIA_ROOT
+MEDIA_CACHE_MAX_AGE = 24 * 60 * 60  # Non content-addressed files; blobs are cached for a year
+
+# Resumable uploads (/api/v1/uploads/)
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes per PUT
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # Seconds before an unfinished upload expires
+
+# Media garbage collection (manage.py sweep_media)
+MEDIA_GC_GRACE_PERIOD = 60 * 60  # Seconds an unreferenced blob or orphan file is kept
+MEDIA_DELETED_STORY_RETENTION_DAYS = 30  # Media of soft-deleted stories is kept this long
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -202,14 +245,14 @@ CSRF_TRUSTED_ORIGINS = [
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.accounts.authentication.StatelessJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Allow all for API endpoints during development
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'core.renderers.FastJSONRenderer',  # orjson when installed, DRF's encoder otherwise
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -218,6 +261,10 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Response compression (core.middleware.CompressionMiddleware)
+RESPONSE_COMPRESSION_MIN_SIZE = 1024  # Bytes; smaller bodies gain little and cost CPU
+RESPONSE_BROTLI_QUALITY = 5  # 0-11; used only when the brotli package is installed
+
 # JWT Configuration
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -227,6 +274,58 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# How long a user's token version stamp is cached (seconds). Saves in this
+# process drop it at once; with a per-process cache other workers see
+# password/status changes after at most this long.
+AUTH_VERSION_CACHE_TTL = 60
+
+# Rotated refresh tokens are revoked in the revoked_tokens table (see
+# core/accounts/token_blacklist.py) rather than simplejwt's token_blacklist app
+TOKEN_BLACKLIST_FILTER_CAPACITY = 100000  # jtis per in-process Bloom filter (~120KB at 1% false positives)
+TOKEN_BLACKLIST_SYNC_INTERVAL = 30  # Seconds between pulls of other processes' revocations
+
+# Emailed single-use tokens (stored hashed in account_tokens)
+EMAIL_VERIFICATION_TOKEN_LIFETIME = timedelta(hours=24)
+PASSWORD_RESET_TOKEN_LIFETIME = timedelta(hours=1)
+
+# Audit and download logs are buffered per process and bulk-written after each
+# request; rows written while the database is unreachable are spooled here for
+# `manage.py replay_audit_spool`, and rows it refuses go to audit_spool.rejected.jsonl
+AUDIT_LOG_BUFFER_SIZE = 100  # Flush early once this many rows are waiting
+AUDIT_LOG_SPOOL_PATH = os.path.join(BASE_DIR, 'var', 'audit_spool.jsonl')
+
+# Rows older than this (days) are moved by `manage.py archive_logs` into gzipped,
+# per-day JSONL files under LOG_ARCHIVE_DIR; search them with `manage.py query_log_archive`
+LOG_RETENTION_DAYS = {
+    'audit_logs': 365,
+    'download_logs': 365,
+    'user_sessions': 90,  # Days since the session expired; tokens are archived as hashes
+}
+LOG_ARCHIVE_DIR = os.path.join(BASE_DIR, 'var', 'log_archive')
+
+# Parent-teacher messaging (/api/v1/messages/)
+MESSAGE_CONTACTS_CACHE_TTL = 300  # Allowed-contact sets per parent/teacher; changes in this process apply at once
+MESSAGES_MAX_PAGE_SIZE = 50  # Largest ?limit= for inbox and thread pages
+
+# Announcements feed (/api/v1/announcements/)
+ANNOUNCEMENTS_FEATURED_CACHE_TTL = 300  # Featured (pinned) post list; cleared when a post changes in this process
+ANNOUNCEMENTS_MAX_PAGE_SIZE = 50  # Largest ?limit= for feed pages
+
+# Async read endpoints (feed, chart and roster GETs) replace the sync views when
+# served through asgi.py, which sets DJANGO_ASYNC_READ_VIEWS; WSGI keeps the sync views
+ASYNC_READ_VIEWS = os.environ.get('DJANGO_ASYNC_READ_VIEWS', 'False').lower() == 'true'
+
+# Server-Sent Events at /api/v1/notifications/stream/ (served under ASGI, see asgi.py)
+NOTIFICATION_POLL_INTERVAL = 2  # Seconds between checks for rows other processes wrote; 0 with a single worker process
+NOTIFICATION_HEARTBEAT_INTERVAL = 15  # Keep-alive comment so proxies don't drop idle streams
+NOTIFICATION_STREAM_MAX_AGE = 300  # Streams close after this many seconds; EventSource reconnects
+NOTIFICATION_RETRY_MS = 5000  # Reconnect delay sent to EventSource
+
+# Admin dashboard statistics snapshot (seconds)
+DASHBOARD_STATS_CACHE_TTL = 60  # Served as fresh for this long
+DASHBOARD_STATS_STALE_TTL = 600  # Served stale while a refresh runs, up to this age
+DASHBOARD_STATS_ASYNC_REFRESH = True
+
 # Email Configuration
 if DEBUG:
     # Development: Print emails to console
@@ -317,6 +416,11 @@ SWAGGER_SETTINGS = {
     },
     'USE_SESSION_AUTH': False,
     'VALIDATOR_URL': None,
+    'SPEC_URL': ('schema-json', {'format': '.json'}),  # The pre-generated schema
     'AUTO_SCHEMA_TITLE': 'Jamie Aale Abba Nursery Management API',
     'AUTO_SCHEMA_DESCRIPTION': 'API for managing nursery operations including authentication, class management, attendance, and learning activities.',
 }
+
+REDOC_SETTINGS = {
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
@@ -15,25 +15,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Jamie Aale Abba Nursery Management API",
-      default_version='v1',
-      description="API for managing nursery operations including authentication, class management, attendance, and learning activities.",
-      terms_of_service="https://www.google.com/policies/terms/",
-      contact=openapi.Contact(email="support@jamiaaaleabba.co.uk"),
-      license=openapi.License(name="MIT License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
+from core.api_docs import api_docs_ui, api_schema
+from core.media_views import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -45,13 +31,20 @@ urlpatterns = [
     # Simple Story API - directly included here
     path('api/v1/simple-newsfeed/', include('core.simple_story_urls')),
     
-    # Swagger documentation URLs
-    path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    # Swagger documentation URLs; the schema is generated once (see core.api_docs)
+    path('swagger<format>/', api_schema, name='schema-json'),
+
+    # Uploaded media with Range/ETag support (or X-Sendfile, see MEDIA_SERVE_MODE)
+    re_path(rf'^{settings.MEDIA_URL.strip("/")}/(?P<path>.+)$', serve_media, name='media'),
 ]
 
-# Serve media files in development
+if settings.API_DOCS_ENABLED:
+    # The UI pages load the spec from schema-json (SWAGGER_SETTINGS['SPEC_URL']) and don't generate it
+    urlpatterns += [
+        path('swagger/', api_docs_ui('swagger'), name='schema-swagger-ui'),
+        path('redoc/', api_docs_ui('redoc'), name='schema-redoc'),
+    ]
+
+# Serve static files in development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
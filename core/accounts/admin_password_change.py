@@ -3,8 +3,8 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from core.api_docs import openapi, swagger_auto_schema
+from .authentication import tokens_for_user
 import logging
 
 logger = logging.getLogger(__name__)
@@ -78,8 +78,13 @@ class AdminFirstTimePasswordChangeView(APIView):
             
             logger.info(f"Admin {user.email} changed password successfully")
             
+            # Tokens issued before the change no longer authenticate
+            refresh = tokens_for_user(user)
+            
             return Response({
-                'message': 'Password changed successfully.'
+                'message': 'Password changed successfully.',
+                'access': str(refresh.access_token),
+                'refresh': str(refresh)
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
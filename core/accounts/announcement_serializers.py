@@ -0,0 +1,62 @@
+from rest_framework import serializers
+from core.models import ClassTeacherAssignment, Post, PostAttachment
+
+
+class PostAttachmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PostAttachment
+        fields = ['id', 'file_name', 'file_url', 'file_type', 'file_size', 'mime_type']
+        read_only_fields = fields
+
+
+class PostSerializer(serializers.ModelSerializer):
+    """Feed entry; the counts come from announcements.with_counts annotations"""
+    author_name = serializers.SerializerMethodField()
+    target_class_name = serializers.CharField(source='target_class.class_name', read_only=True, default=None)
+    attachments = PostAttachmentSerializer(many=True, read_only=True)
+    likes_count = serializers.IntegerField(read_only=True, default=0)
+    comments_count = serializers.IntegerField(read_only=True, default=0)
+    user_has_liked = serializers.BooleanField(read_only=True, default=False)
+
+    class Meta:
+        model = Post
+        fields = [
+            'id', 'title', 'content', 'post_type', 'visibility', 'target_class', 'target_class_name',
+            'author_name', 'author_type', 'is_featured', 'attachments', 'likes_count',
+            'comments_count', 'user_has_liked', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+    def get_author_name(self, obj):
+        return obj.author_user.get_full_name() or obj.author_user.email
+
+
+class PostCreateSerializer(serializers.ModelSerializer):
+    """
+    New announcement. Admins may post anything; teachers post only to
+    classes they are assigned to and cannot feature posts.
+    """
+
+    class Meta:
+        model = Post
+        fields = ['title', 'content', 'post_type', 'visibility', 'target_class', 'is_featured']
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        target_class = attrs.get('target_class')
+        if attrs.get('visibility') == 'class_only' and target_class is None:
+            raise serializers.ValidationError({'target_class': 'A class is required for class-only posts.'})
+        if user.user_type == 'teacher':
+            if attrs.get('is_featured'):
+                raise serializers.ValidationError({'is_featured': 'Only admins can feature posts.'})
+            if attrs.get('visibility', 'public') != 'class_only':
+                raise serializers.ValidationError({'visibility': 'Teachers can only post to their classes.'})
+            if not ClassTeacherAssignment.objects.filter(
+                teacher_id=user.teacher_profile.pk, class_obj=target_class, is_active=True
+            ).exists():
+                raise serializers.ValidationError({'target_class': 'You are not assigned to this class.'})
+        return attrs
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        return Post.objects.create(author_user=user, author_type=user.user_type, **validated_data)
@@ -0,0 +1,56 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from core.models import Post
+from .announcements import decode_cursor, feed_page, featured_for, with_counts
+from .announcement_serializers import PostCreateSerializer, PostSerializer
+
+
+def _page_size(request):
+    """?limit=, capped at ANNOUNCEMENTS_MAX_PAGE_SIZE"""
+    maximum = getattr(settings, 'ANNOUNCEMENTS_MAX_PAGE_SIZE', 50)
+    try:
+        return max(1, min(int(request.query_params.get('limit', 20)), maximum))
+    except ValueError:
+        return 20
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def announcements(request):
+    """
+    GET: announcements the user may see, newest first. The first page also
+    carries the featured (pinned) posts, which are left out of results;
+    pass the returned next_cursor as ?cursor= for the following page.
+    POST: publish an announcement (admins and teachers).
+    """
+    if request.method == 'GET':
+        cursor = None
+        if request.query_params.get('cursor'):
+            cursor = decode_cursor(request.query_params['cursor'])
+            if cursor is None:
+                return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        posts, next_cursor = feed_page(request.user, _page_size(request), cursor)
+        featured = [] if cursor else featured_for(request.user)
+        context = {'request': request}
+        return Response({
+            'featured': PostSerializer(featured, many=True, context=context).data,
+            'results': PostSerializer(posts, many=True, context=context).data,
+            'next_cursor': next_cursor,
+        }, status=status.HTTP_200_OK)
+
+    if request.user.user_type not in ('admin', 'teacher'):
+        return Response(
+            {'error': 'Only admins and teachers can publish announcements'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    serializer = PostCreateSerializer(data=request.data, context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    post = serializer.save()
+    post = with_counts(Post.objects.filter(pk=post.pk), request.user).get()
+    return Response({
+        'message': 'Announcement published successfully',
+        'data': PostSerializer(post, context={'request': request}).data
+    }, status=status.HTTP_201_CREATED)
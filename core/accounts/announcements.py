@@ -0,0 +1,144 @@
+import base64
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+
+from core.models import ClassStudentEnrollment, ClassTeacherAssignment, Post, PostAttachment, PostComment, PostLike
+
+FEATURED_KEY = 'announcements:featured'
+
+
+def _featured_ttl():
+    return getattr(settings, 'ANNOUNCEMENTS_FEATURED_CACHE_TTL', 300)
+
+
+def class_ids(user):
+    """
+    Subquery of the class ids whose class_only posts the user may read:
+    a teacher's assigned classes or the classes a parent's children attend.
+    None for admins, who see every post.
+    """
+    if user.user_type == 'teacher' and hasattr(user, 'teacher_profile'):
+        return ClassTeacherAssignment.objects.filter(
+            teacher_id=user.teacher_profile.pk, is_active=True
+        ).values('class_obj_id')
+    if user.user_type == 'parent' and hasattr(user, 'parent_profile'):
+        return ClassStudentEnrollment.objects.filter(
+            student__parent_relationships__parent_id=user.parent_profile.pk, is_active=True
+        ).values('class_obj_id')
+    if user.user_type == 'admin':
+        return None
+    return ClassTeacherAssignment.objects.none().values('class_obj_id')
+
+
+def visible_branches(user):
+    """
+    One queryset per way a post can be visible to the user. Each filters
+    on visibility (and target_class) first so it can walk the
+    (visibility, target_class, is_deleted, created_at) index in order.
+    """
+    posts = Post.objects.filter(is_deleted=False)
+    classes = class_ids(user)
+    if classes is None:
+        return [posts]
+    return [
+        posts.filter(visibility='public'),
+        posts.filter(visibility='class_only', target_class_id__in=classes),
+        posts.filter(visibility='private', author_user_id=user.pk),
+        # Authors always see their own class posts, even after leaving the class
+        posts.filter(visibility='class_only', author_user_id=user.pk),
+    ]
+
+
+def with_counts(posts, user):
+    """Annotate likes_count, comments_count and user_has_liked and load authors and attachments"""
+    def count_of(rows):
+        return Coalesce(Subquery(
+            rows.filter(post=OuterRef('pk')).order_by().values('post').annotate(total=Count('pk')).values('total')
+        ), Value(0))
+
+    return posts.select_related('author_user', 'target_class').prefetch_related(
+        Prefetch('attachments', queryset=PostAttachment.objects.order_by('id'))
+    ).annotate(
+        likes_count=count_of(PostLike.objects.all()),
+        comments_count=count_of(PostComment.objects.filter(is_deleted=False)),
+        user_has_liked=Exists(PostLike.objects.filter(post=OuterRef('pk'), user_id=user.pk)),
+    )
+
+
+def featured_posts_meta():
+    """
+    (id, visibility, target_class_id, author_user_id) of every featured
+    post, newest first. Cached; cleared whenever a post is saved or deleted.
+    """
+    featured = cache.get(FEATURED_KEY)
+    if featured is None:
+        featured = list(
+            Post.objects.filter(is_featured=True, is_deleted=False)
+            .order_by('-created_at', '-id')
+            .values_list('id', 'visibility', 'target_class_id', 'author_user_id')
+        )
+        cache.set(FEATURED_KEY, featured, _featured_ttl())
+    return featured
+
+
+def invalidate_featured():
+    cache.delete(FEATURED_KEY)
+
+
+def featured_for(user):
+    """The featured posts the user may see, newest first, with counts"""
+    featured = featured_posts_meta()
+    if not featured:
+        return []
+    classes = class_ids(user)
+    if classes is not None:
+        allowed = set(classes.values_list('class_obj_id', flat=True))
+        featured = [
+            meta for meta in featured
+            if meta[1] == 'public' or meta[3] == user.pk or (meta[1] == 'class_only' and meta[2] in allowed)
+        ]
+    ids = [meta[0] for meta in featured]
+    posts = {post.pk: post for post in with_counts(Post.objects.filter(pk__in=ids), user)}
+    return [posts[pk] for pk in ids if pk in posts]
+
+
+def encode_cursor(post):
+    return base64.urlsafe_b64encode(f'{post.created_at.isoformat()}|{post.pk}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from a feed cursor, or None if it is malformed"""
+    try:
+        timestamp, post_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at = parse_datetime(timestamp)
+        return (created_at, int(post_id)) if created_at else None
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def feed_page(user, limit, cursor=None):
+    """
+    Posts the user may see that are not featured, newest first,
+    keyset-paginated on (created_at, id). Each visibility branch is read
+    separately for at most limit + 1 keys and the keys merged (and
+    de-duplicated) here; the page is then loaded with its counts in one
+    query. Returns (posts, next_cursor).
+    """
+    keys = []
+    for branch in visible_branches(user):
+        branch = branch.filter(is_featured=False)
+        if cursor:
+            created_at, post_id = cursor
+            branch = branch.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=post_id))
+        keys.extend(branch.order_by('-created_at', '-id').values_list('created_at', 'id')[:limit + 1])
+
+    keys = sorted(set(keys), reverse=True)
+    has_more = len(keys) > limit
+    ids = [post_id for _, post_id in keys[:limit]]
+    posts = {post.pk: post for post in with_counts(Post.objects.filter(pk__in=ids), user)}
+    page = [posts[pk] for pk in ids if pk in posts]
+    return page, encode_cursor(page[-1]) if has_more and page else None
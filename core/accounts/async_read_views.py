@@ -0,0 +1,176 @@
+"""
+Async versions of the high-traffic read endpoints, used when the project is
+served through classdojo_project/asgi.py (see core.async_views.read_view).
+Responses match the sync views in teacher_views and parent_child_views;
+independent queries are issued together with asyncio.gather and the
+per-month / per-student query loops are replaced by grouped queries.
+"""
+import asyncio
+from datetime import datetime
+
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth
+from rest_framework.permissions import IsAuthenticated
+
+from core.async_views import alist, async_api_view, json_response
+from core.models import (
+    Class, ClassStudentEnrollment, ClassTeacherAssignment, DailyAttendance,
+    ParentStudentRelationship, Student, StudentLearningRecord, Teacher
+)
+from .permissions import IsParentUser
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+async def _first_parent_contacts(class_id):
+    """The first active parent relationship (by id) of each student enrolled in the class"""
+    relationships = ParentStudentRelationship.objects.filter(
+        student__class_enrollments__class_obj_id=class_id,
+        student__class_enrollments__is_active=True,
+        parent__is_active=True,
+        parent__user__is_active=True
+    ).select_related('parent__user').order_by('pk')
+    contacts = {}
+    async for relationship in relationships:
+        contacts.setdefault(relationship.student_id, relationship)
+    return contacts
+
+
+async def _class_roster(request, class_id, with_parents, not_teacher_error):
+    if request.user.user_type != 'teacher':
+        return json_response({'error': not_teacher_error}, status=403)
+
+    enrollments = ClassStudentEnrollment.objects.filter(
+        class_obj_id=class_id, is_active=True, student__is_active=True
+    ).select_related('student').order_by('pk')
+    queries = [
+        Teacher.objects.filter(user_id=request.user.pk).aexists(),
+        Class.objects.filter(id=class_id, is_active=True).only('id', 'class_name', 'class_code').afirst(),
+        ClassTeacherAssignment.objects.filter(
+            class_obj_id=class_id, teacher__user_id=request.user.pk, is_active=True
+        ).aexists(),
+        alist(enrollments),
+    ]
+    if with_parents:
+        queries.append(_first_parent_contacts(class_id))
+    has_profile, class_obj, is_assigned, enrollments, *contacts = await asyncio.gather(*queries)
+
+    if not has_profile:
+        return json_response({'error': 'Teacher profile not found'}, status=404)
+    if class_obj is None:
+        return json_response({'error': 'Class not found'}, status=404)
+    if not is_assigned:
+        return json_response({'error': 'You are not assigned to this class'}, status=403)
+
+    students_data = []
+    for enrollment in enrollments:
+        student = enrollment.student
+        student_data = {
+            'id': student.id,
+            'student_name': student.student_name,
+            'student_id': student.student_id,
+            'date_of_birth': student.date_of_birth.isoformat() if student.date_of_birth else None,
+            'gender': student.gender,
+            'avatar_url': student.avatar_url,
+            'medical_conditions': student.medical_conditions,
+            'is_active': student.is_active,
+            'enrollment_date': enrollment.enrollment_date.isoformat() if enrollment.enrollment_date else None,
+        }
+        if with_parents:
+            relationship = contacts[0].get(student.id)
+            student_data['parent_contact'] = {
+                'parent_name': f"{relationship.parent.user.first_name} {relationship.parent.user.last_name}".strip(),
+                'phone_number': relationship.parent.user.phone_number or '',
+                'email': relationship.parent.user.email or '',
+                'relationship': relationship.get_relationship_type_display()
+            } if relationship else None
+        students_data.append(student_data)
+
+    return json_response({
+        'success': True,
+        'data': students_data,
+        'count': len(students_data),
+        'class_info': {
+            'id': class_obj.id,
+            'class_name': class_obj.class_name,
+            'class_code': class_obj.class_code,
+        }
+    })
+
+
+@async_api_view([IsAuthenticated])
+async def get_class_students(request, class_id):
+    """Async version of teacher_views.get_class_students"""
+    return await _class_roster(request, class_id, False, 'Only teachers can access this endpoint')
+
+
+@async_api_view([IsAuthenticated])
+async def get_class_students_with_parents(request, class_id):
+    """Async version of teacher_views.get_class_students_with_parents"""
+    return await _class_roster(request, class_id, True, 'Only teachers can access student information')
+
+
+def _year(request):
+    try:
+        return int(request.GET.get('year', str(datetime.now().year)))
+    except (ValueError, TypeError):
+        return None
+
+
+@async_api_view([IsAuthenticated, IsParentUser], error='Failed to retrieve attendance data')
+async def get_child_attendance_data(request, child_id):
+    """Async version of parent_child_views.get_child_attendance_data: one grouped query for the year"""
+    is_linked = ParentStudentRelationship.objects.filter(
+        parent_id=request.user.parent_profile.pk, student_id=child_id
+    ).aexists()
+    year = _year(request)
+    if year is None:
+        if not await is_linked:
+            return json_response({'error': 'Child not found or not linked to your account'}, status=404)
+        return json_response({'error': 'Invalid year format'}, status=400)
+
+    counts = DailyAttendance.objects.filter(
+        student_id=child_id, attendance_date__year=year
+    ).annotate(month=ExtractMonth('attendance_date')).values('month', 'status').annotate(count=Count('id'))
+    is_linked, counts = await asyncio.gather(is_linked, alist(counts))
+    if not is_linked:
+        return json_response({'error': 'Child not found or not linked to your account'}, status=404)
+
+    by_month = {(row['month'], row['status']): row['count'] for row in counts}
+    return json_response([
+        {
+            'month': name,
+            'present': by_month.get((number, 'present'), 0),
+            'absent': by_month.get((number, 'absent'), 0),
+            'late': by_month.get((number, 'late'), 0),
+        }
+        for number, name in enumerate(MONTHS, 1)
+    ])
+
+
+@async_api_view([IsAuthenticated, IsParentUser], error='Failed to retrieve learning activities data')
+async def get_child_learning_activities(request, child_id):
+    """Async version of parent_child_views.get_child_learning_activities: one grouped query for the year"""
+    is_linked = Student.objects.filter(
+        id=child_id, parent_relationships__parent_id=request.user.parent_profile.pk, is_active=True
+    ).aexists()
+    year = _year(request)
+    if year is None:
+        if not await is_linked:
+            return json_response({'error': 'Child not found or not associated with your account'}, status=404)
+        return json_response({'error': 'Invalid year format'}, status=400)
+
+    minutes = StudentLearningRecord.objects.filter(
+        student_id=child_id, was_present=True, class_session__session_date__year=year
+    ).annotate(month=ExtractMonth('class_session__session_date')).values('month').annotate(
+        minutes=Sum('class_session__duration_minutes')
+    )
+    is_linked, minutes = await asyncio.gather(is_linked, alist(minutes))
+    if not is_linked:
+        return json_response({'error': 'Child not found or not associated with your account'}, status=404)
+
+    by_month = {row['month']: row['minutes'] or 0 for row in minutes}
+    return json_response([
+        {'month': name, 'hours': round(by_month[number] / 60.0, 1) if by_month.get(number) else 0}
+        for number, name in enumerate(MONTHS, 1)
+    ])
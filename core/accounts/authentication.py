@@ -0,0 +1,182 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Admin, ClaimsUser, Parent, Teacher, User
+from .token_blacklist import is_revoked, revoke
+
+VERSION_KEY = 'auth_ver:{}'
+
+# Claims copied onto ClaimsUser; everything else is loaded on first access
+USER_CLAIM_FIELDS = ['email', 'user_type', 'is_staff', 'is_superuser']
+
+# (related name on User, profile model, profile columns carried in the token)
+PROFILE_CLAIMS = [
+    ('teacher_profile', Teacher, ['is_active']),
+    ('parent_profile', Parent, ['is_active']),
+    ('admin_profile', Admin, ['is_active', 'admin_level']),
+]
+
+VERSION_FIELDS = ['password', 'is_active'] + USER_CLAIM_FIELDS + [
+    f'{related_name}__{field}'
+    for related_name, model, fields in PROFILE_CLAIMS
+    for field in ['id'] + fields
+]
+
+
+def _version_ttl():
+    return getattr(settings, 'AUTH_VERSION_CACHE_TTL', 60)
+
+
+def _stamp(values):
+    """Short hash of everything a token's claims depend on"""
+    payload = '|'.join(str(values.get(field)) for field in VERSION_FIELDS)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _version_values(user):
+    values = {field: getattr(user, field) for field in ['password', 'is_active'] + USER_CLAIM_FIELDS}
+    for related_name, model, fields in PROFILE_CLAIMS:
+        profile = getattr(user, related_name, None)
+        for field in ['id'] + fields:
+            values[f'{related_name}__{field}'] = getattr(profile, field) if profile else None
+    return values
+
+
+def _profile_claims(user):
+    profiles = {}
+    for related_name, model, fields in PROFILE_CLAIMS:
+        profile = getattr(user, related_name, None)
+        if profile is not None:
+            profiles[related_name] = {field: getattr(profile, field) for field in ['id'] + fields}
+    return profiles
+
+
+def current_version(user_id):
+    """
+    Version stamp for a user, cached for AUTH_VERSION_CACHE_TTL seconds.
+    A miss costs one query joining the three profile tables. Returns None
+    when the user no longer exists.
+    """
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        values = User.objects.filter(pk=user_id).values(*VERSION_FIELDS).first()
+        if values is None:
+            return None
+        version = _stamp(values)
+        cache.set(key, version, _version_ttl())
+    return version
+
+
+def invalidate_version(user_id):
+    cache.delete(VERSION_KEY.format(user_id))
+
+
+def tokens_for_user(user):
+    """
+    Refresh token carrying the user's type, profiles and version stamp.
+    simplejwt copies the custom claims into refresh.access_token.
+    """
+    refresh = RefreshToken.for_user(user)
+    for field in USER_CLAIM_FIELDS:
+        refresh[field] = getattr(user, field)
+    refresh['profiles'] = _profile_claims(user)
+    refresh['ver'] = _stamp(_version_values(user))
+    return refresh
+
+
+def _instance_from_claims(model, data):
+    """Model instance with only the given columns loaded, the rest deferred"""
+    field_names = [f.attname for f in model._meta.concrete_fields if f.attname in data]
+    return model.from_db(model.objects.db, field_names, [data[name] for name in field_names])
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Builds request.user from access token claims instead of loading the
+    users row and its profile. The token's version stamp is compared with
+    current_version(), so a password change, deactivation or role change
+    rejects existing tokens once the cached stamp is dropped (immediately in
+    this process, after AUTH_VERSION_CACHE_TTL in others).
+
+    Tokens issued before claims were added fall back to the database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if 'ver' not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        version = current_version(user_id)
+        if version is None:
+            raise exceptions.AuthenticationFailed('User not found', code='user_not_found')
+        if version != validated_token['ver']:
+            raise InvalidToken('Token is no longer valid for this user')
+
+        return self.build_user(user_id, validated_token)
+
+    def build_user(self, user_id, claims):
+        user_data = {'id': user_id, 'is_active': True}
+        user_data.update((field, claims[field]) for field in USER_CLAIM_FIELDS)
+        user = _instance_from_claims(ClaimsUser, user_data)
+
+        profiles = claims.get('profiles', {})
+        for related_name, model, fields in PROFILE_CLAIMS:
+            profile = None
+            if related_name in profiles:
+                profile = _instance_from_claims(model, dict(profiles[related_name], user_id=user_id))
+                # Point the profile back at this user so profile.user costs nothing
+                model._meta.get_field('user').set_cached_value(profile, user)
+            # Caching None as well makes hasattr(user, 'teacher_profile') free for other types
+            getattr(User, related_name).related.set_cached_value(user, profile)
+        return user
+
+
+class StatelessTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Rotates the refresh token like simplejwt, but re-reads the user so the
+    new tokens carry current claims, and inactive users or tokens with a
+    stale version stamp can't refresh. The old refresh token is revoked in
+    core.accounts.token_blacklist.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh.payload.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken('Token is blacklisted')
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.filter(pk=user_id).select_related(
+            *[related_name for related_name, model, fields in PROFILE_CLAIMS]
+        ).first() if user_id else None
+        if user is None or not user.can_login():
+            raise exceptions.AuthenticationFailed(
+                'No active account found for this token', code='no_active_account'
+            )
+        # Refresh tokens issued before a password, status or role change can't mint new ones
+        if 'ver' in refresh.payload and refresh.payload['ver'] != _stamp(_version_values(user)):
+            raise InvalidToken('Token is no longer valid for this user')
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            # The unique jti makes this the authoritative check: two requests
+            # rotating the same token can't both succeed
+            if api_settings.BLACKLIST_AFTER_ROTATION and not revoke(refresh):
+                raise InvalidToken('Token is blacklisted')
+            refresh = tokens_for_user(user)
+            data = {'access': str(refresh.access_token), 'refresh': str(refresh)}
+        else:
+            data = {'access': str(tokens_for_user(user).access_token)}
+        return data
+
@@ -4,7 +4,49 @@ from core.models import (
     ClassTeacherAssignment, ParentStudentRelationship, Parent
 )
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
+from .dashboard_stats import mark_dashboard_stats_dirty
+from .search import index_new_entities, set_entities_active
+
+
+def bulk_enroll_students(class_obj, student_ids, from_class_id=None):
+    """
+    Move students into class_obj with a fixed number of statements:
+    one bulk deactivation of their current enrollments (optionally only
+    those in from_class_id), one bulk_create for missing enrollments and
+    one bulk reactivation. Call inside a transaction.
+    """
+    student_ids = list(set(student_ids))
+    now = timezone.now()
+    today = now.date()
+    
+    current_enrollments = ClassStudentEnrollment.objects.filter(
+        student_id__in=student_ids, is_active=True
+    )
+    if from_class_id:
+        current_enrollments = current_enrollments.filter(class_obj_id=from_class_id)
+    current_enrollments.update(is_active=False, updated_at=now)
+    
+    # Existing (class, student) rows are left alone here and reactivated below
+    ClassStudentEnrollment.objects.bulk_create(
+        [
+            ClassStudentEnrollment(
+                class_obj=class_obj, student_id=student_id,
+                enrollment_date=today, is_active=True
+            )
+            for student_id in student_ids
+        ],
+        ignore_conflicts=True
+    )
+    ClassStudentEnrollment.objects.filter(
+        class_obj=class_obj, student_id__in=student_ids
+    ).update(is_active=True, enrollment_date=today, updated_at=now)
+    
+    # Queryset updates and bulk_create bypass save signals
+    transaction.on_commit(mark_dashboard_stats_dirty)
+    
+    return list(Student.objects.filter(id__in=student_ids))
 
 
 class ClassSerializer(serializers.ModelSerializer):
@@ -203,7 +245,7 @@ class TeacherStudentAssignmentSerializer(serializers.Serializer):
     
     def validate_student_ids(self, value):
         students = Student.objects.filter(id__in=value, is_active=True)
-        if students.count() != len(value):
+        if students.count() != len(set(value)):
             raise serializers.ValidationError("Some students not found or inactive")
         return value
     
@@ -229,29 +271,7 @@ class TeacherStudentAssignmentSerializer(serializers.Serializer):
             teacher_assignment.is_active = True
             teacher_assignment.save()
         
-        # Enroll students in the class if not already enrolled
-        enrolled_students = []
-        for student_id in student_ids:
-            student = Student.objects.get(id=student_id)
-            
-            # Deactivate any existing enrollments for this student
-            ClassStudentEnrollment.objects.filter(
-                student=student, is_active=True
-            ).update(is_active=False)
-            
-            # Create new enrollment
-            enrollment, created = ClassStudentEnrollment.objects.get_or_create(
-                class_obj=class_obj,
-                student=student,
-                defaults={'enrollment_date': timezone.now().date(), 'is_active': True}
-            )
-            
-            if not created:
-                enrollment.is_active = True
-                enrollment.enrollment_date = timezone.now().date()
-                enrollment.save()
-            
-            enrolled_students.append(student)
+        enrolled_students = bulk_enroll_students(class_obj, student_ids)
         
         return {
             'teacher': teacher,
@@ -272,7 +292,7 @@ class StudentReassignmentSerializer(serializers.Serializer):
     
     def validate_student_ids(self, value):
         students = Student.objects.filter(id__in=value, is_active=True)
-        if students.count() != len(value):
+        if students.count() != len(set(value)):
             raise serializers.ValidationError("Some students not found or inactive")
         return value
     
@@ -290,36 +310,241 @@ class StudentReassignmentSerializer(serializers.Serializer):
         from_class_id = self.validated_data.get('from_class_id')
         
         to_class = Class.objects.get(id=to_class_id)
-        reassigned_students = []
-        
-        for student_id in student_ids:
-            student = Student.objects.get(id=student_id)
-            
-            # Deactivate current enrollment
-            current_enrollments = ClassStudentEnrollment.objects.filter(
-                student=student, is_active=True
-            )
-            
-            if from_class_id:
-                current_enrollments = current_enrollments.filter(class_obj_id=from_class_id)
-            
-            current_enrollments.update(is_active=False)
-            
-            # Create new enrollment
-            new_enrollment, created = ClassStudentEnrollment.objects.get_or_create(
-                class_obj=to_class,
-                student=student,
-                defaults={'enrollment_date': timezone.now().date(), 'is_active': True}
-            )
-            
-            if not created:
-                new_enrollment.is_active = True
-                new_enrollment.enrollment_date = timezone.now().date()
-                new_enrollment.save()
-            
-            reassigned_students.append(student)
+        reassigned_students = bulk_enroll_students(to_class, student_ids, from_class_id=from_class_id)
         
         return {
             'to_class': to_class,
             'students': reassigned_students
-        }
\ No newline at end of file
+        }
+
+class RolloverNewClassSerializer(serializers.Serializer):
+    """Definition of a class to create for the new academic year"""
+    class_name = serializers.CharField(max_length=100)
+    class_code = serializers.CharField(max_length=20)
+    age_group = serializers.CharField(max_length=50, required=False, allow_blank=True, default='')
+    capacity = serializers.IntegerField(min_value=1, required=False, default=20)
+    room_number = serializers.CharField(max_length=20, required=False, allow_blank=True, default='')
+
+
+class RolloverTeacherSerializer(serializers.Serializer):
+    teacher_id = serializers.IntegerField()
+    role = serializers.ChoiceField(choices=ClassTeacherAssignment.ROLE_CHOICES, default='primary')
+
+
+class RolloverClassMappingSerializer(serializers.Serializer):
+    """One old class and where its students go"""
+    from_class_id = serializers.IntegerField()
+    to_class_id = serializers.IntegerField(required=False, allow_null=True)
+    new_class = RolloverNewClassSerializer(required=False)
+    teachers = RolloverTeacherSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        if bool(attrs.get('to_class_id')) == bool(attrs.get('new_class')):
+            raise serializers.ValidationError("Provide exactly one of to_class_id or new_class")
+        return attrs
+
+
+class AcademicYearRolloverSerializer(serializers.Serializer):
+    """
+    Year-end rollover: move every active student of each old class to its
+    new class, create the new classes, and move teacher assignments.
+    Old classes are deactivated rather than deleted so attendance and
+    learning records stay attached to them. Teachers' assignments to the
+    old classes are ended separately (end_old_assignments), so keeping an
+    old class open doesn't leave its teachers on two years' classes.
+    """
+    academic_year = serializers.CharField(max_length=20)
+    mappings = RolloverClassMappingSerializer(many=True, allow_empty=False)
+    deactivate_old_classes = serializers.BooleanField(default=True)
+    end_old_assignments = serializers.BooleanField(default=True)
+
+    def validate(self, attrs):
+        mappings = attrs['mappings']
+
+        from_ids = [m['from_class_id'] for m in mappings]
+        if len(set(from_ids)) != len(from_ids):
+            raise serializers.ValidationError({'mappings': "Each class can only be rolled over once"})
+
+        to_ids = {m['to_class_id'] for m in mappings if m.get('to_class_id')}
+        classes = Class.objects.in_bulk(set(from_ids) | to_ids)
+        missing = (set(from_ids) | to_ids) - set(classes)
+        if missing:
+            raise serializers.ValidationError({'mappings': f"Classes not found: {sorted(missing)}"})
+        if any(m['from_class_id'] == m.get('to_class_id') for m in mappings):
+            raise serializers.ValidationError({'mappings': "A class cannot be rolled over into itself"})
+
+        new_codes = [m['new_class']['class_code'] for m in mappings if m.get('new_class')]
+        if len(set(new_codes)) != len(new_codes):
+            raise serializers.ValidationError({'mappings': "Duplicate class_code in new classes"})
+        taken = list(Class.objects.filter(class_code__in=new_codes).values_list('class_code', flat=True))
+        if taken:
+            raise serializers.ValidationError({'mappings': f"Class codes already exist: {taken}"})
+
+        teacher_ids = {t['teacher_id'] for m in mappings for t in m.get('teachers', [])}
+        active_teachers = set(
+            Teacher.objects.filter(id__in=teacher_ids, is_active=True).values_list('id', flat=True)
+        )
+        if teacher_ids - active_teachers:
+            raise serializers.ValidationError(
+                {'mappings': f"Teachers not found or inactive: {sorted(teacher_ids - active_teachers)}"}
+            )
+
+        attrs['classes'] = classes
+        return attrs
+
+    def _build_plan(self):
+        """Snapshot current enrollments and assignments of the old classes (two queries)"""
+        mappings = self.validated_data['mappings']
+        classes = self.validated_data['classes']
+        from_ids = [m['from_class_id'] for m in mappings]
+
+        students_by_class = {class_id: [] for class_id in from_ids}
+        for class_id, student_id in ClassStudentEnrollment.objects.filter(
+            class_obj_id__in=from_ids, is_active=True, student__is_active=True
+        ).values_list('class_obj_id', 'student_id'):
+            students_by_class[class_id].append(student_id)
+
+        teachers_by_class = {class_id: [] for class_id in from_ids}
+        for class_id, teacher_id, role in ClassTeacherAssignment.objects.filter(
+            class_obj_id__in=from_ids, is_active=True
+        ).values_list('class_obj_id', 'teacher_id', 'role'):
+            teachers_by_class[class_id].append({'teacher_id': teacher_id, 'role': role})
+
+        plan = []
+        for mapping in mappings:
+            from_class = classes[mapping['from_class_id']]
+            to_class = classes.get(mapping.get('to_class_id'))
+            new_class = mapping.get('new_class')
+            capacity = to_class.capacity if to_class else new_class['capacity']
+            student_ids = students_by_class[from_class.id]
+            # Without an explicit list the old class's teachers move with it
+            teachers = mapping['teachers'] if 'teachers' in mapping else teachers_by_class[from_class.id]
+            plan.append({
+                'from_class': from_class,
+                'to_class': to_class,
+                'new_class': new_class,
+                'student_ids': student_ids,
+                'teachers': teachers,
+                'capacity': capacity,
+            })
+        return plan
+
+    def preview(self):
+        return self._summarize(self._build_plan(), applied=False)
+
+    @transaction.atomic
+    def save(self):
+        plan = self._build_plan()
+        academic_year = self.validated_data['academic_year']
+        now = timezone.now()
+        today = now.date()
+
+        # 1. Create the new classes in one batch
+        new_classes = [
+            Class(academic_year=academic_year, is_active=True, **item['new_class'])
+            for item in plan if item['new_class']
+        ]
+        if new_classes:
+            Class.objects.bulk_create(new_classes)
+            # MySQL does not return primary keys from bulk_create
+            created = {c.class_code: c for c in Class.objects.filter(
+                class_code__in=[c.class_code for c in new_classes]
+            )}
+            for item in plan:
+                if item['new_class']:
+                    item['to_class'] = created[item['new_class']['class_code']]
+            index_new_entities('class', created.values())
+
+        existing_targets = [item['to_class'].id for item in plan if not item['new_class']]
+        if existing_targets:
+            Class.objects.filter(id__in=existing_targets).update(academic_year=academic_year, updated_at=now)
+
+        from_ids = [item['from_class'].id for item in plan]
+
+        # 2. Close old enrollments; the rows stay as history
+        ClassStudentEnrollment.objects.filter(
+            class_obj_id__in=from_ids, is_active=True
+        ).update(is_active=False, updated_at=now)
+
+        enrollments = [
+            ClassStudentEnrollment(
+                class_obj=item['to_class'], student_id=student_id,
+                enrollment_date=today, is_active=True
+            )
+            for item in plan for student_id in item['student_ids']
+        ]
+        ClassStudentEnrollment.objects.bulk_create(enrollments, ignore_conflicts=True)
+        reactivate = Q()
+        for item in plan:
+            if item['student_ids']:
+                reactivate |= Q(class_obj=item['to_class'], student_id__in=item['student_ids'])
+        if reactivate:
+            ClassStudentEnrollment.objects.filter(reactivate).update(
+                is_active=True, enrollment_date=today, updated_at=now
+            )
+
+        # 3. Move teacher assignments
+        if self.validated_data['end_old_assignments']:
+            ClassTeacherAssignment.objects.filter(
+                class_obj_id__in=from_ids, is_active=True
+            ).update(is_active=False, updated_at=now)
+
+        assignments = [
+            ClassTeacherAssignment(
+                class_obj=item['to_class'], teacher_id=teacher['teacher_id'],
+                role=teacher['role'], assigned_date=today, is_active=True
+            )
+            for item in plan for teacher in item['teachers']
+        ]
+        ClassTeacherAssignment.objects.bulk_create(assignments, ignore_conflicts=True)
+        reassign = Q()
+        for assignment in assignments:
+            reassign |= Q(class_obj=assignment.class_obj, teacher_id=assignment.teacher_id, role=assignment.role)
+        if reassign:
+            ClassTeacherAssignment.objects.filter(reassign).update(
+                is_active=True, assigned_date=today, updated_at=now
+            )
+
+        # 4. Retire the old classes (attendance and learning records keep pointing at them)
+        if self.validated_data['deactivate_old_classes']:
+            target_ids = {item['to_class'].id for item in plan}
+            retired_ids = [class_id for class_id in from_ids if class_id not in target_ids]
+            Class.objects.filter(id__in=retired_ids).update(is_active=False, updated_at=now)
+            set_entities_active('class', retired_ids, False)
+
+        transaction.on_commit(mark_dashboard_stats_dirty)
+        return self._summarize(plan, applied=True)
+
+    def _summarize(self, plan, applied):
+        classes = []
+        for item in plan:
+            to_class = item['to_class']
+            new_class = item['new_class']
+            student_count = len(item['student_ids'])
+            classes.append({
+                'from_class': {
+                    'id': item['from_class'].id,
+                    'class_name': item['from_class'].class_name,
+                    'class_code': item['from_class'].class_code,
+                },
+                'to_class': {
+                    'id': to_class.id if to_class else None,
+                    'class_name': to_class.class_name if to_class else new_class['class_name'],
+                    'class_code': to_class.class_code if to_class else new_class['class_code'],
+                    'is_new': bool(new_class),
+                },
+                'students_moving': student_count,
+                'capacity': item['capacity'],
+                'over_capacity': student_count > item['capacity'],
+                'teachers': item['teachers'],
+            })
+        return {
+            'academic_year': self.validated_data['academic_year'],
+            'applied': applied,
+            'classes': classes,
+            'totals': {
+                'students_moving': sum(c['students_moving'] for c in classes),
+                'classes_created': sum(1 for c in classes if c['to_class']['is_new']),
+                'teacher_assignments': sum(len(c['teachers']) for c in classes),
+            },
+        }
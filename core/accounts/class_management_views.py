@@ -1,22 +1,26 @@
+import csv
+
 from rest_framework import generics, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count
 from django.utils import timezone
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from core.api_docs import openapi, swagger_auto_schema
 from core.models import (
     Class, Student, Teacher, ClassStudentEnrollment,
-    ClassTeacherAssignment, User
+    ClassTeacherAssignment, User, SearchDocument
 )
 from .class_management_serializers import (
     ClassSerializer, ClassDetailSerializer, StudentSerializer,
     TeacherSerializer, ClassStudentEnrollmentSerializer,
     ClassTeacherAssignmentSerializer, TeacherStudentAssignmentSerializer,
-    StudentReassignmentSerializer
+    StudentReassignmentSerializer, AcademicYearRolloverSerializer
 )
 from .permissions import IsAdminUser
+from .dashboard_stats import get_dashboard_statistics, mark_dashboard_stats_dirty
+from .search import search_documents, search_entity_ids
+from .student_import import import_students_csv
 
 
 class ClassListCreateView(generics.ListCreateAPIView):
@@ -33,11 +37,7 @@ class ClassListCreateView(generics.ListCreateAPIView):
         # Search functionality
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(class_name__icontains=search) |
-                Q(class_code__icontains=search) |
-                Q(age_group__icontains=search)
-            )
+            queryset = queryset.filter(pk__in=search_entity_ids('class', search))
         
         # Filter by active status
         is_active = self.request.query_params.get('is_active', None)
@@ -78,10 +78,7 @@ class StudentListCreateView(generics.ListCreateAPIView):
         # Search functionality
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(student_name__icontains=search) |
-                Q(student_id__icontains=search)
-            )
+            queryset = queryset.filter(pk__in=search_entity_ids('student', search))
         
         # Filter by class
         class_id = self.request.query_params.get('class_id', None)
@@ -141,12 +138,7 @@ class TeacherStudentAssignmentView(generics.ListAPIView):
         # Search functionality
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(user__first_name__icontains=search) |
-                Q(user__last_name__icontains=search) |
-                Q(user__email__icontains=search) |
-                Q(employee_id__icontains=search)
-            )
+            queryset = queryset.filter(pk__in=search_entity_ids('teacher', search))
         
         # Filter by class assignment
         class_id = self.request.query_params.get('class_id', None)
@@ -286,6 +278,7 @@ def remove_student_assignment(request, student_id):
             )
         
         current_enrollments.update(is_active=False)
+        mark_dashboard_stats_dirty()
         
         return Response({
             'message': f'Student {student.student_name} removed from class assignment'
@@ -397,6 +390,205 @@ def remove_teacher_from_class(request, teacher_id, class_id):
         )
 
 
+@swagger_auto_schema(
+    method='post',
+    operation_description=(
+        "Import students from a CSV file. Columns: student_id, student_name (required), "
+        "date_of_birth, gender, medical_conditions, class_code, parent_emails (';' separated), "
+        "relationship. Invalid rows are reported individually and do not stop the import."
+    ),
+    operation_summary="Bulk import students from CSV",
+    tags=['Admin - Class Management'],
+    security=[{'Bearer': []}],
+    manual_parameters=[
+        openapi.Parameter('file', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True,
+                          description='CSV file (UTF-8)'),
+        openapi.Parameter('dry_run', openapi.IN_FORM, type=openapi.TYPE_BOOLEAN,
+                          description='Validate only, do not save'),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Import report",
+            examples={
+                "application/json": {
+                    "total_rows": 3,
+                    "created": 2,
+                    "enrollments_created": 2,
+                    "parent_links_created": 1,
+                    "failed": 1,
+                    "errors": [{"line": 4, "student_id": "S002", "error": "Unknown or inactive class code 'X9'"}],
+                    "warnings": [],
+                    "stopped_at_line": None
+                }
+            }
+        ),
+        400: openapi.Response(description="No file uploaded, or the header is not UTF-8 CSV"),
+        403: openapi.Response(description="Only admins can import students")
+    }
+)
+@api_view(['POST'])
+@parser_classes([MultiPartParser, FormParser])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def import_students(request):
+    """
+    Bulk import students, class enrollments and parent links from a CSV upload
+    """
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response(
+            {'error': 'A CSV file is required in the "file" field'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    dry_run = str(request.data.get('dry_run', 'false')).lower() == 'true'
+    try:
+        report = import_students_csv(upload.file, dry_run=dry_run)
+    except (UnicodeDecodeError, csv.Error):
+        # Only the header is read before anything is saved; later read errors are in the report
+        return Response(
+            {'error': 'The file must be a UTF-8 encoded CSV'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    report['dry_run'] = dry_run
+    return Response(report, status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(
+    method='post',
+    operation_description="Roll classes over to a new academic year. Set preview=true to see the plan without saving.",
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['academic_year', 'mappings'],
+        properties={
+            'academic_year': openapi.Schema(type=openapi.TYPE_STRING, description='e.g. 2026-2027'),
+            'preview': openapi.Schema(type=openapi.TYPE_BOOLEAN, description='Return the plan only'),
+            'deactivate_old_classes': openapi.Schema(type=openapi.TYPE_BOOLEAN, description='Default true'),
+            'end_old_assignments': openapi.Schema(
+                type=openapi.TYPE_BOOLEAN,
+                description="End teachers' assignments to the old classes, even if those stay active. Default true"
+            ),
+            'mappings': openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'from_class_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'to_class_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Existing class'),
+                        'new_class': openapi.Schema(type=openapi.TYPE_OBJECT, description='Class to create'),
+                        'teachers': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_OBJECT),
+                            description='[{teacher_id, role}]; omit to carry over the current teachers'
+                        ),
+                    }
+                )
+            ),
+        }
+    ),
+    responses={
+        200: openapi.Response(description="Rollover plan (preview) or result"),
+        400: openapi.Response(description="Invalid mapping"),
+        403: openapi.Response(description="Only admins can roll over academic years")
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def academic_year_rollover(request):
+    """
+    Move students and teachers from last year's classes to the new year's
+    classes in a single transaction
+    """
+    serializer = AcademicYearRolloverSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    preview = str(request.data.get('preview', 'false')).lower() == 'true'
+    if preview:
+        return Response(serializer.preview(), status=status.HTTP_200_OK)
+
+    try:
+        result = serializer.save()
+    except Exception as e:
+        return Response(
+            {'error': f'Rollover failed: {str(e)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(result, status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Ranked, prefix-aware search across students, classes and teachers for type-ahead",
+    operation_summary="Search students, classes and teachers",
+    tags=['Admin - Class Management'],
+    security=[{'Bearer': []}],
+    manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                          description='Search text; every word is matched as a prefix'),
+        openapi.Parameter('types', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                          description='Comma separated entity types: student, class, teacher'),
+        openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                          description='Maximum results (default 20, max 50)'),
+        openapi.Parameter('include_inactive', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                          description='Include deactivated records'),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Search results ordered by relevance",
+            examples={
+                "application/json": {
+                    "query": "sun",
+                    "results": [
+                        {"type": "class", "id": 3, "title": "Sunflowers", "subtitle": "SUN1", "is_active": True}
+                    ]
+                }
+            }
+        ),
+        400: openapi.Response(description="Invalid entity type"),
+        403: openapi.Response(description="Only admins can search")
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_search(request):
+    """
+    Type-ahead search for admin screens and assignment pickers
+    """
+    query = request.query_params.get('q', '').strip()
+    valid_types = [choice[0] for choice in SearchDocument.ENTITY_TYPES]
+    types_param = request.query_params.get('types', '')
+    entity_types = [t.strip() for t in types_param.split(',') if t.strip()]
+    invalid_types = set(entity_types) - set(valid_types)
+    if invalid_types:
+        return Response(
+            {'error': f'Invalid types: {sorted(invalid_types)}. Use {valid_types}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+    except ValueError:
+        limit = 20
+    include_inactive = request.query_params.get('include_inactive', 'false').lower() == 'true'
+
+    documents = search_documents(
+        query, entity_types or None, limit=limit, active_only=not include_inactive
+    )
+    return Response({
+        'query': query,
+        'results': [
+            {
+                'type': doc.entity_type,
+                'id': doc.entity_id,
+                'title': doc.title,
+                'subtitle': doc.subtitle,
+                'is_active': doc.is_active,
+            }
+            for doc in documents
+        ]
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminUser])
 def dashboard_statistics(request):
@@ -404,44 +596,9 @@ def dashboard_statistics(request):
     Get dashboard statistics for admin overview
     """
     try:
-        stats = {
-            'total_classes': Class.objects.filter(is_active=True).count(),
-            'total_students': Student.objects.filter(is_active=True).count(),
-            'total_teachers': Teacher.objects.filter(is_active=True).count(),
-            'enrolled_students': Student.objects.filter(
-                class_enrollments__is_active=True
-            ).distinct().count(),
-            'unassigned_students': Student.objects.filter(
-                is_active=True
-            ).exclude(
-                class_enrollments__is_active=True
-            ).count(),
-            'assigned_teachers': Teacher.objects.filter(
-                class_assignments__is_active=True
-            ).distinct().count(),
-            'unassigned_teachers': Teacher.objects.filter(
-                is_active=True
-            ).exclude(
-                class_assignments__is_active=True
-            ).count(),
-        }
-        
-        # Class utilization
-        classes_with_stats = Class.objects.filter(is_active=True).annotate(
-            student_count=Count('student_enrollments', filter=Q(student_enrollments__is_active=True))
-        )
-        
-        class_utilization = []
-        for class_obj in classes_with_stats:
-            utilization_percent = (class_obj.student_count / class_obj.capacity * 100) if class_obj.capacity > 0 else 0
-            class_utilization.append({
-                'class_name': class_obj.class_name,
-                'student_count': class_obj.student_count,
-                'capacity': class_obj.capacity,
-                'utilization_percent': round(utilization_percent, 1)
-            })
-        
-        stats['class_utilization'] = class_utilization
+        snapshot = get_dashboard_statistics()
+        stats = dict(snapshot['data'])
+        stats['generated_at'] = snapshot['generated_at']
         
         return Response(stats, status=status.HTTP_200_OK)
         
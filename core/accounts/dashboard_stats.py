@@ -0,0 +1,175 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from core.models import (
+    Class, Student, Teacher, ClassStudentEnrollment, ClassTeacherAssignment
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'dashboard_stats:snapshot'
+DIRTY_KEY = 'dashboard_stats:dirty'
+LOCK_KEY = 'dashboard_stats:lock'
+
+# Only one thread per process recomputes; the cache lock covers other processes
+_local_lock = threading.Lock()
+
+
+def _fresh_ttl():
+    return getattr(settings, 'DASHBOARD_STATS_CACHE_TTL', 60)
+
+
+def _stale_ttl():
+    return getattr(settings, 'DASHBOARD_STATS_STALE_TTL', 600)
+
+
+def compute_dashboard_statistics():
+    """
+    Compute admin dashboard figures with three aggregate queries
+    (students, teachers, class utilization)
+    """
+    active_enrollment = ClassStudentEnrollment.objects.filter(
+        student=OuterRef('pk'), is_active=True
+    )
+    student_stats = Student.objects.annotate(
+        has_enrollment=Exists(active_enrollment)
+    ).aggregate(
+        total_students=Count('pk', filter=Q(is_active=True)),
+        enrolled_students=Count('pk', filter=Q(has_enrollment=True)),
+        unassigned_students=Count('pk', filter=Q(is_active=True, has_enrollment=False)),
+    )
+
+    active_assignment = ClassTeacherAssignment.objects.filter(
+        teacher=OuterRef('pk'), is_active=True
+    )
+    teacher_stats = Teacher.objects.annotate(
+        has_assignment=Exists(active_assignment)
+    ).aggregate(
+        total_teachers=Count('pk', filter=Q(is_active=True)),
+        assigned_teachers=Count('pk', filter=Q(has_assignment=True)),
+        unassigned_teachers=Count('pk', filter=Q(is_active=True, has_assignment=False)),
+    )
+
+    classes = Class.objects.filter(is_active=True).annotate(
+        student_count=Count('student_enrollments', filter=Q(student_enrollments__is_active=True))
+    ).values_list('class_name', 'student_count', 'capacity')
+
+    class_utilization = []
+    for class_name, student_count, capacity in classes:
+        utilization_percent = (student_count / capacity * 100) if capacity > 0 else 0
+        class_utilization.append({
+            'class_name': class_name,
+            'student_count': student_count,
+            'capacity': capacity,
+            'utilization_percent': round(utilization_percent, 1)
+        })
+
+    return {
+        'total_classes': len(class_utilization),
+        'total_students': student_stats['total_students'],
+        'total_teachers': teacher_stats['total_teachers'],
+        'enrolled_students': student_stats['enrolled_students'],
+        'unassigned_students': student_stats['unassigned_students'],
+        'assigned_teachers': teacher_stats['assigned_teachers'],
+        'unassigned_teachers': teacher_stats['unassigned_teachers'],
+        'class_utilization': class_utilization,
+    }
+
+
+def mark_dashboard_stats_dirty():
+    """Flag the cached snapshot as out of date so the next read revalidates it"""
+    cache.set(DIRTY_KEY, time.time(), _stale_ttl())
+
+
+def refresh_dashboard_statistics():
+    """
+    Recompute and store the snapshot. Returns the new snapshot, or None if
+    another worker already holds the recomputation lock.
+    """
+    if not _local_lock.acquire(blocking=False):
+        return None
+    try:
+        if not cache.add(LOCK_KEY, True, 30):
+            return None
+        try:
+            started_at = time.time()
+            data = compute_dashboard_statistics()
+            snapshot = {
+                'data': data,
+                'computed_at': started_at,
+                'generated_at': timezone.now().isoformat(),
+            }
+            cache.set(SNAPSHOT_KEY, snapshot, _stale_ttl())
+            # Only clear the flag if nothing was changed while we were computing
+            dirty_at = cache.get(DIRTY_KEY)
+            if dirty_at is not None and dirty_at <= started_at:
+                cache.delete(DIRTY_KEY)
+            return snapshot
+        finally:
+            cache.delete(LOCK_KEY)
+    finally:
+        _local_lock.release()
+
+
+def _refresh_in_background():
+    def run():
+        try:
+            refresh_dashboard_statistics()
+        except Exception as e:
+            logger.error(f"Dashboard statistics refresh failed: {e}")
+        finally:
+            close_old_connections()
+
+    thread = threading.Thread(target=run, name='dashboard-stats-refresh', daemon=True)
+    thread.start()
+
+
+def _is_stale(snapshot):
+    if time.time() - snapshot['computed_at'] > _fresh_ttl():
+        return True
+    dirty_at = cache.get(DIRTY_KEY)
+    return dirty_at is not None and dirty_at > snapshot['computed_at']
+
+
+def get_dashboard_statistics(wait_timeout=5.0):
+    """
+    Return the dashboard statistics snapshot.
+
+    Fresh snapshots are served from cache. Stale or dirty snapshots are still
+    served while a single background refresh runs. With no snapshot at all,
+    one caller computes it and concurrent callers wait for that result.
+    """
+    snapshot = cache.get(SNAPSHOT_KEY)
+
+    if snapshot is not None:
+        if _is_stale(snapshot):
+            if getattr(settings, 'DASHBOARD_STATS_ASYNC_REFRESH', True):
+                _refresh_in_background()
+            else:
+                snapshot = refresh_dashboard_statistics() or snapshot
+        return snapshot
+
+    snapshot = refresh_dashboard_statistics()
+    if snapshot is not None:
+        return snapshot
+
+    # Someone else is computing the first snapshot; wait for it rather than stampede
+    deadline = time.time() + wait_timeout
+    while time.time() < deadline:
+        time.sleep(0.05)
+        snapshot = cache.get(SNAPSHOT_KEY)
+        if snapshot is not None:
+            return snapshot
+
+    return {
+        'data': compute_dashboard_statistics(),
+        'computed_at': time.time(),
+        'generated_at': timezone.now().isoformat(),
+    }
@@ -5,11 +5,11 @@ from django.conf import settings
 logger = logging.getLogger(__name__)
 
 
-def send_verification_email(user):
+def send_verification_email(user, token):
     """Send email verification email to user"""
     try:
         frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:5174')
-        verification_url = f"{frontend_url}/verify-email/{user.email_verification_token}"
+        verification_url = f"{frontend_url}/verify-email/{token}"
         
         message = f"""
 Hi {user.first_name},
@@ -66,12 +66,12 @@ Jamie Aale Abba - LMS Team
         return False
 
 
-def send_password_reset_email(user):
+def send_password_reset_email(user, token):
     """Send password reset email to user"""
     try:
         # Use the configured frontend URL from settings
         frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:5174')
-        reset_url = f"{frontend_url}/reset-password/{user.password_reset_token}"
+        reset_url = f"{frontend_url}/reset-password/{token}"
         
         message = f"""
 Hi {user.first_name},
@@ -0,0 +1,196 @@
+import base64
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import AllowedMessageContact, Message, MessageThread
+
+logger = logging.getLogger(__name__)
+
+CONTACTS_KEY = 'message_contacts:{}:{}'
+
+
+def _contacts_ttl():
+    return getattr(settings, 'MESSAGE_CONTACTS_CACHE_TTL', 300)
+
+
+def _profile(user):
+    """(role, profile id) for parents and teachers, None for anyone else"""
+    if user.user_type == 'parent' and hasattr(user, 'parent_profile'):
+        return 'parent', user.parent_profile.pk
+    if user.user_type == 'teacher' and hasattr(user, 'teacher_profile'):
+        return 'teacher', user.teacher_profile.pk
+    return None
+
+
+def contact_user_ids(user):
+    """
+    User ids a parent or teacher may message, from active
+    AllowedMessageContact rows; cached per profile
+    """
+    profile = _profile(user)
+    if profile is None:
+        return frozenset()
+    role, profile_id = profile
+    key = CONTACTS_KEY.format(role, profile_id)
+    user_ids = cache.get(key)
+    if user_ids is None:
+        contacts = AllowedMessageContact.objects.filter(
+            is_active=True, parent__is_active=True, teacher__is_active=True
+        )
+        if role == 'parent':
+            rows = contacts.filter(parent_id=profile_id).values_list('teacher__user_id', flat=True)
+        else:
+            rows = contacts.filter(teacher_id=profile_id).values_list('parent__user_id', flat=True)
+        user_ids = frozenset(rows)
+        cache.set(key, user_ids, _contacts_ttl())
+    return user_ids
+
+
+def invalidate_contacts(parent_id, teacher_id):
+    cache.delete_many([CONTACTS_KEY.format('parent', parent_id), CONTACTS_KEY.format('teacher', teacher_id)])
+
+
+def can_message(sender, recipient):
+    """Admins message and are messaged freely; parents and teachers need an allowed contact"""
+    if sender.pk == recipient.pk or not recipient.is_active:
+        return False
+    if sender.user_type == 'admin' or recipient.user_type == 'admin':
+        return True
+    return recipient.pk in contact_user_ids(sender)
+
+
+def _slot(thread, user):
+    """Which participant the user is in the thread: 1 or 2"""
+    return 1 if thread.participant1_user_id == user.pk else 2
+
+
+def unread_count_for(thread, user):
+    return getattr(thread, f'participant{_slot(thread, user)}_unread_count')
+
+
+def get_or_create_thread(sender, recipient):
+    """The thread between two users; participant1 is always the lower user id"""
+    first, second = sorted([sender, recipient], key=lambda user: user.pk)
+    thread, _ = MessageThread.objects.get_or_create(
+        participant1_user=first,
+        participant2_user=second,
+        defaults={'participant1_type': first.user_type, 'participant2_type': second.user_type},
+    )
+    return thread
+
+
+def send_message(thread, sender, message_text, message_type='text', attachment_url='', attachment_name=''):
+    """
+    Store a message and, in the same transaction, move the thread to the top
+    of both inboxes and add one to the recipient's unread counter
+    """
+    recipient_slot = 2 if _slot(thread, sender) == 1 else 1
+    recipient_id = getattr(thread, f'participant{recipient_slot}_user_id')
+    with transaction.atomic():
+        message = Message.objects.create(
+            thread=thread,
+            sender_user=sender,
+            recipient_user_id=recipient_id,
+            message_text=message_text,
+            message_type=message_type,
+            attachment_url=attachment_url,
+            attachment_name=attachment_name,
+        )
+        counter = f'participant{recipient_slot}_unread_count'
+        MessageThread.objects.filter(pk=thread.pk).update(**{
+            counter: F(counter) + 1,
+            'last_message_at': message.created_at,
+            'last_message_by_user': sender,
+            'is_archived': False,
+            'updated_at': timezone.now(),
+        })
+    return message
+
+
+def mark_thread_read(thread, user, up_to_id=None):
+    """
+    Mark the user's unread messages in the thread as read (up to and including
+    up_to_id if given) with one UPDATE, and take the same number off the
+    counter. Returns how many messages were marked.
+    """
+    unread = Message.objects.filter(thread=thread, recipient_user=user, is_read=False)
+    if up_to_id is not None:
+        unread = unread.filter(id__lte=up_to_id)
+    counter = f'participant{_slot(thread, user)}_unread_count'
+    with transaction.atomic():
+        marked = unread.update(is_read=True, read_at=timezone.now())
+        if marked:
+            # Only rows this UPDATE flipped are counted, so concurrent readers can't double-decrement.
+            # A counter that drifted below `marked` goes to 0 without subtracting, since the
+            # column is unsigned on MySQL and a negative intermediate value is an error there
+            MessageThread.objects.filter(pk=thread.pk).update(**{counter: Case(
+                When(**{f'{counter}__gte': marked}, then=F(counter) - marked), default=Value(0)
+            )})
+    return marked
+
+
+def total_unread(user):
+    """Unread messages across all the user's threads, from the per-thread counters"""
+    as_first = MessageThread.objects.filter(participant1_user=user).aggregate(total=Sum('participant1_unread_count'))
+    as_second = MessageThread.objects.filter(participant2_user=user).aggregate(total=Sum('participant2_unread_count'))
+    return (as_first['total'] or 0) + (as_second['total'] or 0)
+
+
+def user_threads(user):
+    return MessageThread.objects.filter(Q(participant1_user=user) | Q(participant2_user=user))
+
+
+def encode_cursor(thread):
+    return base64.urlsafe_b64encode(f'{thread.last_message_at.isoformat()}|{thread.pk}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(last_message_at, id) from an inbox cursor, or None if it is malformed"""
+    try:
+        timestamp, thread_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        last_message_at = parse_datetime(timestamp)
+        return (last_message_at, int(thread_id)) if last_message_at else None
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def inbox_page(user, limit, cursor=None):
+    """
+    Threads with messages, newest first, keyset-paginated on
+    (last_message_at, id). Each participant column is read separately
+    so both use their (participant, last_message_at, id) index; the two
+    short results are merged here. Returns (threads, next_cursor).
+    """
+    page = []
+    for participant in ('participant1_user', 'participant2_user'):
+        threads = MessageThread.objects.filter(
+            **{participant: user}, last_message_at__isnull=False
+        ).select_related('participant1_user', 'participant2_user')
+        if cursor:
+            last_message_at, thread_id = cursor
+            threads = threads.filter(
+                Q(last_message_at__lt=last_message_at) | Q(last_message_at=last_message_at, id__lt=thread_id)
+            )
+        page.extend(threads.order_by('-last_message_at', '-id')[:limit + 1])
+
+    page.sort(key=lambda thread: (thread.last_message_at, thread.pk), reverse=True)
+    has_more = len(page) > limit
+    page = page[:limit]
+    return page, encode_cursor(page[-1]) if has_more else None
+
+
+def message_page(thread, limit, before_id=None):
+    """Messages newest first, keyset-paginated on id. Returns (messages, next_before_id)."""
+    messages = Message.objects.filter(thread=thread)
+    if before_id is not None:
+        messages = messages.filter(id__lt=before_id)
+    page = list(messages.order_by('-id')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    return page, page[-1].pk if has_more else None
@@ -0,0 +1,55 @@
+from rest_framework import serializers
+from core.models import Message, MessageThread
+from .messaging import unread_count_for
+
+
+class MessageSerializer(serializers.ModelSerializer):
+    """A single message in a thread"""
+
+    class Meta:
+        model = Message
+        fields = [
+            'id', 'sender_user', 'recipient_user', 'message_text', 'message_type',
+            'attachment_url', 'attachment_name', 'is_read', 'read_at', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class MessageThreadSerializer(serializers.ModelSerializer):
+    """Inbox entry as seen by the requesting user"""
+    other_participant = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MessageThread
+        fields = [
+            'thread_id', 'other_participant', 'last_message_at', 'last_message_by_user',
+            'unread_count', 'is_archived', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_other_participant(self, obj):
+        user = self.context['request'].user
+        other = obj.participant2_user if obj.participant1_user_id == user.pk else obj.participant1_user
+        return {
+            'id': other.id,
+            'name': other.get_full_name() or other.email,
+            'user_type': other.user_type,
+        }
+
+    def get_unread_count(self, obj):
+        return unread_count_for(obj, self.context['request'].user)
+
+
+class SendMessageSerializer(serializers.Serializer):
+    """Message body; recipient_user_id is required only when starting a thread"""
+    recipient_user_id = serializers.IntegerField(required=False)
+    message_text = serializers.CharField(max_length=5000)
+    message_type = serializers.ChoiceField(choices=Message.MESSAGE_TYPES, default='text')
+    attachment_url = serializers.URLField(max_length=500, required=False, allow_blank=True, default='')
+    attachment_name = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+
+class MarkReadSerializer(serializers.Serializer):
+    """Mark everything up to this message as read; omit to mark the whole thread"""
+    up_to_message_id = serializers.IntegerField(required=False)
@@ -0,0 +1,133 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from core.models import User
+from .messaging import (
+    can_message, decode_cursor, get_or_create_thread, inbox_page, mark_thread_read,
+    message_page, send_message, total_unread, unread_count_for, user_threads
+)
+from .messaging_serializers import (
+    MarkReadSerializer, MessageSerializer, MessageThreadSerializer, SendMessageSerializer
+)
+
+
+def _page_size(request):
+    """?limit=, capped at MESSAGES_MAX_PAGE_SIZE"""
+    maximum = getattr(settings, 'MESSAGES_MAX_PAGE_SIZE', 50)
+    try:
+        return max(1, min(int(request.query_params.get('limit', 20)), maximum))
+    except ValueError:
+        return 20
+
+
+def _get_thread(request, thread_id):
+    return user_threads(request.user).filter(thread_id=thread_id).first()
+
+
+def _send(request, thread, data):
+    message = send_message(
+        thread, request.user, data['message_text'], data['message_type'],
+        data['attachment_url'], data['attachment_name']
+    )
+    return Response({
+        'message': 'Message sent successfully',
+        'thread_id': str(thread.thread_id),
+        'data': MessageSerializer(message).data
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def message_threads(request):
+    """
+    GET: the user's inbox, newest conversation first. Pass the returned
+    next_cursor as ?cursor= for the following page.
+    POST: send a message to recipient_user_id, starting the thread if needed.
+    """
+    if request.method == 'GET':
+        cursor = None
+        if request.query_params.get('cursor'):
+            cursor = decode_cursor(request.query_params['cursor'])
+            if cursor is None:
+                return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        threads, next_cursor = inbox_page(request.user, _page_size(request), cursor)
+        return Response({
+            'results': MessageThreadSerializer(threads, many=True, context={'request': request}).data,
+            'next_cursor': next_cursor,
+        }, status=status.HTTP_200_OK)
+
+    serializer = SendMessageSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    recipient_id = serializer.validated_data.get('recipient_user_id')
+    if recipient_id is None:
+        return Response({'error': 'recipient_user_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+    recipient = User.objects.filter(pk=recipient_id).first()
+    if recipient is None or not can_message(request.user, recipient):
+        return Response(
+            {'error': 'You are not allowed to message this user'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    thread = get_or_create_thread(request.user, recipient)
+    return _send(request, thread, serializer.validated_data)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def thread_messages(request, thread_id):
+    """
+    GET: messages in a thread, newest first. Pass next_before as ?before=
+    for older messages.
+    POST: reply in the thread.
+    """
+    thread = _get_thread(request, thread_id)
+    if thread is None:
+        return Response({'error': 'Thread not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'GET':
+        try:
+            before_id = int(request.query_params['before']) if request.query_params.get('before') else None
+        except ValueError:
+            return Response({'error': 'Invalid before parameter'}, status=status.HTTP_400_BAD_REQUEST)
+        messages, next_before = message_page(thread, _page_size(request), before_id)
+        return Response({
+            'thread': MessageThreadSerializer(thread, context={'request': request}).data,
+            'results': MessageSerializer(messages, many=True).data,
+            'next_before': next_before,
+        }, status=status.HTTP_200_OK)
+
+    serializer = SendMessageSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    recipient = thread.participant2_user if thread.participant1_user_id == request.user.pk else thread.participant1_user
+    # Checked on every reply: a contact can be withdrawn after the thread started
+    if not can_message(request.user, recipient):
+        return Response(
+            {'error': 'You are not allowed to message this user'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return _send(request, thread, serializer.validated_data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_thread_messages_read(request, thread_id):
+    """Mark the user's received messages in a thread as read"""
+    thread = _get_thread(request, thread_id)
+    if thread is None:
+        return Response({'error': 'Thread not found'}, status=status.HTTP_404_NOT_FOUND)
+    serializer = MarkReadSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    marked = mark_thread_read(thread, request.user, serializer.validated_data.get('up_to_message_id'))
+    thread.refresh_from_db(fields=['participant1_unread_count', 'participant2_unread_count'])
+    return Response({
+        'marked_read': marked,
+        'unread_count': unread_count_for(thread, request.user),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def unread_message_count(request):
+    """Total unread messages for the navigation badge"""
+    return Response({'unread_count': total_unread(request.user)}, status=status.HTTP_200_OK)
@@ -4,8 +4,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q, Sum, Count
 from datetime import datetime, timedelta
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from core.api_docs import openapi, swagger_auto_schema
 from core.models import Student, Parent, ParentStudentRelationship, Class, StudentLearningRecord, LearningActivity
 from .parent_child_serializers import (
     ChildDetailSerializer, ChildListSerializer, AddChildSerializer,
@@ -1,9 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.utils import timezone
-from core.models import User
-import uuid
+from django.db import transaction
+from core.models import AccountToken, User
 
 
 # Password Reset Request Serializer
@@ -35,28 +34,27 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
         return attrs
 
     def validate_token(self, value):
-        # Check if token exists and is not expired (valid for 1 hour)
-        try:
-            user = User.objects.get(
-                password_reset_token=value,
-                password_reset_sent_at__gte=timezone.now() - timezone.timedelta(hours=1),
-                is_active=True
-            )
-        except User.DoesNotExist:
+        # Check if token exists, is unused and not expired (valid for 1 hour)
+        account_token = AccountToken.objects.lookup(value, AccountToken.PASSWORD_RESET)
+        if account_token is None or account_token.is_expired or not account_token.user.is_active:
             raise serializers.ValidationError("Invalid or expired reset token.")
         
-        # Store user instance for use in save method
-        self.user = user
+        # Store token and user for use in save method
+        self.account_token = account_token
+        self.user = account_token.user
         return value
 
     def save(self):
         new_password = self.validated_data['new_password']
         
-        # Update password and clear reset token
-        self.user.set_password(new_password)
-        self.user.password_reset_token = None
-        self.user.password_reset_sent_at = None
-        self.user.must_change_password = False  # Clear any password change requirement
-        self.user.save()
+        with transaction.atomic():
+            # Use up the reset token; a concurrent request may have beaten us to it
+            if not self.account_token.consume():
+                raise serializers.ValidationError({"token": "Invalid or expired reset token."})
+            
+            # Update password
+            self.user.set_password(new_password)
+            self.user.must_change_password = False  # Clear any password change requirement
+            self.user.save()
         
         return self.user
\ No newline at end of file
@@ -2,15 +2,12 @@ from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
-from core.models import User
+from core.api_docs import openapi, swagger_auto_schema
+from core.models import AccountToken, User
 from .password_reset_serializers import PasswordResetRequestSerializer, PasswordResetConfirmSerializer
 from .email_service import send_password_reset_email
-import uuid
 import logging
 
 logger = logging.getLogger(__name__)
@@ -40,12 +37,10 @@ class PasswordResetRequestView(APIView):
                 user = User.objects.get(email=email, is_active=True)
                 
                 # Generate new reset token
-                user.password_reset_token = uuid.uuid4()
-                user.password_reset_sent_at = timezone.now()
-                user.save()
+                token = user.generate_password_reset_token()
                 
                 # Send reset email
-                if send_password_reset_email(user):
+                if send_password_reset_email(user, token):
                     logger.info(f"Password reset requested for {email}")
                     return Response({
                         'message': 'If an account with this email exists, you will receive a password reset link shortly.'
@@ -104,20 +99,16 @@ class PasswordResetConfirmView(APIView):
 @permission_classes([permissions.AllowAny])
 def validate_reset_token(request, token):
     """Validate if a password reset token is still valid"""
-    try:
-        user = User.objects.get(
-            password_reset_token=token,
-            password_reset_sent_at__gte=timezone.now() - timezone.timedelta(hours=1),
-            is_active=True
-        )
-        return Response({
-            'valid': True,
-            'email': user.email,
-            'user_type': user.user_type
-        }, status=status.HTTP_200_OK)
-        
-    except User.DoesNotExist:
+    account_token = AccountToken.objects.lookup(token, AccountToken.PASSWORD_RESET)
+    if account_token is None or account_token.is_expired or not account_token.user.is_active:
         return Response({
             'valid': False,
             'error': 'Invalid or expired token'
-        }, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    user = account_token.user
+    return Response({
+        'valid': True,
+        'email': user.email,
+        'user_type': user.user_type
+    }, status=status.HTTP_200_OK)
\ No newline at end of file
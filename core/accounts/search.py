@@ -0,0 +1,258 @@
+import logging
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from core.models import SearchDocument
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'search_documents_fts'
+
+# InnoDB ignores FULLTEXT tokens shorter than innodb_ft_min_token_size (default 3)
+MYSQL_MIN_TOKEN_LENGTH = 3
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_fts_available = {}
+
+
+def build_student_document(student):
+    return {
+        'title': student.student_name,
+        'subtitle': student.student_id,
+        'body': ' '.join(filter(None, [student.student_name, student.student_id])),
+        'is_active': student.is_active,
+    }
+
+
+def build_class_document(class_obj):
+    return {
+        'title': class_obj.class_name,
+        'subtitle': class_obj.class_code,
+        'body': ' '.join(filter(None, [class_obj.class_name, class_obj.class_code, class_obj.age_group])),
+        'is_active': class_obj.is_active,
+    }
+
+
+def build_teacher_document(teacher):
+    user = teacher.user
+    full_name = f"{user.first_name} {user.last_name}".strip()
+    return {
+        'title': full_name or user.email,
+        'subtitle': teacher.employee_id,
+        'body': ' '.join(filter(None, [user.first_name, user.last_name, user.email, teacher.employee_id])),
+        'is_active': teacher.is_active,
+    }
+
+
+DOCUMENT_BUILDERS = {
+    'student': build_student_document,
+    'class': build_class_document,
+    'teacher': build_teacher_document,
+}
+
+
+def index_entity(entity_type, instance):
+    """Create or refresh the search document for a student, class or teacher"""
+    try:
+        SearchDocument.objects.update_or_create(
+            entity_type=entity_type,
+            entity_id=instance.pk,
+            defaults=DOCUMENT_BUILDERS[entity_type](instance)
+        )
+    except Exception as e:
+        # Search must never block saving the underlying record
+        logger.error(f"Failed to index {entity_type} {instance.pk}: {e}")
+
+
+def index_new_entities(entity_type, instances):
+    """Index rows created with bulk_create, which does not send post_save"""
+    builder = DOCUMENT_BUILDERS[entity_type]
+    SearchDocument.objects.bulk_create(
+        [SearchDocument(entity_type=entity_type, entity_id=obj.pk, **builder(obj)) for obj in instances],
+        ignore_conflicts=True
+    )
+
+
+def set_entities_active(entity_type, entity_ids, is_active):
+    """Mirror a queryset update of is_active, which does not send post_save"""
+    SearchDocument.objects.filter(
+        entity_type=entity_type, entity_id__in=entity_ids
+    ).update(is_active=is_active)
+
+
+def remove_entity(entity_type, entity_id):
+    SearchDocument.objects.filter(entity_type=entity_type, entity_id=entity_id).delete()
+
+
+def tokenize(query):
+    return [token.lower() for token in _TOKEN_RE.findall(query or '')][:8]
+
+
+def _has_fts_table():
+    alias = connection.alias
+    if alias not in _fts_available:
+        _fts_available[alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available[alias]
+
+
+def _sqlite_match(tokens):
+    # Quote every token and make it a prefix match so "jo" finds "john"
+    return ' '.join('"{}"*'.format(token.replace('"', '')) for token in tokens)
+
+
+def _mysql_against(tokens):
+    return ' '.join(f'+{token}*' for token in tokens if len(token) >= MYSQL_MIN_TOKEN_LENGTH)
+
+
+def _sqlite_search(tokens, entity_types, active_only, limit):
+    match = _sqlite_match(tokens)
+    sql = (
+        f"SELECT d.id FROM {FTS_TABLE} "
+        f"JOIN search_documents d ON d.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s"
+    )
+    params = [match]
+    if entity_types:
+        sql += " AND d.entity_type IN ({})".format(', '.join(['%s'] * len(entity_types)))
+        params.extend(entity_types)
+    if active_only:
+        sql += " AND d.is_active = 1"
+    # bm25 is lower-is-better; weight title matches above body matches
+    sql += f" ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s"
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _mysql_search(tokens, entity_types, active_only, limit):
+    fulltext_tokens = [t for t in tokens if len(t) >= MYSQL_MIN_TOKEN_LENGTH]
+    short_tokens = [t for t in tokens if len(t) < MYSQL_MIN_TOKEN_LENGTH]
+    if not fulltext_tokens:
+        return None
+
+    against = _mysql_against(tokens)
+    sql = (
+        "SELECT id FROM search_documents "
+        "WHERE MATCH(title, body) AGAINST (%s IN BOOLEAN MODE)"
+    )
+    params = [against]
+    for token in short_tokens:
+        sql += " AND body LIKE %s"
+        params.append(f'%{token}%')
+    if entity_types:
+        sql += " AND entity_type IN ({})".format(', '.join(['%s'] * len(entity_types)))
+        params.extend(entity_types)
+    if active_only:
+        sql += " AND is_active = 1"
+    sql += " ORDER BY MATCH(title, body) AGAINST (%s IN BOOLEAN MODE) DESC LIMIT %s"
+    params.extend([against, limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fallback_search(tokens, entity_types, active_only, limit):
+    queryset = SearchDocument.objects.all()
+    for token in tokens:
+        queryset = queryset.filter(body__icontains=token)
+    if entity_types:
+        queryset = queryset.filter(entity_type__in=entity_types)
+    if active_only:
+        queryset = queryset.filter(is_active=True)
+    # Rank names that start with the first token ahead of other matches
+    starts = queryset.filter(title__istartswith=tokens[0]).order_by('title')
+    ids = list(starts.values_list('id', flat=True)[:limit])
+    if len(ids) < limit:
+        ids += list(
+            queryset.exclude(id__in=ids).order_by('title').values_list('id', flat=True)[:limit - len(ids)]
+        )
+    return ids
+
+
+def search_document_ids(query, entity_types=None, limit=20, active_only=False):
+    """
+    Return ranked SearchDocument ids matching every token in query as a prefix.
+
+    Uses SQLite FTS5 or MySQL FULLTEXT when available and falls back to a
+    scan of the (small) search_documents table otherwise.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+
+    ids = None
+    if connection.vendor == 'sqlite' and _has_fts_table():
+        ids = _sqlite_search(tokens, entity_types, active_only, limit)
+    elif connection.vendor == 'mysql':
+        ids = _mysql_search(tokens, entity_types, active_only, limit)
+
+    if ids is None:
+        ids = _fallback_search(tokens, entity_types, active_only, limit)
+    return ids
+
+
+def search_documents(query, entity_types=None, limit=20, active_only=False):
+    """Return ranked SearchDocument rows for the query"""
+    ids = search_document_ids(query, entity_types, limit, active_only)
+    documents = SearchDocument.objects.in_bulk(ids)
+    return [documents[doc_id] for doc_id in ids if doc_id in documents]
+
+
+def search_entity_ids(entity_type, query):
+    """
+    Subquery of the primary keys of one entity type matching every token in
+    query, for filtering list views. Unranked and unlimited, so paginated
+    counts and results cover every match.
+    """
+    tokens = tokenize(query)
+    documents = SearchDocument.objects.filter(entity_type=entity_type)
+    if not tokens:
+        return documents.none().values('entity_id')
+
+    if connection.vendor == 'sqlite' and _has_fts_table():
+        return documents.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [_sqlite_match(tokens)]
+        )).values('entity_id')
+
+    short_tokens = tokens
+    if connection.vendor == 'mysql' and _mysql_against(tokens):
+        documents = documents.filter(id__in=RawSQL(
+            "SELECT id FROM search_documents WHERE MATCH(title, body) AGAINST (%s IN BOOLEAN MODE)",
+            [_mysql_against(tokens)]
+        ))
+        short_tokens = [t for t in tokens if len(t) < MYSQL_MIN_TOKEN_LENGTH]
+    for token in short_tokens:
+        documents = documents.filter(body__icontains=token)
+    return documents.values('entity_id')
+
+
+def rebuild_search_index():
+    """Reindex every student, class and teacher. Returns the number of documents."""
+    from core.models import Student, Class, Teacher
+
+    sources = [
+        ('student', Student.objects.all()),
+        ('class', Class.objects.all()),
+        ('teacher', Teacher.objects.select_related('user')),
+    ]
+    SearchDocument.objects.all().delete()
+    total = 0
+    for entity_type, queryset in sources:
+        builder = DOCUMENT_BUILDERS[entity_type]
+        batch = []
+        for instance in queryset.iterator(chunk_size=500):
+            batch.append(SearchDocument(entity_type=entity_type, entity_id=instance.pk, **builder(instance)))
+            if len(batch) >= 500:
+                SearchDocument.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            SearchDocument.objects.bulk_create(batch)
+            total += len(batch)
+    return total
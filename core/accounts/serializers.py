@@ -4,7 +4,7 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
-from core.models import User, Parent, Teacher, Admin
+from core.models import AccountToken, User, Parent, Teacher, Admin
 from django.utils import timezone
 import uuid
 
@@ -45,9 +45,6 @@ class ParentRegistrationSerializer(serializers.ModelSerializer):
                 is_email_verified=False
             )
             
-            # Generate verification token
-            user.generate_email_verification_token()
-            
             # Create parent profile
             Parent.objects.create(user=user)
             
@@ -110,13 +107,15 @@ class EmailVerificationSerializer(serializers.Serializer):
     token = serializers.UUIDField()
 
     def validate_token(self, value):
-        try:
-            user = User.objects.get(email_verification_token=value, is_email_verified=False)
-            if user.is_verification_token_expired():
-                raise serializers.ValidationError("Verification token has expired.")
-            return value
-        except User.DoesNotExist:
+        account_token = AccountToken.objects.lookup(value, AccountToken.EMAIL_VERIFICATION)
+        if account_token is None or account_token.user.is_email_verified:
             raise serializers.ValidationError("Invalid verification token.")
+        if account_token.is_expired:
+            raise serializers.ValidationError("Verification token has expired.")
+        
+        # Store user instance for the view
+        self.user = account_token.user
+        return value
 
 
 # Resend Verification Serializer
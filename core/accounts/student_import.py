@@ -0,0 +1,276 @@
+import csv
+import io
+import logging
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import (
+    Class, Student, Parent, ClassStudentEnrollment, ParentStudentRelationship
+)
+from .dashboard_stats import mark_dashboard_stats_dirty
+from .search import index_new_entities
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = {'student_id', 'student_name'}
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y']
+GENDERS = {choice[0] for choice in Student.GENDER_CHOICES}
+RELATIONSHIPS = {choice[0] for choice in ParentStudentRelationship.RELATIONSHIP_CHOICES}
+
+
+def _parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date '{value}'. Use YYYY-MM-DD")
+
+
+def _clean(row, key):
+    return (row.get(key) or '').strip()
+
+
+class StudentImportReport:
+    """Per-row outcome of a CSV student import"""
+
+    def __init__(self):
+        self.total_rows = 0
+        self.created = 0
+        self.enrollments = 0
+        self.relationships = 0
+        self.errors = []
+        self.warnings = []
+        self.stopped_at_line = None
+
+    def error(self, line, student_id, message):
+        self.errors.append({'line': line, 'student_id': student_id, 'error': message})
+
+    def warning(self, line, student_id, message):
+        self.warnings.append({'line': line, 'student_id': student_id, 'warning': message})
+
+    def as_dict(self):
+        return {
+            'total_rows': self.total_rows,
+            'created': self.created,
+            'enrollments_created': self.enrollments,
+            'parent_links_created': self.relationships,
+            'failed': len(self.errors),
+            'errors': self.errors,
+            'warnings': self.warnings,
+            'stopped_at_line': self.stopped_at_line,
+        }
+
+
+class StudentCSVImporter:
+    """
+    Stream a CSV of students and import it in chunks.
+
+    Columns: student_id, student_name (required), date_of_birth, gender,
+    medical_conditions, class_code, parent_emails (';' separated) and
+    relationship. Rows are validated against lookup maps built once per
+    chunk, so each chunk costs a fixed number of queries regardless of size.
+    Each chunk is saved on its own; if the file turns out to be unreadable
+    part way through, the report says where reading stopped.
+    """
+
+    def __init__(self, chunk_size=500, dry_run=False):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.report = StudentImportReport()
+        self.seen_student_ids = set()
+        self.classes_by_code = {}
+
+    def run(self, stream):
+        """Import from a text stream or a binary file (e.g. an uploaded file)"""
+        if not isinstance(stream, io.TextIOBase):
+            stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        reader = csv.DictReader(stream)
+
+        fieldnames = {name.strip() for name in (reader.fieldnames or [])}
+        missing = REQUIRED_COLUMNS - fieldnames
+        if missing:
+            self.report.error(1, None, f"Missing required columns: {', '.join(sorted(missing))}")
+            return self.report
+
+        # Class codes are few; load them once for the whole file
+        self.classes_by_code = {
+            class_obj.class_code.lower(): class_obj
+            for class_obj in Class.objects.filter(is_active=True)
+        }
+
+        chunk = []
+        line_number = 1
+        rows = enumerate(reader, start=2)
+        while True:
+            try:
+                line_number, row = next(rows)
+            except StopIteration:
+                break
+            except (UnicodeDecodeError, csv.Error) as e:
+                # Earlier chunks are already saved, so report them rather than failing the whole file
+                self.report.stopped_at_line = line_number + 1
+                self.report.error(
+                    line_number + 1, None,
+                    f'File could not be read from here on ({e}); earlier rows were processed, later rows were not'
+                )
+                break
+            row = {(key or '').strip(): value for key, value in row.items()}
+            chunk.append((line_number, row))
+            if len(chunk) >= self.chunk_size:
+                self._process_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._process_chunk(chunk)
+
+        if self.report.created and not self.dry_run:
+            mark_dashboard_stats_dirty()
+        return self.report
+
+    def _process_chunk(self, chunk):
+        self.report.total_rows += len(chunk)
+
+        chunk_ids = {_clean(row, 'student_id') for _, row in chunk}
+        existing_ids = set(
+            Student.objects.filter(student_id__in=chunk_ids).values_list('student_id', flat=True)
+        )
+        emails = set()
+        for _, row in chunk:
+            emails.update(e.strip().lower() for e in _clean(row, 'parent_emails').split(';') if e.strip())
+        parents_by_email = {
+            parent.user.email.lower(): parent
+            for parent in Parent.objects.filter(user__email__in=emails).select_related('user')
+        } if emails else {}
+
+        valid_rows = []
+        for line_number, row in chunk:
+            parsed = self._validate_row(line_number, row, existing_ids, parents_by_email)
+            if parsed:
+                valid_rows.append(parsed)
+
+        if valid_rows and not self.dry_run:
+            try:
+                self._write_chunk(valid_rows)
+            except Exception as e:
+                logger.error(f"Student import chunk failed: {e}")
+                for row in valid_rows:
+                    self.report.error(row['line'], row['student'].student_id, f'Chunk could not be saved: {e}')
+        elif valid_rows:
+            self.report.created += len(valid_rows)
+
+    def _validate_row(self, line_number, row, existing_ids, parents_by_email):
+        student_id = _clean(row, 'student_id')
+        student_name = _clean(row, 'student_name')
+
+        if not student_id or not student_name:
+            self.report.error(line_number, student_id or None, 'student_id and student_name are required')
+            return None
+        if len(student_id) > 50 or len(student_name) > 200:
+            self.report.error(line_number, student_id, 'student_id or student_name is too long')
+            return None
+        if student_id in existing_ids:
+            self.report.error(line_number, student_id, 'A student with this student_id already exists')
+            return None
+        if student_id in self.seen_student_ids:
+            self.report.error(line_number, student_id, 'Duplicate student_id in file')
+            return None
+
+        date_of_birth = None
+        if _clean(row, 'date_of_birth'):
+            try:
+                date_of_birth = _parse_date(_clean(row, 'date_of_birth'))
+            except ValueError as e:
+                self.report.error(line_number, student_id, str(e))
+                return None
+
+        gender = _clean(row, 'gender').lower()
+        if gender and gender not in GENDERS:
+            self.report.error(line_number, student_id, f"Invalid gender '{gender}'")
+            return None
+
+        class_obj = None
+        class_code = _clean(row, 'class_code')
+        if class_code:
+            class_obj = self.classes_by_code.get(class_code.lower())
+            if class_obj is None:
+                self.report.error(line_number, student_id, f"Unknown or inactive class code '{class_code}'")
+                return None
+
+        relationship = _clean(row, 'relationship').lower() or 'guardian'
+        if relationship not in RELATIONSHIPS:
+            self.report.error(line_number, student_id, f"Invalid relationship '{relationship}'")
+            return None
+
+        parents = []
+        for email in _clean(row, 'parent_emails').split(';'):
+            email = email.strip().lower()
+            if not email:
+                continue
+            parent = parents_by_email.get(email)
+            if parent is None:
+                self.report.warning(line_number, student_id, f"No parent account for {email}; link skipped")
+            elif parent not in parents:
+                parents.append(parent)
+
+        self.seen_student_ids.add(student_id)
+        return {
+            'line': line_number,
+            'student': Student(
+                student_id=student_id,
+                student_name=student_name,
+                date_of_birth=date_of_birth,
+                gender=gender,
+                medical_conditions=_clean(row, 'medical_conditions'),
+            ),
+            'class_obj': class_obj,
+            'parents': parents,
+            'relationship': relationship,
+        }
+
+    def _write_chunk(self, valid_rows):
+        today = timezone.now().date()
+        with transaction.atomic():
+            Student.objects.bulk_create([row['student'] for row in valid_rows])
+
+            # MySQL does not return primary keys from bulk_create; look them up in one query
+            ids_by_student_id = dict(
+                Student.objects.filter(
+                    student_id__in=[row['student'].student_id for row in valid_rows]
+                ).values_list('student_id', 'id')
+            )
+            for row in valid_rows:
+                row['student'].pk = ids_by_student_id[row['student'].student_id]
+
+            enrollments = [
+                ClassStudentEnrollment(
+                    class_obj=row['class_obj'], student=row['student'],
+                    enrollment_date=today, is_active=True
+                )
+                for row in valid_rows if row['class_obj']
+            ]
+            ClassStudentEnrollment.objects.bulk_create(enrollments)
+
+            relationships = [
+                ParentStudentRelationship(
+                    parent=parent, student=row['student'],
+                    relationship_type=row['relationship'],
+                    is_primary_contact=(index == 0)
+                )
+                for row in valid_rows
+                for index, parent in enumerate(row['parents'])
+            ]
+            ParentStudentRelationship.objects.bulk_create(relationships, ignore_conflicts=True)
+
+            index_new_entities('student', [row['student'] for row in valid_rows])
+
+        self.report.created += len(valid_rows)
+        self.report.enrollments += len(enrollments)
+        self.report.relationships += len(relationships)
+
+
+def import_students_csv(stream, chunk_size=500, dry_run=False):
+    """Import students from a CSV stream and return the report as a dict"""
+    importer = StudentCSVImporter(chunk_size=chunk_size, dry_run=dry_run)
+    return importer.run(stream).as_dict()
@@ -7,8 +7,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db.models import Count, Q
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from core.api_docs import openapi, swagger_auto_schema
 from core.models import Teacher, Class, ClassTeacherAssignment, Student, ClassStudentEnrollment, DailyAttendance, LearningActivity, ClassLearningSession, StudentLearningRecord, ParentStudentRelationship, Parent
 from .permissions import IsTeacherUser
 from datetime import datetime
@@ -1,10 +1,12 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from unittest import skipUnless
 from unittest.mock import patch
+from django.conf import settings
 from core.models import Parent, Teacher, Admin
 from .email_service import send_verification_email
 
@@ -195,7 +197,7 @@ class EmailVerificationTest(APITestCase):
         self.user.refresh_from_db()
         self.assertTrue(self.user.email_verified)
         self.assertTrue(self.user.is_active)
-        self.assertIsNone(self.user.email_verification_token)
+        self.assertFalse(self.user.account_tokens.filter(is_used=False).exists())
 
     def test_invalid_verification_token(self):
         """Test verification with invalid token"""
@@ -451,4 +453,1671 @@ class ResendVerificationTest(APITestCase):
         response = self.client.post(self.resend_url, data)
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn('email', response.data)
\ No newline at end of file
+        self.assertIn('email', response.data)
+
+class DashboardStatisticsTest(TestCase):
+    """Test admin dashboard statistics snapshot"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from django.utils import timezone
+        from core.models import Class, Student, ClassStudentEnrollment
+
+        cache.clear()
+        self.class_obj = Class.objects.create(class_name='Sunflowers', class_code='SUN1', capacity=4)
+        self.enrolled = Student.objects.create(student_name='Amal', student_id='S001')
+        Student.objects.create(student_name='Nimal', student_id='S002')
+        ClassStudentEnrollment.objects.create(
+            class_obj=self.class_obj, student=self.enrolled,
+            enrollment_date=timezone.now().date()
+        )
+
+    @override_settings(DASHBOARD_STATS_ASYNC_REFRESH=False)
+    def test_snapshot_counts_and_invalidation(self):
+        """Test snapshot figures and that enrollment changes mark it dirty"""
+        from core.models import Student, ClassStudentEnrollment
+        from .dashboard_stats import get_dashboard_statistics
+
+        stats = get_dashboard_statistics()['data']
+        self.assertEqual(stats['total_students'], 2)
+        self.assertEqual(stats['enrolled_students'], 1)
+        self.assertEqual(stats['unassigned_students'], 1)
+        self.assertEqual(stats['class_utilization'][0]['utilization_percent'], 25.0)
+
+        # Served from cache without touching the database
+        with self.assertNumQueries(0):
+            get_dashboard_statistics()
+
+        new_student = Student.objects.get(student_id='S002')
+        ClassStudentEnrollment.objects.create(
+            class_obj=self.class_obj, student=new_student,
+            enrollment_date=self.class_obj.created_at.date()
+        )
+        stats = get_dashboard_statistics()['data']
+        self.assertEqual(stats['enrolled_students'], 2)
+        self.assertEqual(stats['unassigned_students'], 0)
+
+
+class AdminSearchTest(TestCase):
+    """Test indexed search over students, classes and teachers"""
+
+    def setUp(self):
+        from core.models import Class, Student
+
+        teacher_user = User.objects.create_user(
+            email='jonathan@example.com', password='TestPass123!',
+            first_name='Jonathan', last_name='Perera', user_type='teacher'
+        )
+        Teacher.objects.create(user=teacher_user, employee_id='EMP1001')
+        Class.objects.create(class_name='Sunflowers', class_code='SUN1')
+        Student.objects.create(student_name='Sunil Fernando', student_id='S100')
+        Student.objects.create(student_name='Kamal Silva', student_id='S101')
+
+    def test_prefix_search_is_ranked_and_filtered(self):
+        """Test prefix matching, type filtering and reindex on rename"""
+        from core.models import Student
+        from .search import search_documents
+
+        results = search_documents('sun')
+        self.assertEqual({doc.entity_type for doc in results}, {'class', 'student'})
+
+        students = search_documents('sun', ['student'])
+        self.assertEqual([doc.title for doc in students], ['Sunil Fernando'])
+
+        teachers = search_documents('jon pere', ['teacher'])
+        self.assertEqual([doc.subtitle for doc in teachers], ['EMP1001'])
+
+        kamal = Student.objects.get(student_id='S101')
+        kamal.student_name = 'Kamala Sunray'
+        kamal.save()
+        self.assertEqual(len(search_documents('sun', ['student'])), 2)
+
+    def test_list_filter_is_not_capped(self):
+        """Test the list-view search subquery returns every match, not the first 1000"""
+        from core.models import Student
+        from .search import index_new_entities, search_entity_ids
+
+        students = Student.objects.bulk_create(
+            [Student(student_name=f'Sunny {i}', student_id=f'BULK{i}') for i in range(1005)]
+        )
+        index_new_entities('student', students)
+        matches = Student.objects.filter(pk__in=search_entity_ids('student', 'sunny'))
+        self.assertEqual(matches.count(), 1005)
+        self.assertFalse(Student.objects.filter(pk__in=search_entity_ids('student', '')).exists())
+
+
+    def test_teacher_user_reindexed_only_for_indexed_fields(self):
+        """Test a login's last_login save skips the teacher reindex while a rename still applies"""
+        from django.utils import timezone
+        from .search import search_documents
+
+        teacher_user = User.objects.get(email='jonathan@example.com')
+        teacher_user.last_login = timezone.now()
+        with self.assertNumQueries(1):
+            teacher_user.save(update_fields=['last_login'])
+
+        teacher_user.last_name = 'Fonseka'
+        teacher_user.save(update_fields=['last_name'])
+        self.assertEqual([doc.title for doc in search_documents('fonseka', ['teacher'])], ['Jonathan Fonseka'])
+
+class StudentCSVImportTest(TestCase):
+    """Test bulk CSV student import"""
+
+    def setUp(self):
+        from core.models import Class, Student
+
+        self.class_obj = Class.objects.create(class_name='Sunflowers', class_code='SUN1')
+        Student.objects.create(student_name='Existing Child', student_id='S001')
+        parent_user = User.objects.create_user(
+            email='mother@example.com', password='TestPass123!', user_type='parent'
+        )
+        self.parent = Parent.objects.create(user=parent_user)
+
+    def test_import_reports_bad_rows_and_saves_the_rest(self):
+        """Test valid rows are imported with enrollments and parent links"""
+        import io
+        from core.models import Student, ClassStudentEnrollment, ParentStudentRelationship
+        from .student_import import import_students_csv
+
+        csv_data = io.StringIO(
+            "student_id,student_name,date_of_birth,gender,class_code,parent_emails,relationship\n"
+            "S002,Amal Perera,2021-03-04,male,SUN1,mother@example.com,mother\n"
+            "S001,Duplicate Child,,,,,\n"
+            "S003,Nimali Silva,not-a-date,,,,\n"
+            "S004,Kasun Silva,,,sun1,unknown@example.com,\n"
+            "S004,Kasun Again,,,,,\n"
+        )
+        report = import_students_csv(csv_data, chunk_size=2)
+
+        self.assertEqual(report['total_rows'], 5)
+        self.assertEqual(report['created'], 2)
+        self.assertEqual([error['line'] for error in report['errors']], [3, 4, 6])
+        self.assertEqual(len(report['warnings']), 1)
+        self.assertTrue(Student.objects.filter(student_id='S004').exists())
+        self.assertEqual(
+            ClassStudentEnrollment.objects.filter(class_obj=self.class_obj, is_active=True).count(), 2
+        )
+        self.assertTrue(ParentStudentRelationship.objects.filter(
+            parent=self.parent, student__student_id='S002', relationship_type='mother'
+        ).exists())
+
+
+    def test_unreadable_bytes_mid_file_return_partial_report(self):
+        """Test a decode error after saved chunks reports what was saved and where reading stopped"""
+        import io
+        from core.models import Student
+        from .student_import import import_students_csv
+
+        rows = ''.join(f'T{i:04d},Child {i}\n' for i in range(600))
+        data = io.BytesIO(f'student_id,student_name\n{rows}'.encode() + b'T9999,Bad \xff name\n')
+        report = import_students_csv(data, chunk_size=100)
+
+        self.assertGreater(report['created'], 0)
+        self.assertEqual(Student.objects.filter(student_id__startswith='T').count(), report['created'])
+        self.assertEqual(report['stopped_at_line'], report['total_rows'] + 2)
+        self.assertEqual(report['errors'][-1]['line'], report['stopped_at_line'])
+
+    def test_repeated_parent_email_links_once(self):
+        """Test a parent listed twice on a row is linked and counted once"""
+        import io
+        from core.models import ParentStudentRelationship
+        from .student_import import import_students_csv
+
+        report = import_students_csv(io.StringIO(
+            "student_id,student_name,parent_emails\n"
+            "S010,Ruwan Perera,mother@example.com; MOTHER@example.com\n"
+        ))
+        self.assertEqual(report['parent_links_created'], 1)
+        self.assertEqual(ParentStudentRelationship.objects.filter(parent=self.parent).count(), 1)
+
+class BulkReassignmentTest(TestCase):
+    """Test set-based student reassignment"""
+
+    def setUp(self):
+        from django.utils import timezone
+        from core.models import Class, Student, ClassStudentEnrollment
+
+        self.from_class = Class.objects.create(class_name='Tulips', class_code='TUL1')
+        self.to_class = Class.objects.create(class_name='Roses', class_code='ROS1')
+        self.students = [
+            Student.objects.create(student_name=f'Child {i}', student_id=f'S{i:03d}')
+            for i in range(30)
+        ]
+        # One student was in the destination class before and must be reactivated
+        ClassStudentEnrollment.objects.create(
+            class_obj=self.to_class, student=self.students[0],
+            enrollment_date=timezone.now().date(), is_active=False
+        )
+        ClassStudentEnrollment.objects.bulk_create([
+            ClassStudentEnrollment(
+                class_obj=self.from_class, student=student,
+                enrollment_date=timezone.now().date()
+            )
+            for student in self.students
+        ])
+
+    def test_reassignment_uses_constant_queries(self):
+        """Test moving a whole class costs a fixed number of queries"""
+        from core.models import ClassStudentEnrollment
+        from .class_management_serializers import StudentReassignmentSerializer
+
+        serializer = StudentReassignmentSerializer(data={
+            'student_ids': [student.id for student in self.students],
+            'from_class_id': self.from_class.id,
+            'to_class_id': self.to_class.id,
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.assertNumQueries(7):  # savepoint, class, 3 writes, students, release
+            result = serializer.save()
+
+        self.assertEqual(len(result['students']), 30)
+        self.assertFalse(ClassStudentEnrollment.objects.filter(
+            class_obj=self.from_class, is_active=True
+        ).exists())
+        self.assertEqual(ClassStudentEnrollment.objects.filter(
+            class_obj=self.to_class, is_active=True
+        ).count(), 30)
+
+
+class AcademicYearRolloverTest(TestCase):
+    """Test the year-end class rollover"""
+
+    def setUp(self):
+        from django.utils import timezone
+        from core.models import Class, Student, ClassStudentEnrollment
+
+        self.nursery = Class.objects.create(class_name='Nursery', class_code='NUR25', academic_year='2025-2026')
+        self.kg = Class.objects.create(class_name='KG', class_code='KG25', academic_year='2025-2026')
+        self.nursery_students = [
+            Student.objects.create(student_name=f'Nursery {i}', student_id=f'N{i:03d}') for i in range(3)
+        ]
+        self.kg_students = [
+            Student.objects.create(student_name=f'KG {i}', student_id=f'K{i:03d}') for i in range(2)
+        ]
+        today = timezone.now().date()
+        ClassStudentEnrollment.objects.bulk_create(
+            [ClassStudentEnrollment(class_obj=self.nursery, student=s, enrollment_date=today)
+             for s in self.nursery_students] +
+            [ClassStudentEnrollment(class_obj=self.kg, student=s, enrollment_date=today)
+             for s in self.kg_students]
+        )
+
+    def _serializer(self, **options):
+        from .class_management_serializers import AcademicYearRolloverSerializer
+
+        # Nursery moves up into the existing KG class while KG moves into a new class
+        serializer = AcademicYearRolloverSerializer(data={
+            'academic_year': '2026-2027',
+            'mappings': [
+                {'from_class_id': self.nursery.id, 'to_class_id': self.kg.id},
+                {'from_class_id': self.kg.id, 'new_class': {'class_name': 'Year 1', 'class_code': 'Y126'}},
+            ],
+            **options
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        return serializer
+
+    def test_preview_does_not_write(self):
+        """Test preview reports the plan without changing enrollments"""
+        from core.models import Class
+
+        plan = self._serializer().preview()
+
+        self.assertFalse(plan['applied'])
+        self.assertEqual(plan['totals']['students_moving'], 5)
+        self.assertEqual(plan['totals']['classes_created'], 1)
+        self.assertFalse(Class.objects.filter(class_code='Y126').exists())
+
+    def test_rollover_moves_students_from_snapshot(self):
+        """Test chained moves use enrollments from before the rollover"""
+        from core.models import Class, ClassStudentEnrollment
+
+        result = self._serializer().save()
+
+        self.assertTrue(result['applied'])
+        year_one = Class.objects.get(class_code='Y126')
+        self.assertEqual(year_one.academic_year, '2026-2027')
+        self.assertEqual(
+            set(ClassStudentEnrollment.objects.filter(class_obj=year_one, is_active=True)
+                .values_list('student_id', flat=True)),
+            {s.id for s in self.kg_students}
+        )
+        self.assertEqual(
+            set(ClassStudentEnrollment.objects.filter(class_obj=self.kg, is_active=True)
+                .values_list('student_id', flat=True)),
+            {s.id for s in self.nursery_students}
+        )
+        # The old class is retired, not deleted, and keeps its history
+        self.nursery.refresh_from_db()
+        self.assertFalse(self.nursery.is_active)
+        self.assertEqual(ClassStudentEnrollment.objects.filter(class_obj=self.nursery).count(), 3)
+
+
+    def test_keeping_old_classes_still_ends_their_assignments(self):
+        """Test old classes can stay open while their teachers move, unless end_old_assignments is off"""
+        from django.utils import timezone
+        from core.models import ClassTeacherAssignment
+
+        teacher_user = User.objects.create_user(
+            email='rollover.teacher@example.com', password='TestPass123!', user_type='teacher'
+        )
+        teacher = Teacher.objects.create(user=teacher_user, employee_id='EMP6001')
+        assignment = ClassTeacherAssignment.objects.create(
+            class_obj=self.nursery, teacher=teacher, assigned_date=timezone.now().date()
+        )
+
+        self._serializer(deactivate_old_classes=False).save()
+
+        self.nursery.refresh_from_db()
+        assignment.refresh_from_db()
+        self.assertTrue(self.nursery.is_active)
+        self.assertFalse(assignment.is_active)
+        self.assertTrue(ClassTeacherAssignment.objects.filter(class_obj=self.kg, teacher=teacher, is_active=True).exists())
+
+    def test_old_assignments_kept_when_asked(self):
+        """Test end_old_assignments=False leaves the old class's teachers assigned"""
+        from django.utils import timezone
+        from core.models import ClassTeacherAssignment
+
+        teacher_user = User.objects.create_user(
+            email='rollover.keep@example.com', password='TestPass123!', user_type='teacher'
+        )
+        teacher = Teacher.objects.create(user=teacher_user, employee_id='EMP6002')
+        assignment = ClassTeacherAssignment.objects.create(
+            class_obj=self.nursery, teacher=teacher, assigned_date=timezone.now().date()
+        )
+
+        self._serializer(end_old_assignments=False).save()
+
+        assignment.refresh_from_db()
+        self.assertTrue(assignment.is_active)
+
+class MediaBlobStorageTest(TestCase):
+    """Test content-addressed attachment storage"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def test_identical_uploads_share_one_blob(self):
+        """Test the same file uploaded twice is stored once and swept after the last release"""
+        import os
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from core.models import MediaBlob
+        from core.media_storage import store_upload, release_blob
+        from core.media_gc import MediaSweepReport, collect_unreferenced_blobs
+
+        with self.settings(MEDIA_ROOT=self.media_root, MEDIA_GC_GRACE_PERIOD=-1):
+            first = store_upload(SimpleUploadedFile('photo.jpg', b'same bytes', content_type='image/jpeg'))
+            second = store_upload(SimpleUploadedFile('copy.JPG', b'same bytes', content_type='image/jpeg'))
+
+            self.assertEqual(first.pk, second.pk)
+            self.assertEqual(MediaBlob.objects.get(pk=first.pk).ref_count, 2)
+            path = os.path.join(self.media_root, first.file_path)
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(os.listdir(os.path.join(self.media_root, 'blobs', 'tmp')), [])
+
+            release_blob(first.pk)
+            collect_unreferenced_blobs(MediaSweepReport())
+            self.assertTrue(os.path.exists(path))
+
+            release_blob(first.pk)
+            report = MediaSweepReport()
+            collect_unreferenced_blobs(report)
+            self.assertFalse(MediaBlob.objects.filter(pk=first.pk).exists())
+            self.assertFalse(os.path.exists(path))
+            self.assertEqual(report.total_bytes, len(b'same bytes'))
+
+
+    def test_retry_after_lost_insert_race_does_not_move_temp_twice(self):
+        """Test a retry after a concurrent insert that has since gone stores the already-moved file"""
+        import os
+        from unittest.mock import patch
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.db import IntegrityError
+        from core.models import MediaBlob
+        from core.media_storage import store_upload
+
+        create = MediaBlob.objects.create
+        calls = []
+
+        def lose_first_insert(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                raise IntegrityError('UNIQUE constraint failed: media_blobs.sha256')
+            return create(**kwargs)
+
+        with self.settings(MEDIA_ROOT=self.media_root), \
+                patch.object(MediaBlob.objects, 'create', side_effect=lose_first_insert):
+            blob = store_upload(SimpleUploadedFile('notes.txt', b'race bytes', content_type='text/plain'))
+
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(MediaBlob.objects.get(pk=blob.pk).ref_count, 1)
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, blob.file_path)))
+            self.assertEqual(os.listdir(os.path.join(self.media_root, 'blobs', 'tmp')), [])
+
+class ImageVariantTest(TestCase):
+    """Test thumbnail and medium variant generation"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def test_variants_are_resized_and_stripped(self):
+        """Test variants are downscaled JPEGs without EXIF metadata"""
+        import io
+        import os
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from core.models import MediaBlob
+        from core.media_storage import store_upload
+        from core.media_variants import variant_relative_path, variant_url
+
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'
+        buffer = io.BytesIO()
+        Image.new('RGB', (2000, 1500), (200, 30, 30)).save(buffer, 'JPEG', exif=exif)
+
+        with self.settings(MEDIA_ROOT=self.media_root, IMAGE_VARIANTS_ASYNC=False):
+            with self.captureOnCommitCallbacks(execute=True):
+                blob = store_upload(SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg'))
+            blob = MediaBlob.objects.get(pk=blob.pk)
+
+            self.assertEqual(blob.variants_status, MediaBlob.VARIANTS_READY)
+            self.assertTrue(variant_url(blob, 'thumbnail').endswith('_thumbnail.jpg'))
+            for name, size in [('thumbnail', 320), ('medium', 1280)]:
+                with Image.open(os.path.join(self.media_root, variant_relative_path(blob, name))) as variant:
+                    self.assertEqual(max(variant.size), size)
+                    self.assertEqual(len(variant.getexif()), 0)
+
+    def test_documents_have_no_variants(self):
+        """Test non-image uploads are not queued"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from core.models import MediaBlob
+        from core.media_storage import store_upload
+        from core.media_variants import variant_url
+
+        with self.settings(MEDIA_ROOT=self.media_root, IMAGE_VARIANTS_ASYNC=False):
+            blob = store_upload(SimpleUploadedFile('notes.pdf', b'%PDF-1.4', content_type='application/pdf'))
+
+        self.assertEqual(blob.variants_status, MediaBlob.VARIANTS_NONE)
+        self.assertIsNone(variant_url(blob, 'thumbnail'))
+
+
+class MediaServingTest(TestCase):
+    """Test the media view's Range and caching support"""
+
+    def setUp(self):
+        import os
+        import shutil
+        import tempfile
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        os.makedirs(os.path.join(self.media_root, 'stories', '1'))
+        with open(os.path.join(self.media_root, 'stories', '1', 'clip.mp4'), 'wb') as media_file:
+            media_file.write(bytes(range(100)))
+
+    def test_range_request_returns_partial_content(self):
+        """Test a byte range is answered with 206 and only those bytes"""
+        with self.settings(MEDIA_ROOT=self.media_root):
+            response = self.client.get('/media/stories/1/clip.mp4', HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+
+    def test_etag_and_unsatisfiable_range(self):
+        """Test conditional requests get 304 and out-of-bounds ranges 416"""
+        with self.settings(MEDIA_ROOT=self.media_root):
+            response = self.client.get('/media/stories/1/clip.mp4')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+            cached = self.client.get('/media/stories/1/clip.mp4', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(cached.status_code, 304)
+
+            out_of_range = self.client.get('/media/stories/1/clip.mp4', HTTP_RANGE='bytes=500-')
+            self.assertEqual(out_of_range.status_code, 416)
+
+            self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+
+
+@override_settings(UPLOAD_CHUNK_SIZE=4, IMAGE_VARIANTS_ASYNC=False)
+class ResumableUploadTest(APITestCase):
+    """Test chunked uploads and attaching them to a story"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = User.objects.create_user(
+            email='uploader@example.com', password='TestPass123!', user_type='teacher'
+        )
+        Teacher.objects.create(user=self.user, employee_id='EMP2001')
+        self.client.force_authenticate(self.user)
+
+    def _put_chunk(self, upload_id, index, data):
+        return self.client.put(
+            f'/api/v1/uploads/{upload_id}/chunks/{index}/', data=data,
+            content_type='application/octet-stream'
+        )
+
+    def test_chunked_upload_resumes_and_attaches(self):
+        """Test out-of-order chunks are refused, retries are idempotent and the file is attached"""
+        from core.simple_story_models import SimpleStoryAttachment
+
+        with self.settings(MEDIA_ROOT=self.media_root):
+            response = self.client.post('/api/v1/uploads/', {
+                'file_name': 'clip.mp4', 'mime_type': 'video/mp4', 'total_size': 10
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            upload_id = response.data['upload_id']
+            self.assertEqual(response.data['total_chunks'], 3)
+
+            self.assertEqual(self._put_chunk(upload_id, 0, b'0123').data['next_chunk'], 1)
+            self.assertEqual(self._put_chunk(upload_id, 2, b'89').status_code, status.HTTP_409_CONFLICT)
+            # A retried chunk the server already has is acknowledged without rewriting
+            self.assertEqual(self._put_chunk(upload_id, 0, b'0123').data['next_chunk'], 1)
+            self.assertEqual(self._put_chunk(upload_id, 1, b'45').status_code, status.HTTP_400_BAD_REQUEST)
+            self._put_chunk(upload_id, 1, b'4567')
+            self._put_chunk(upload_id, 2, b'89')
+
+            response = self.client.post(f'/api/v1/uploads/{upload_id}/complete/')
+            self.assertEqual(response.data['status'], 'complete')
+
+            response = self.client.post('/api/v1/simple-newsfeed/stories/', {
+                'title': 'Sports day', 'content': 'Races', 'story_type': 'video',
+                'upload_ids': [upload_id]
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+            attachment = SimpleStoryAttachment.objects.get(story_id=response.data['id'])
+            with open(attachment.file.path, 'rb') as stored:
+                self.assertEqual(stored.read(), b'0123456789')
+
+            # The upload is consumed and cannot be attached twice
+            response = self.client.post('/api/v1/simple-newsfeed/stories/', {
+                'title': 'Again', 'content': 'Races', 'upload_ids': [upload_id]
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MediaSweepTest(TestCase):
+    """Test the media sweeper's orphan and deletion-queue handling"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def _write(self, relative_path, data):
+        import os
+
+        path = os.path.join(self.media_root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as media_file:
+            media_file.write(data)
+        return path
+
+    def test_sweep_reclaims_orphans_and_queued_files(self):
+        """Test unreferenced files are removed and referenced blobs are kept"""
+        import os
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from core.media_gc import sweep_media
+        from core.media_storage import store_upload, queue_file_deletion
+
+        with self.settings(MEDIA_ROOT=self.media_root, MEDIA_GC_GRACE_PERIOD=-1):
+            kept = store_upload(SimpleUploadedFile('notes.pdf', b'keep me', content_type='application/pdf'))
+            orphan = self._write('stories/7/lost.mp4', b'orphaned bytes')
+            queued = self._write('stories/8/old.jpg', b'queued')
+            queue_file_deletion('stories/8/old.jpg')
+
+            dry_run = sweep_media(dry_run=True)
+            self.assertTrue(os.path.exists(orphan))
+            self.assertEqual(dry_run.counts, {'queued': 1, 'orphans': 1})
+
+            report = sweep_media()
+
+        self.assertFalse(os.path.exists(orphan))
+        self.assertFalse(os.path.exists(queued))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, kept.file_path)))
+        self.assertEqual(report.total_bytes, len(b'orphaned bytes') + len(b'queued'))
+
+
+class StatelessJWTAuthenticationTest(APITestCase):
+    """Test users are rebuilt from token claims and stale tokens are refused"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='claims@example.com', password='TestPass123!', user_type='teacher'
+        )
+        Teacher.objects.create(user=self.user, employee_id='EMP3001')
+
+    def _authenticate(self, access):
+        from rest_framework.test import APIRequestFactory
+        from .authentication import StatelessJWTAuthentication
+
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        return StatelessJWTAuthentication().authenticate(request)[0]
+
+    def test_user_built_from_claims_without_queries(self):
+        """Test a warm version cache means no auth queries, and deferred columns load together"""
+        from .authentication import tokens_for_user
+
+        access = str(tokens_for_user(self.user).access_token)
+        self._authenticate(access)
+
+        with self.assertNumQueries(0):
+            user = self._authenticate(access)
+            self.assertEqual(user.user_type, 'teacher')
+            self.assertTrue(user.teacher_profile.is_active)
+            self.assertFalse(hasattr(user, 'admin_profile'))
+        with self.assertNumQueries(1):
+            self.assertEqual((user.username, user.is_email_verified), ('claims@example.com', False))
+
+    def test_password_change_rejects_old_tokens(self):
+        """Test a password change invalidates access and refresh tokens issued before it"""
+        from rest_framework_simplejwt.exceptions import InvalidToken
+        from .authentication import tokens_for_user
+
+        refresh = tokens_for_user(self.user)
+        self._authenticate(str(refresh.access_token))
+
+        self.user.set_password('NewPass456!')
+        self.user.save()
+        with self.assertRaises(InvalidToken):
+            self._authenticate(str(refresh.access_token))
+        response = self.client.post(reverse('v1_auth:auth_token_refresh'), {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post(reverse('v1_auth:auth_token_refresh'), {'refresh': str(tokens_for_user(self.user))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._authenticate(response.data['access']).pk, self.user.pk)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(reverse('v1_auth:auth_token_refresh'), {'refresh': response.data['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+    def test_password_change_view_swaps_tokens(self):
+        """Test saving the claims-built request.user drops the cached version, so only the new tokens work"""
+        from .authentication import tokens_for_user
+
+        parent_user = User.objects.create_user(
+            email='claims.parent@example.com', password='TestPass123!', user_type='parent', is_email_verified=True
+        )
+        Parent.objects.create(user=parent_user)
+        old = tokens_for_user(parent_user)
+        url = reverse('v1_auth:unread_message_count')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {old.access_token}')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        response = self.client.post(reverse('v1_auth:parent_change_password'), {
+            'current_password': 'TestPass123!', 'new_password': 'NewPass456!', 'confirm_password': 'NewPass456!'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.client.credentials()
+        refresh_url = reverse('v1_auth:auth_token_refresh')
+        self.assertEqual(self.client.post(refresh_url, {'refresh': str(old)}).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            self.client.post(refresh_url, {'refresh': response.data['refresh']}).status_code, status.HTTP_200_OK
+        )
+
+class RefreshTokenBlacklistTest(APITestCase):
+    """Test rotated refresh tokens are revoked and expired entries pruned"""
+
+    def setUp(self):
+        from .token_blacklist import revocation_filter
+
+        revocation_filter.reset()
+        self.user = User.objects.create_user(
+            email='rotate@example.com', password='TestPass123!', user_type='teacher'
+        )
+        self.refresh_url = reverse('v1_auth:auth_token_refresh')
+
+    def test_rotated_token_cannot_be_reused(self):
+        """Test the old refresh token is refused after rotation and the filter skips the DB"""
+        from .authentication import tokens_for_user
+        from .token_blacklist import is_revoked
+
+        refresh = tokens_for_user(self.user)
+        response = self.client.post(self.refresh_url, {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        replay = self.client.post(self.refresh_url, {'refresh': str(refresh)})
+        self.assertEqual(replay.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(is_revoked('never-issued'))
+        self.assertTrue(is_revoked(refresh['jti']))
+
+    def test_prune_deletes_only_expired_entries(self):
+        """Test pruning removes revoked tokens past their expiry in batches"""
+        from datetime import timedelta
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+        from core.models import RevokedToken
+
+        now = timezone.now()
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=f'old-{i}', expires_at=now - timedelta(days=1)) for i in range(5)]
+            + [RevokedToken(jti='live', expires_at=now + timedelta(days=1))]
+        )
+
+        call_command('prune_revoked_tokens', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
+
+
+class AccountTokenTest(APITestCase):
+    """Test hashed single-use tokens for email verification and password reset"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='tokens@example.com', password='TestPass123!', user_type='parent'
+        )
+
+    def test_tokens_are_hashed_and_single_use(self):
+        """Test only the hash is stored, reissuing invalidates the old token and reset consumes it"""
+        from core.models import AccountToken
+
+        first = self.user.generate_password_reset_token()
+        token = self.user.generate_password_reset_token()
+        self.assertFalse(AccountToken.objects.filter(token_hash=token).exists())
+        self.assertIsNone(AccountToken.objects.lookup(first, AccountToken.PASSWORD_RESET))
+
+        url = reverse('v1_auth:password_reset_confirm')
+        data = {'token': token, 'new_password': 'FreshPass456!', 'confirm_password': 'FreshPass456!'}
+        self.assertEqual(self.client.post(url, data).status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('FreshPass456!'))
+
+        self.assertEqual(self.client.post(url, data).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_email_verification_activates_parent(self):
+        """Test the verification token activates the account and expired tokens are refused"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from core.models import AccountToken
+
+        token = self.user.generate_email_verification_token()
+        AccountToken.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        response = self.client.post(reverse('v1_auth:verify_email'), {'token': token})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        token = self.user.generate_email_verification_token()
+        response = self.client.post(reverse('v1_auth:verify_email'), {'token': token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active and self.user.is_email_verified)
+
+
+class CleanupUnverifiedUsersTest(TestCase):
+    """Test the batched, resumable cleanup of unverified parent accounts"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        from datetime import timedelta
+        from django.utils import timezone
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        self.checkpoint = f'{temp_dir}/cleanup.checkpoint'
+
+        old = timezone.now() - timedelta(days=30)
+        self.stale = [
+            User.objects.create_user(
+                email=f'stale{i}@example.com', user_type='parent', date_joined=old, is_active=False
+            )
+            for i in range(3)
+        ]
+        self.verified = User.objects.create_user(
+            email='verified@example.com', user_type='parent', date_joined=old,
+            is_email_verified=True, is_active=True
+        )
+        self.teacher = User.objects.create_user(
+            email='staff@example.com', user_type='teacher', date_joined=old, is_active=False
+        )
+        self.recent = User.objects.create_user(email='recent@example.com', user_type='parent', is_active=False)
+
+    def _run(self, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        output = StringIO()
+        call_command(
+            'cleanup_unverified_users', checkpoint=self.checkpoint, sleep=0, stdout=output, **options
+        )
+        return output.getvalue()
+
+    def test_deletes_only_stale_unverified_parents_in_batches(self):
+        """Test verified, staff and recent accounts are kept and batches are reported"""
+        import os
+
+        output = self._run(batch_size=2)
+
+        self.assertIn('Batch 2: 3/3', output)
+        self.assertEqual(
+            set(User.objects.values_list('email', flat=True)),
+            {'verified@example.com', 'staff@example.com', 'recent@example.com'}
+        )
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resumes_from_checkpoint(self):
+        """Test an interrupted run continues after the last committed batch"""
+        import json
+        from datetime import timedelta
+        from django.utils import timezone
+
+        with open(self.checkpoint, 'w') as checkpoint_file:
+            json.dump({
+                'days': 7, 'cutoff': (timezone.now() - timedelta(days=7)).isoformat(),
+                'last_pk': self.stale[0].pk
+            }, checkpoint_file)
+
+        output = self._run(batch_size=10)
+
+        self.assertIn(f'Resuming after user id {self.stale[0].pk}', output)
+        self.assertTrue(User.objects.filter(pk=self.stale[0].pk).exists())
+        self.assertFalse(User.objects.filter(pk__in=[u.pk for u in self.stale[1:]]).exists())
+
+
+class BufferedAuditLogTest(TestCase):
+    """Test audit rows are buffered, bulk-written and spooled when the database fails"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        self.spool = f'{temp_dir}/audit_spool.jsonl'
+        self.user = User.objects.create_user(email='auditor@example.com', password='TestPass123!')
+
+    def test_buffered_rows_are_written_in_one_flush(self):
+        """Test recording is free until the buffer is flushed and event times are kept"""
+        from core.audit_buffer import log_buffer, record_audit, record_download
+        from core.models import AuditLog, DownloadLog
+
+        with self.assertNumQueries(0):
+            record_audit(self.user, 'export', 'student', entity_id=7)
+            record_download(self.user, 'report', 3, file_name='report.pdf')
+        event_time = log_buffer._entries[0][1]['created_at']
+
+        log_buffer.flush()
+
+        self.assertEqual(AuditLog.objects.get().created_at, event_time)
+        self.assertEqual(DownloadLog.objects.get().file_name, 'report.pdf')
+
+    def test_failed_flush_is_spooled_and_replayed(self):
+        """Test rows go to the spool when the write fails and the replay command loads them"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import OperationalError
+        from core.audit_buffer import log_buffer, record_audit
+        from core.models import AuditLog
+
+        with self.settings(AUDIT_LOG_SPOOL_PATH=self.spool):
+            record_audit(self.user, 'delete', 'class', entity_id=1)
+            record_audit(self.user.pk, 'delete', 'class', entity_id=2)
+            with patch('core.audit_buffer._write', side_effect=OperationalError('server has gone away')):
+                log_buffer.flush()
+            self.assertFalse(AuditLog.objects.exists())
+
+            call_command('replay_audit_spool', stdout=StringIO())
+
+        self.assertEqual(sorted(AuditLog.objects.values_list('entity_id', flat=True)), [1, 2])
+        self.assertFalse(AuditLog.objects.filter(user__isnull=True).exists())
+
+
+    def test_refused_rows_are_set_aside_not_spooled(self):
+        """Test one row the database refuses doesn't hold back its batch, on flush or on replay"""
+        import json
+        import os
+        from core.audit_buffer import _spool, log_buffer, record_audit, rejected_path, replay_spool
+        from core.models import AuditLog
+
+        with self.settings(AUDIT_LOG_SPOOL_PATH=self.spool):
+            record_audit(self.user, 'export', 'student', entity_id=1)
+            record_audit(self.user, None, 'student', entity_id=2)
+            record_audit(self.user, 'export', 'student', entity_id=3)
+            log_buffer.flush()
+            self.assertEqual(sorted(AuditLog.objects.values_list('entity_id', flat=True)), [1, 3])
+            self.assertFalse(os.path.exists(self.spool))
+
+            _spool([
+                ('core.AuditLog', {'user_id': self.user.pk, 'action': None, 'entity_type': 'class', 'entity_id': 4}),
+                ('core.AuditLog', {'user_id': self.user.pk, 'action': 'delete', 'entity_type': 'class', 'entity_id': 5}),
+            ])
+            self.assertEqual(replay_spool(), (1, 0, 1))
+            self.assertEqual(replay_spool(), (0, 0, 0))
+
+            with open(rejected_path()) as rejected_file:
+                rejected = [json.loads(line)['fields']['entity_id'] for line in rejected_file]
+        self.assertEqual(rejected, [2, 4])
+        self.assertEqual(sorted(AuditLog.objects.values_list('entity_id', flat=True)), [1, 3, 5])
+
+class LogArchiveTest(TestCase):
+    """Test old log rows are moved into daily gzip archives and can be searched"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        self.user = User.objects.create_user(email='archived@example.com', password='TestPass123!')
+
+    def test_archive_and_query(self):
+        """Test only rows past retention are archived per day, deleted, and found by the query command"""
+        import os
+        from datetime import datetime, timedelta, timezone as dt_timezone
+        from io import StringIO
+        from django.core.management import call_command
+        from core.log_archive import partition_path
+        from core.models import AuditLog
+
+        old_day = datetime(2024, 3, 5, 10, 30, tzinfo=dt_timezone.utc)
+        AuditLog.objects.bulk_create([
+            AuditLog(user=self.user, action='delete', entity_type='class', entity_id=1, created_at=old_day),
+            AuditLog(user=self.user, action='export', entity_type='student', entity_id=2, created_at=old_day),
+            AuditLog(user=self.user, action='delete', entity_type='class', entity_id=3,
+                     created_at=old_day + timedelta(days=1)),
+            AuditLog(user=self.user, action='delete', entity_type='class', entity_id=4),
+        ])
+
+        with self.settings(LOG_ARCHIVE_DIR=self.archive_dir):
+            call_command('archive_logs', table=['audit_logs'], days=30, batch_size=2, stdout=StringIO())
+            self.assertTrue(os.path.exists(partition_path('audit_logs', old_day.date())))
+
+            output = StringIO()
+            call_command(
+                'query_log_archive', 'audit_logs', '--from', '2024-03-05', '--to', '2024-03-05',
+                '--field', 'action=delete', stdout=output, stderr=StringIO()
+            )
+
+        self.assertEqual(list(AuditLog.objects.values_list('entity_id', flat=True)), [4])
+        matches = output.getvalue().splitlines()
+        self.assertEqual(len(matches), 1)
+        self.assertIn('"entity_id": 1', matches[0])
+
+
+    def test_sessions_archived_after_expiry_without_token(self):
+        """Test live sessions stay however old they are, and archived ones keep only a token hash"""
+        import hashlib
+        from datetime import timedelta
+        from django.utils import timezone
+        from core.log_archive import archive_table, search_archive
+        from core.models import UserSession
+
+        now = timezone.now()
+        expired = UserSession.objects.create(user=self.user, session_token='expired-token', expires_at=now - timedelta(days=100))
+        UserSession.objects.create(user=self.user, session_token='live-token', expires_at=now + timedelta(days=1))
+        UserSession.objects.update(created_at=now - timedelta(days=200))
+
+        with self.settings(LOG_ARCHIVE_DIR=self.archive_dir):
+            self.assertEqual(archive_table('user_sessions', days=90), 1)
+            [row] = search_archive('user_sessions')
+
+        self.assertEqual(list(UserSession.objects.values_list('session_token', flat=True)), ['live-token'])
+        self.assertEqual(row['id'], expired.pk)
+        self.assertNotIn('session_token', row)
+        self.assertEqual(row['session_token_sha256'], hashlib.sha256(b'expired-token').hexdigest())
+
+class MessagingTest(APITestCase):
+    """Test threads, unread counters and contact checks for parent-teacher messaging"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from datetime import date
+        from core.models import AllowedMessageContact, Student
+
+        cache.clear()
+        self.parent_user = User.objects.create_user(
+            email='msg.parent@example.com', password='TestPass123!', user_type='parent', is_email_verified=True
+        )
+        parent = Parent.objects.create(user=self.parent_user)
+        self.teacher_user = User.objects.create_user(
+            email='msg.teacher@example.com', password='TestPass123!', user_type='teacher'
+        )
+        teacher = Teacher.objects.create(user=self.teacher_user, employee_id='EMP4001')
+        student = Student.objects.create(student_name='Kid', student_id='STU4001', date_of_birth=date(2020, 1, 1))
+        self.contact = AllowedMessageContact.objects.create(parent=parent, teacher=teacher, student=student)
+
+    def _send(self, sender, recipient, text):
+        self.client.force_authenticate(sender)
+        return self.client.post(
+            reverse('v1_auth:message_threads'), {'recipient_user_id': recipient.pk, 'message_text': text}
+        )
+
+    def test_send_and_read_maintains_unread_counters(self):
+        """Test sending increments the recipient's counter and marking read clears it in bulk"""
+        for text in ('Hello', 'Is Kid coming today?', 'Thanks'):
+            response = self._send(self.parent_user, self.teacher_user, text)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        thread_id = response.data['thread_id']
+
+        self.client.force_authenticate(self.teacher_user)
+        self.assertEqual(self.client.get(reverse('v1_auth:unread_message_count')).data['unread_count'], 3)
+        inbox = self.client.get(reverse('v1_auth:message_threads')).data
+        self.assertEqual(len(inbox['results']), 1)
+        self.assertEqual(inbox['results'][0]['unread_count'], 3)
+
+        page = self.client.get(reverse('v1_auth:thread_messages', args=[thread_id]), {'limit': 2}).data
+        self.assertEqual([m['message_text'] for m in page['results']], ['Thanks', 'Is Kid coming today?'])
+        older = self.client.get(
+            reverse('v1_auth:thread_messages', args=[thread_id]), {'limit': 2, 'before': page['next_before']}
+        ).data
+        self.assertEqual([m['message_text'] for m in older['results']], ['Hello'])
+        self.assertIsNone(older['next_before'])
+
+        response = self.client.post(
+            reverse('v1_auth:thread_mark_read', args=[thread_id]), {'up_to_message_id': page['next_before']}
+        )
+        self.assertEqual((response.data['marked_read'], response.data['unread_count']), (2, 1))
+        response = self.client.post(reverse('v1_auth:thread_mark_read', args=[thread_id]))
+        self.assertEqual((response.data['marked_read'], response.data['unread_count']), (1, 0))
+
+        # Replies go to the same thread and count for the parent
+        self.assertEqual(self._send(self.teacher_user, self.parent_user, 'Yes').data['thread_id'], thread_id)
+        self.client.force_authenticate(self.parent_user)
+        self.assertEqual(self.client.get(reverse('v1_auth:unread_message_count')).data['unread_count'], 1)
+
+    def test_mark_read_never_takes_counter_below_zero(self):
+        """Test a counter that drifted below the real unread count stops at zero"""
+        from core.models import MessageThread
+        from .messaging import mark_thread_read
+
+        thread_id = self._send(self.parent_user, self.teacher_user, 'Hello').data['thread_id']
+        self._send(self.parent_user, self.teacher_user, 'Again')
+        thread = MessageThread.objects.get(thread_id=thread_id)
+        counter = 'participant1_unread_count' if thread.participant1_user == self.teacher_user else 'participant2_unread_count'
+        MessageThread.objects.filter(pk=thread.pk).update(**{counter: 1})
+
+        self.assertEqual(mark_thread_read(thread, self.teacher_user), 2)
+        thread.refresh_from_db()
+        self.assertEqual(getattr(thread, counter), 0)
+
+    def test_inbox_keyset_pagination(self):
+        """Test the inbox pages by last message time without repeating threads"""
+        admins = [
+            User.objects.create_user(email=f'msg.admin{i}@example.com', password='TestPass123!', user_type='admin')
+            for i in range(3)
+        ]
+        for admin in admins:
+            self._send(admin, self.parent_user, f'Notice from {admin.email}')
+        self._send(self.teacher_user, self.parent_user, 'Latest')
+
+        self.client.force_authenticate(self.parent_user)
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+            page = self.client.get(reverse('v1_auth:message_threads'), params).data
+            seen.extend(thread['other_participant']['id'] for thread in page['results'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, [self.teacher_user.pk] + [admin.pk for admin in reversed(admins)])
+
+    def test_contact_required_and_cached(self):
+        """Test parents can only message allowed teachers and withdrawing the contact applies at once"""
+        other_teacher = User.objects.create_user(
+            email='msg.other@example.com', password='TestPass123!', user_type='teacher'
+        )
+        Teacher.objects.create(user=other_teacher, employee_id='EMP4002')
+        self.assertEqual(self._send(self.parent_user, other_teacher, 'Hi').status_code, status.HTTP_403_FORBIDDEN)
+
+        from .messaging import contact_user_ids
+        contact_user_ids(self.parent_user)
+        with self.assertNumQueries(0):
+            self.assertIn(self.teacher_user.pk, contact_user_ids(self.parent_user))
+
+        self.contact.is_active = False
+        self.contact.save()
+        self.assertEqual(self._send(self.parent_user, self.teacher_user, 'Hi').status_code, status.HTTP_403_FORBIDDEN)
+
+
+class NotificationStreamTest(TestCase):
+    """Test notification events reach the right streams from signals, the poller and the SSE view"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.teacher_user = User.objects.create_user(
+            email='sse.teacher@example.com', password='TestPass123!', user_type='teacher'
+        )
+        self.teacher = Teacher.objects.create(user=self.teacher_user, employee_id='EMP5001')
+        self.parent_user = User.objects.create_user(
+            email='sse.parent@example.com', password='TestPass123!', user_type='parent', is_email_verified=True
+        )
+        Parent.objects.create(user=self.parent_user)
+
+    def test_broker_routes_events_to_their_audience(self):
+        """Test targeted, per-type and broadcast events, published from another thread, each arrive once"""
+        import asyncio
+        import threading
+        from core.notifications import (
+            broker, message_event, simple_story_event, story_comment_event
+        )
+
+        async def run():
+            teacher = broker.subscribe(self.teacher_user.pk, 'teacher')
+            parent = broker.subscribe(self.parent_user.pk, 'parent')
+            try:
+                events = [
+                    message_event(1, 'thread', self.teacher_user.pk, self.parent_user.pk),
+                    story_comment_event(2, 9),
+                    simple_story_event(3, self.teacher.pk),
+                    simple_story_event(3, self.teacher.pk),
+                ]
+                publisher = threading.Thread(target=lambda: [broker.publish(event) for event in events])
+                publisher.start()
+                publisher.join()
+                await asyncio.sleep(0)
+                drain = lambda s: [s.queue.get_nowait()['key'] for _ in range(s.queue.qsize())]
+                return drain(teacher), drain(parent)
+            finally:
+                broker.unsubscribe(teacher)
+                broker.unsubscribe(parent)
+
+        with self.settings(NOTIFICATION_POLL_INTERVAL=0):
+            teacher_keys, parent_keys = asyncio.run(run())
+        self.assertEqual(teacher_keys, ['story_comment:2', 'simple_story:3'])
+        self.assertEqual(parent_keys, ['message:1', 'simple_story:3'])
+
+    def test_created_rows_are_published_after_commit_and_polled(self):
+        """Test the save signal publishes on commit and the poller picks up rows from elsewhere"""
+        from core.notifications import NotificationPoller
+        from core.simple_story_models import SimpleStory
+
+        with patch('core.notifications.broker.has_subscribers', return_value=True), \
+                patch('core.notifications.broker.publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                story = SimpleStory.objects.create(teacher=self.teacher, title='Trip', content='Zoo')
+                publish.assert_not_called()
+            self.assertEqual(publish.call_args[0][0]['key'], f'simple_story:{story.pk}')
+
+            poller = NotificationPoller()
+            poller.poll_once()
+            publish.reset_mock()
+            newer = SimpleStory.objects.create(teacher=self.teacher, title='Sports day', content='Races')
+            publish.reset_mock()
+            self.assertEqual(poller.poll_once(), 1)
+            self.assertEqual(publish.call_args[0][0]['key'], f'simple_story:{newer.pk}')
+
+    async def test_stream_requires_token_and_sends_events(self):
+        """Test the SSE view rejects missing tokens and streams the preamble to an authenticated client"""
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncClient
+        from .authentication import tokens_for_user
+
+        client = AsyncClient()
+        url = reverse('core:notification_stream')
+        self.assertEqual((await client.get(url)).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        tokens = await sync_to_async(tokens_for_user)(self.parent_user)
+        with self.settings(NOTIFICATION_POLL_INTERVAL=0):
+            response = await client.get(url, {'access_token': str(tokens.access_token)})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            stream = response.streaming_content
+            first = await anext(stream)
+            await stream.aclose()
+        self.assertIn(b': connected', first)
+
+
+class AsyncReadViewsTest(TestCase):
+    """Test the async feed, chart and roster views return what the sync views do"""
+
+    def setUp(self):
+        from datetime import date, time
+        from django.core.cache import cache
+        from core.models import (
+            Class, ClassLearningSession, ClassStudentEnrollment, ClassTeacherAssignment,
+            DailyAttendance, LearningActivity, ParentStudentRelationship, Student, StudentLearningRecord
+        )
+        from core.simple_story_models import SimpleStory
+
+        cache.clear()
+        self.teacher_user = User.objects.create_user(
+            email='async.teacher@example.com', password='TestPass123!', user_type='teacher'
+        )
+        teacher = Teacher.objects.create(user=self.teacher_user, employee_id='EMP6001')
+        self.parent_user = User.objects.create_user(
+            email='async.parent@example.com', password='TestPass123!', user_type='parent',
+            is_email_verified=True, first_name='Pat', last_name='Parent'
+        )
+        parent = Parent.objects.create(user=self.parent_user)
+        self.class_obj = Class.objects.create(class_name='Daisies', class_code='DAI1')
+        ClassTeacherAssignment.objects.create(class_obj=self.class_obj, teacher=teacher, assigned_date=date(2025, 1, 1))
+        self.child = Student.objects.create(student_name='Child A', student_id='ASY1', date_of_birth=date(2021, 5, 1))
+        other = Student.objects.create(student_name='Child B', student_id='ASY2')
+        for student in (self.child, other):
+            ClassStudentEnrollment.objects.create(class_obj=self.class_obj, student=student, enrollment_date=date(2025, 1, 6))
+        ParentStudentRelationship.objects.create(parent=parent, student=self.child, relationship_type='mother')
+
+        for day, attendance_status in [(date(2025, 2, 3), 'present'), (date(2025, 2, 4), 'late'), (date(2025, 3, 3), 'absent')]:
+            DailyAttendance.objects.create(
+                class_obj=self.class_obj, student=self.child, attendance_date=day,
+                status=attendance_status, marked_by_teacher=teacher
+            )
+        activity = LearningActivity.objects.create(activity_name='Counting')
+        for day, minutes in [(date(2025, 2, 3), 45), (date(2025, 2, 10), 45), (date(2025, 4, 1), None)]:
+            session = ClassLearningSession.objects.create(
+                class_obj=self.class_obj, teacher=teacher, activity=activity,
+                session_date=day, start_time=time(9), duration_minutes=minutes
+            )
+            StudentLearningRecord.objects.create(student=self.child, class_session=session, was_present=True)
+        for i in range(3):
+            SimpleStory.objects.create(teacher=teacher, title=f'Story {i}', content='Today')
+
+    def _compare(self, user, url, view, params=None, **kwargs):
+        """Call the sync URL and the async view with the same token; return both parsed bodies"""
+        import json
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncRequestFactory
+        from .authentication import tokens_for_user
+
+        access = str(tokens_for_user(user).access_token)
+        sync_response = self.client.get(url, params or {}, headers={'Authorization': f'Bearer {access}'})
+        request = AsyncRequestFactory().get(url, params or {}, headers={'Authorization': f'Bearer {access}'})
+        async_response = async_to_sync(view)(request, **kwargs)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        return json.loads(sync_response.content), json.loads(async_response.content)
+
+    def test_rosters_match_sync_views(self):
+        """Test both class rosters, including the parent contact, are identical"""
+        from . import async_read_views
+
+        for name, view in [('get_class_students', async_read_views.get_class_students),
+                           ('get_class_students_with_parents', async_read_views.get_class_students_with_parents)]:
+            url = reverse(f'v1_auth:{name}', args=[self.class_obj.id])
+            sync_data, async_data = self._compare(self.teacher_user, url, view, class_id=self.class_obj.id)
+            self.assertEqual(async_data, sync_data)
+            self.assertEqual(async_data['count'], 2)
+        self.assertEqual(async_data['data'][0]['parent_contact']['parent_name'], 'Pat Parent')
+        self.assertIsNone(async_data['data'][1]['parent_contact'])
+
+        # Permission errors match too
+        url = reverse('v1_auth:get_class_students', args=[self.class_obj.id])
+        sync_data, async_data = self._compare(
+            self.parent_user, url, async_read_views.get_class_students, class_id=self.class_obj.id
+        )
+        self.assertEqual(async_data, sync_data)
+
+    def test_charts_match_sync_views(self):
+        """Test the attendance and learning-hour charts are identical for a year"""
+        from . import async_read_views
+
+        for name, view in [('parent_child_attendance', async_read_views.get_child_attendance_data),
+                           ('parent_child_learning_activities', async_read_views.get_child_learning_activities)]:
+            url = reverse(f'v1_auth:{name}', args=[self.child.id])
+            sync_data, async_data = self._compare(self.parent_user, url, view, {'year': 2025}, child_id=self.child.id)
+            self.assertEqual(async_data, sync_data)
+        self.assertEqual(async_data[1], {'month': 'Feb', 'hours': 1.5})
+
+    def test_feed_matches_sync_view(self):
+        """Test the async feed page, count and links match DRF's pagination"""
+        from core.simple_story_views import story_feed
+
+        url = reverse('simple-stories-list')
+        sync_data, async_data = self._compare(self.parent_user, url, story_feed, {'page_size': 2, 'page': 2})
+        self.assertEqual(async_data, sync_data)
+        self.assertEqual((async_data['count'], len(async_data['results'])), (3, 1))
+
+        request_without_token = self.client.get(url)
+        self.assertEqual(request_without_token.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class StoryCounterTest(APITestCase):
+    """Test the denormalized story like and comment counters"""
+
+    def setUp(self):
+        from core.simple_story_models import SimpleStory
+
+        teacher_user = User.objects.create_user(
+            email='counter.teacher@example.com', password='TestPass123!', user_type='teacher'
+        )
+        teacher = Teacher.objects.create(user=teacher_user, employee_id='EMP7001')
+        self.parent_user = User.objects.create_user(
+            email='counter.parent@example.com', password='TestPass123!', user_type='parent'
+        )
+        self.story = SimpleStory.objects.create(teacher=teacher, title='Trip', content='Zoo')
+        self.client.force_authenticate(user=self.parent_user)
+
+    def test_like_toggle_and_comment_delete_keep_counts(self):
+        """Test liking, unliking, commenting and deleting twice adjust the columns exactly"""
+        like_url = reverse('simple-stories-like', args=[self.story.pk])
+        response = self.client.post(like_url)
+        self.assertEqual((response.data['liked'], response.data['likes_count']), (True, 1))
+        response = self.client.post(like_url)
+        self.assertEqual((response.data['liked'], response.data['likes_count']), (False, 0))
+
+        response = self.client.post(
+            reverse('simple-stories-add-comment', args=[self.story.pk]), {'comment_text': 'Lovely'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.story.refresh_from_db()
+        self.assertEqual((self.story.likes_count, self.story.comments_count), (0, 1))
+
+        from core.simple_story_models import SimpleStoryComment
+        from core.story_counters import soft_delete_comment
+        comment = SimpleStoryComment.objects.get(story=self.story)
+        self.assertTrue(soft_delete_comment(comment))
+        self.assertFalse(soft_delete_comment(comment))
+        self.story.refresh_from_db()
+        self.assertEqual(self.story.comments_count, 0)
+
+    def test_decrement_of_drifted_zero_counter_stays_zero(self):
+        """Test unliking and deleting a comment on a story whose counters drifted to 0 keep them at 0"""
+        from core.simple_story_models import SimpleStory, SimpleStoryComment, SimpleStoryLike
+        from core.story_counters import soft_delete_comment
+
+        SimpleStoryLike.objects.create(story=self.story, user=self.parent_user)
+        comment = SimpleStoryComment.objects.create(story=self.story, user=self.parent_user, comment_text='Hi')
+        SimpleStory.objects.filter(pk=self.story.pk).update(likes_count=0, comments_count=0)
+
+        response = self.client.post(reverse('simple-stories-like', args=[self.story.pk]))
+        self.assertEqual((response.data['liked'], response.data['likes_count']), (False, 0))
+        self.assertFalse(SimpleStoryLike.objects.filter(story=self.story).exists())
+        self.assertTrue(soft_delete_comment(comment))
+        self.story.refresh_from_db()
+        self.assertEqual((self.story.likes_count, self.story.comments_count), (0, 0))
+
+    def test_reconcile_command_fixes_drift(self):
+        """Test reconcile_story_counters reports drift on a dry run and repairs it otherwise"""
+        from io import StringIO
+        from django.core.management import call_command
+        from core.simple_story_models import SimpleStory, SimpleStoryLike
+
+        SimpleStoryLike.objects.create(story=self.story, user=self.parent_user)
+        SimpleStory.objects.filter(pk=self.story.pk).update(comments_count=4)
+
+        out = StringIO()
+        call_command('reconcile_story_counters', '--dry-run', stdout=out)
+        self.assertIn('DRY RUN: would fix counters on 1 stories', out.getvalue())
+        self.story.refresh_from_db()
+        self.assertEqual(self.story.comments_count, 4)
+
+        call_command('reconcile_story_counters', '--batch-size', '1', stdout=StringIO())
+        self.story.refresh_from_db()
+        self.assertEqual((self.story.likes_count, self.story.comments_count), (1, 0))
+
+
+class StoryCommentTreeTest(APITestCase):
+    """Test story comments are loaded as a tree in one query and paginated"""
+
+    def setUp(self):
+        from core.models import Story, StoryComment
+
+        self.teacher_user = User.objects.create_user(
+            email='tree.teacher@example.com', password='TestPass123!', user_type='teacher'
+        )
+        teacher = Teacher.objects.create(user=self.teacher_user, employee_id='EMP7101')
+        self.story = Story.objects.create(teacher=teacher, title='Trip', content='Zoo')
+        first = StoryComment.objects.create(story=self.story, user=self.teacher_user, comment_text='First')
+        StoryComment.objects.create(story=self.story, user=self.teacher_user, comment_text='Reply', parent_comment=first)
+        StoryComment.objects.create(story=self.story, user=self.teacher_user, comment_text='Gone', is_deleted=True)
+        StoryComment.objects.create(story=self.story, user=self.teacher_user, comment_text='Second')
+        self.client.force_authenticate(user=self.teacher_user)
+
+    def test_tree_is_nested_and_paginated(self):
+        """Test top-level comments come newest first with replies nested, one page at a time"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.models import StoryComment
+
+        url = reverse('core:story-comments', args=[self.story.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'page_size': 1, 'page': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        [comment] = response.data['results']
+        self.assertEqual(comment['comment_text'], 'First')
+        self.assertEqual([reply['comment_text'] for reply in comment['replies']], ['Reply'])
+        # Only the requested page is read, never the story's whole comment list
+        comment_table = StoryComment._meta.db_table
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if f'FROM "{comment_table}"' in sql and 'COUNT(' not in sql:
+                self.assertTrue('LIMIT' in sql or '"parent_comment_id" IN' in sql, sql)
+
+    def test_query_count_does_not_grow_with_comments(self):
+        """Test adding comments and replies doesn't add queries to the comments endpoint"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.models import StoryComment
+
+        url = reverse('core:story-comments', args=[self.story.pk])
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        for i in range(3):
+            parent = StoryComment.objects.create(story=self.story, user=self.teacher_user, comment_text=f'More {i}')
+            StoryComment.objects.create(story=self.story, user=self.teacher_user, comment_text='Re', parent_comment=parent)
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(after), len(before))
+
+
+class AnnouncementsFeedTest(APITestCase):
+    """Test the announcements feed's visibility rules, featured list and cursor pages"""
+
+    def setUp(self):
+        from datetime import date
+        from django.core.cache import cache
+        from core.models import Class, ClassStudentEnrollment, ClassTeacherAssignment, ParentStudentRelationship, Post, Student
+
+        cache.clear()
+        self.admin_user = User.objects.create_user(
+            email='feed.admin@example.com', password='TestPass123!', user_type='admin'
+        )
+        self.teacher_user = User.objects.create_user(
+            email='feed.teacher@example.com', password='TestPass123!', user_type='teacher'
+        )
+        teacher = Teacher.objects.create(user=self.teacher_user, employee_id='EMP7201')
+        self.parent_user = User.objects.create_user(
+            email='feed.parent@example.com', password='TestPass123!', user_type='parent'
+        )
+        parent = Parent.objects.create(user=self.parent_user)
+        self.own_class = Class.objects.create(class_name='Lilies', class_code='LIL1')
+        self.other_class = Class.objects.create(class_name='Tulips', class_code='TUL1')
+        ClassTeacherAssignment.objects.create(class_obj=self.own_class, teacher=teacher, assigned_date=date(2025, 1, 1))
+        child = Student.objects.create(student_name='Child F', student_id='FEED1')
+        ClassStudentEnrollment.objects.create(class_obj=self.own_class, student=child, enrollment_date=date(2025, 1, 6))
+        ParentStudentRelationship.objects.create(parent=parent, student=child, relationship_type='father')
+
+        def post(title, **kwargs):
+            return Post.objects.create(author_user=self.admin_user, author_type='admin', title=title, **kwargs)
+
+        post('School closed Friday')
+        post('Lilies trip', visibility='class_only', target_class=self.own_class)
+        post('Tulips trip', visibility='class_only', target_class=self.other_class)
+        post('Staff note', visibility='private')
+        post('Old notice', is_deleted=True)
+        self.featured = post('Welcome back', is_featured=True)
+
+    def _feed(self, user, params=None):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(reverse('v1_auth:announcements'), params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_visibility_and_cursor_pages(self):
+        """Test a parent sees public and own-class posts, page by page, with featured posts pinned"""
+        from core.models import PostLike
+
+        PostLike.objects.create(post=self.featured, user=self.parent_user)
+        data = self._feed(self.parent_user, {'limit': 1})
+        self.assertEqual([post['title'] for post in data['featured']], ['Welcome back'])
+        self.assertEqual((data['featured'][0]['likes_count'], data['featured'][0]['user_has_liked']), (1, True))
+
+        titles = [post['title'] for post in data['results']]
+        while data['next_cursor']:
+            data = self._feed(self.parent_user, {'limit': 1, 'cursor': data['next_cursor']})
+            self.assertEqual(data['featured'], [])
+            titles += [post['title'] for post in data['results']]
+        self.assertEqual(titles, ['Lilies trip', 'School closed Friday'])
+
+        admin_titles = [post['title'] for post in self._feed(self.admin_user)['results']]
+        self.assertEqual(len(admin_titles), 4)
+
+    def test_featured_cache_is_cleared_on_save(self):
+        """Test unpinning a post takes effect on the next request"""
+        self.assertEqual(len(self._feed(self.parent_user)['featured']), 1)
+        self.featured.is_featured = False
+        self.featured.save()
+        data = self._feed(self.parent_user)
+        self.assertEqual(data['featured'], [])
+        self.assertIn('Welcome back', [post['title'] for post in data['results']])
+
+    def test_publish_rules(self):
+        """Test teachers may only post to their own classes and parents cannot post"""
+        url = reverse('v1_auth:announcements')
+        self.client.force_authenticate(user=self.teacher_user)
+        response = self.client.post(url, {'title': 'Bring hats', 'visibility': 'class_only', 'target_class': self.other_class.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {'title': 'Bring hats', 'visibility': 'class_only', 'target_class': self.own_class.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['data']['author_type'], 'teacher')
+
+        self.client.force_authenticate(user=self.parent_user)
+        self.assertEqual(self.client.post(url, {'title': 'Hi'}).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ResponseRenderingTest(TestCase):
+    """Test the fast JSON renderer, response compression and the benchmark command"""
+
+    def test_fast_renderer_matches_drf(self):
+        """Test FastJSONRenderer emits exactly what DRF's JSONRenderer does"""
+        import uuid
+        from decimal import Decimal
+        from django.utils import timezone
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        from core.renderers import FastJSONRenderer
+
+        data = {
+            'id': uuid.uuid4(), 'amount': Decimal('1.50'), 'at': timezone.now(), 'label': gettext_lazy('Invalid page.'),
+            'text': 'caf\u00e9 \u2028 line', 1: [None, True, 2.5], 'nested': {'empty': []},
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_compression_threshold_and_streams(self):
+        """Test large JSON is gzipped, while small bodies and event streams are left alone"""
+        import gzip
+        from django.http import HttpResponse, StreamingHttpResponse
+        from django.test import RequestFactory
+        from core.middleware import CompressionMiddleware
+
+        request = RequestFactory().get('/api/v1/announcements/', HTTP_ACCEPT_ENCODING='gzip')
+        body = b'{"results":[' + b','.join([b'{"title":"School closed Friday"}'] * 100) + b']}'
+
+        response = CompressionMiddleware(lambda r: HttpResponse(body, content_type='application/json'))(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), body)
+
+        with self.settings(RESPONSE_COMPRESSION_MIN_SIZE=len(body) + 1):
+            response = CompressionMiddleware(lambda r: HttpResponse(body, content_type='application/json'))(request)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        response = CompressionMiddleware(
+            lambda r: StreamingHttpResponse(iter([body]), content_type='text/event-stream')
+        )(request)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_benchmark_command(self):
+        """Test benchmark_responses measures the given path for a user"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        User.objects.create_user(email='bench.admin@example.com', password='TestPass123!', user_type='admin')
+        out = StringIO()
+        call_command(
+            'benchmark_responses', '--user', 'bench.admin@example.com',
+            '--path', reverse('v1_auth:announcements'), '--iterations', '2', stdout=out
+        )
+        self.assertIn('FastJSONRenderer', out.getvalue())
+        self.assertIn('B gzip', out.getvalue())
+
+
+@skipUnless(settings.API_DOCS_ENABLED, 'Schema generation needs drf_yasg')
+class ApiSchemaTest(TestCase):
+    """Test the OpenAPI schema is generated once and served from disk with an ETag"""
+
+    def setUp(self):
+        import logging
+        import tempfile
+        from pathlib import Path
+        from core.api_docs import schema_cache
+
+        schema_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(schema_dir.cleanup)
+        self.schema_dir = Path(schema_dir.name) / 'api_schema'
+        schema_cache.clear()
+        self.addCleanup(schema_cache.clear)
+        # Views that read request.user in get_queryset log warnings while being introspected
+        yasg_logger = logging.getLogger('drf_yasg')
+        self.addCleanup(yasg_logger.setLevel, yasg_logger.level)
+        yasg_logger.setLevel(logging.ERROR)
+
+    def test_generated_schema_served_with_etag(self):
+        """Test generate_api_schema writes the files and conditional GETs get a 304"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        with self.settings(API_SCHEMA_DIR=self.schema_dir):
+            call_command('generate_api_schema', stdout=StringIO())
+            self.assertTrue((self.schema_dir / 'openapi.json').exists())
+            url = reverse('schema-json', kwargs={'format': '.json'})
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn('/announcements/', response.json()['paths'])
+            etag = response['ETag']
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(self.client.get(reverse('schema-json', kwargs={'format': '.xml'})).status_code, 404)
+
+    def test_missing_file_generated_once_in_process(self):
+        """Test a missing schema file is generated on first request and reused after"""
+        from unittest import mock
+        from core import api_docs
+
+        with self.settings(API_SCHEMA_DIR=self.schema_dir), \
+                mock.patch.object(api_docs, 'generate_schema', wraps=api_docs.generate_schema) as generate:
+            url = reverse('schema-json', kwargs={'format': '.yaml'})
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(generate.call_count, 1)
+
+    def test_ui_pages_do_not_generate_schema(self):
+        """Test the Swagger UI and ReDoc pages render without running the schema generator"""
+        from unittest import mock
+        from drf_yasg.generators import OpenAPISchemaGenerator
+
+        spec_url = reverse('schema-json', kwargs={'format': '.json'})
+        with mock.patch.object(OpenAPISchemaGenerator, 'get_schema') as get_schema:
+            for name in ('schema-swagger-ui', 'schema-redoc', 'schema-swagger-ui'):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertContains(response, spec_url)
+                self.assertContains(response, 'Jamie Aale Abba Nursery Management API')
+        get_schema.assert_not_called()
+
+
+class StartupProfileTest(TestCase):
+    """Test the worker warm-up hook and the profile_startup command"""
+
+    def test_warm_up_reports_each_step(self):
+        """Test warm_up resolves URLs, builds serializers and connects without raising"""
+        from unittest.mock import patch
+        from core import warmup
+
+        self.assertGreater(warmup._resolve_urls(warmup.get_resolver()), 50)
+        self.assertGreater(warmup._build_serializer_fields(), 10)
+        # Closing for real would end the test case's transaction
+        with patch.object(warmup.connections, 'close_all') as close_all:
+            report = warmup.warm_up()
+        self.assertEqual(set(report), {'urls', 'serializers', 'database'})
+        close_all.assert_called_once_with()
+
+    def test_import_report(self):
+        """Test profile_startup lists import times from a fresh interpreter"""
+        from io import StringIO
+        from django.core.management import call_command
+        from core.management.commands.profile_startup import parse_importtime
+
+        self.assertEqual(
+            parse_importtime('import time: self [us] | cumulative | imported package\n'
+                             'import time:       120 |        450 | django.urls'),
+            [(450, 'django.urls')]
+        )
+        out = StringIO()
+        call_command('profile_startup', '--top', '3', '--skip-routes', stdout=out)
+        self.assertIn('Import time by package', out.getvalue())
+        self.assertIn('django', out.getvalue())
@@ -0,0 +1,140 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from core.models import RevokedToken
+
+# Rows revoked this long before the last sync are fetched again, so a
+# transaction that committed late is not missed
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    """
+    Fixed-size set membership test with no false negatives. `in` returning
+    False means the item was never added; True means it probably was.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        step = int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * step) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationFilter:
+    """
+    Per-process Bloom filter over revoked jtis. Revocations made here are
+    added immediately; other processes' are pulled in every
+    TOKEN_BLACKLIST_SYNC_INTERVAL seconds. It is rebuilt from unexpired rows
+    once more jtis were added than it was sized for.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._synced_at = None
+        self._checked_at = 0.0
+
+    def _capacity(self):
+        return getattr(settings, 'TOKEN_BLACKLIST_FILTER_CAPACITY', 100000)
+
+    def _add(self, jti):
+        if jti not in self._filter:
+            self._filter.add(jti)
+
+    def _rebuild(self):
+        now = timezone.now()
+        live = RevokedToken.objects.filter(expires_at__gt=now)
+        self._filter = BloomFilter(max(self._capacity(), 2 * live.count()))
+        for jti in live.values_list('jti', flat=True).iterator():
+            self._add(jti)
+        self._synced_at = now
+
+    def _sync(self):
+        now = timezone.now()
+        recent = RevokedToken.objects.filter(revoked_at__gte=self._synced_at - SYNC_OVERLAP)
+        for jti in recent.values_list('jti', flat=True).iterator():
+            self._add(jti)
+        self._synced_at = now
+
+    def might_contain(self, jti):
+        with self._lock:
+            interval = getattr(settings, 'TOKEN_BLACKLIST_SYNC_INTERVAL', 30)
+            if self._filter is None or self._filter.count > self._filter.capacity:
+                self._rebuild()
+                self._checked_at = time.monotonic()
+            elif time.monotonic() - self._checked_at >= interval:
+                self._sync()
+                self._checked_at = time.monotonic()
+            return jti in self._filter
+
+    def add(self, jti):
+        with self._lock:
+            if self._filter is not None:
+                self._add(jti)
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+
+
+revocation_filter = RevocationFilter()
+
+
+def is_revoked(jti):
+    """True if the jti was revoked; most calls are answered by the filter alone"""
+    if not jti or not revocation_filter.might_contain(jti):
+        return False
+    return RevokedToken.objects.filter(jti=jti).exists()
+
+
+def revoke(token):
+    """
+    Blacklist a token until it expires. Returns False when it already was,
+    which during rotation means another request used it first.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        return False
+    revocation_filter.add(jti)
+    return True
+
+
+def prune_expired(batch_size=1000, dry_run=False):
+    """Delete rows for tokens that have expired anyway, batch_size at a time"""
+    expired = RevokedToken.objects.filter(expires_at__lt=timezone.now())
+    if dry_run:
+        return expired.count()
+    deleted = 0
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += RevokedToken.objects.filter(id__in=ids).delete()[0]
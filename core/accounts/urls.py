@@ -1,8 +1,8 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     ParentRegistrationView,
     LoginView,
+    StatelessTokenRefreshView,
     EmailVerificationView,
     ResendVerificationView,
     TeacherRegistrationView,
@@ -32,6 +32,9 @@ from .class_management_views import (
     assign_teacher_to_class,
     remove_teacher_from_class,
     dashboard_statistics,
+    admin_search,
+    import_students,
+    academic_year_rollover,
 )
 from .teacher_views import (
     get_teacher_classes,
@@ -58,6 +61,15 @@ from .parent_child_views import (
     get_child_attendance_data,
     get_child_daily_activities,
 )
+from .messaging_views import (
+    message_threads,
+    thread_messages,
+    mark_thread_messages_read,
+    unread_message_count,
+)
+from .announcement_views import announcements
+from . import async_read_views
+from core.async_views import read_view
 from .admin_password_change import AdminFirstTimePasswordChangeView
 from .password_reset_views import PasswordResetRequestView, PasswordResetConfirmView, validate_reset_token
 
@@ -69,7 +81,7 @@ urlpatterns = [
     path('auth/register/parent/', ParentRegistrationView.as_view(), name='auth_parent_register'),
     path('auth/verify-email/', EmailVerificationView.as_view(), name='auth_verify_email'),
     path('auth/resend-verification/', ResendVerificationView.as_view(), name='auth_resend_verification'),
-    path('auth/refresh/', TokenRefreshView.as_view(), name='auth_token_refresh'),
+    path('auth/refresh/', StatelessTokenRefreshView.as_view(), name='auth_token_refresh'),
     path('auth/health/', health_check, name='auth_health_check'),
     
     # Parent self-service endpoints
@@ -80,8 +92,8 @@ urlpatterns = [
     
     # Teacher class management endpoints (for /api/v1/teacher/)
     path('teacher/my-classes/', get_teacher_classes, name='get_teacher_classes'),
-    path('teacher/classes/<int:class_id>/students/', get_class_students, name='get_class_students'),
-    path('teacher/classes/<int:class_id>/students-with-parents/', get_class_students_with_parents, name='get_class_students_with_parents'),
+    path('teacher/classes/<int:class_id>/students/', read_view(get_class_students, async_read_views.get_class_students), name='get_class_students'),
+    path('teacher/classes/<int:class_id>/students-with-parents/', read_view(get_class_students_with_parents, async_read_views.get_class_students_with_parents), name='get_class_students_with_parents'),
     
     # Teacher attendance endpoints (for /api/v1/teacher/)
     path('teacher/attendance/mark/', mark_attendance, name='teacher_attendance_mark'),
@@ -130,13 +142,15 @@ urlpatterns = [
     path('verify-email/', EmailVerificationView.as_view(), name='verify_email'),
     path('resend-verification/', ResendVerificationView.as_view(), name='resend_verification'),
     path('login/', LoginView.as_view(), name='token_obtain_pair'),
-    path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('refresh/', StatelessTokenRefreshView.as_view(), name='token_refresh'),
     
     # Class Management endpoints (Admin only - for /api/v1/admin/)
     path('admin/classes/', ClassListCreateView.as_view(), name='admin_class_list'),
     path('admin/classes/<int:pk>/', ClassDetailView.as_view(), name='admin_class_detail'),
     path('admin/students/', StudentListCreateView.as_view(), name='admin_student_list'),
     path('admin/students/<int:pk>/', StudentDetailView.as_view(), name='admin_student_detail'),
+    path('admin/students/import/', import_students, name='admin_student_import'),
+    path('admin/academic-year-rollover/', academic_year_rollover, name='admin_academic_year_rollover'),
     
     # Teacher-Student Assignment endpoints (Admin only)
     path('admin/teacher-assignments/', TeacherStudentAssignmentView.as_view(), name='admin_teacher_assignments'),
@@ -146,6 +160,9 @@ urlpatterns = [
     path('admin/assign-teacher-to-class/', assign_teacher_to_class, name='admin_assign_teacher_class'),
     path('admin/remove-teacher-from-class/<int:teacher_id>/<int:class_id>/', remove_teacher_from_class, name='admin_remove_teacher_class'),
     
+    # Search (Admin only - type-ahead for admin screens and assignment pickers)
+    path('admin/search/', admin_search, name='admin_search'),
+    
     # Dashboard statistics (Admin only)
     path('admin/dashboard-stats/', dashboard_statistics, name='admin_dashboard_stats'),
     
@@ -155,9 +172,18 @@ urlpatterns = [
     path('parent/children/<int:pk>/', ChildDetailView.as_view(), name='parent_child_detail'),
     path('parent/children/<int:child_id>/remove/', remove_child_relationship, name='parent_remove_child'),
     path('parent/children/<int:child_id>/request-enrollment/', request_class_enrollment, name='parent_request_enrollment'),
-    path('parent/children/<int:child_id>/learning-activities/', get_child_learning_activities, name='parent_child_learning_activities'),
+    path('parent/children/<int:child_id>/learning-activities/', read_view(get_child_learning_activities, async_read_views.get_child_learning_activities), name='parent_child_learning_activities'),
     path('parent/children/<int:child_id>/daily-activities/', get_child_daily_activities, name='parent_child_daily_activities'),
-    path('parent/children/<int:child_id>/attendance/', get_child_attendance_data, name='parent_child_attendance'),
+    path('parent/children/<int:child_id>/attendance/', read_view(get_child_attendance_data, async_read_views.get_child_attendance_data), name='parent_child_attendance'),
     path('parent/children/summary/', get_child_summary, name='parent_child_summary'),
     path('parent/available-classes/', get_available_classes, name='parent_available_classes'),
+    
+    # Messaging endpoints (parents, teachers and admins - for /api/v1/messages/)
+    path('messages/threads/', message_threads, name='message_threads'),
+    path('messages/threads/<uuid:thread_id>/messages/', thread_messages, name='thread_messages'),
+    path('messages/threads/<uuid:thread_id>/read/', mark_thread_messages_read, name='thread_mark_read'),
+    path('messages/unread-count/', unread_message_count, name='unread_message_count'),
+
+    # Announcements feed (all users - for /api/v1/announcements/)
+    path('announcements/', announcements, name='announcements'),
 ]
\ No newline at end of file
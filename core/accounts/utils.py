@@ -165,13 +165,14 @@ def get_user_display_name(user):
 
 def create_audit_log(user, action, entity_type, entity_id=None, description="", ip_address=None):
     """
-    Create audit log entry
+    Create audit log entry. The row is buffered and written in bulk when the
+    request finishes (see core/audit_buffer.py).
     """
-    from core.models import AuditLog
+    from core.audit_buffer import record_audit
 
     try:
-        AuditLog.objects.create(
-            user=user,
+        record_audit(
+            user,
             action=action,
             entity_type=entity_type,
             entity_id=entity_id,
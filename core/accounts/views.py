@@ -2,8 +2,7 @@ from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
@@ -12,8 +11,7 @@ from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.http import JsonResponse
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from core.api_docs import openapi, swagger_auto_schema
 from core.models import User
 from .serializers import (
     ParentRegistrationSerializer,
@@ -33,6 +31,7 @@ from .serializers import (
     AdminSelfUpdateSerializer,
     ParentPasswordChangeSerializer
 )
+from .authentication import StatelessTokenRefreshSerializer, tokens_for_user
 from .email_service import send_verification_email, send_welcome_email
 from .permissions import IsAdminUser, IsOwnerOrAdmin
 from .admin_password_change import AdminFirstTimePasswordChangeView
@@ -143,7 +142,7 @@ class ParentRegistrationView(APIView):
             try:
                 user = serializer.save()
                 # Send verification email
-                send_verification_email(user)
+                send_verification_email(user, user.generate_email_verification_token())
                 
                 return Response({
                     'message': 'Registration successful! Please check your email to verify your account.',
@@ -170,7 +169,7 @@ class LoginView(APIView):
             user = serializer.validated_data['user']
             
             # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = tokens_for_user(user)
             
             return Response({
                 'access': str(refresh.access_token),
@@ -181,6 +180,11 @@ class LoginView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+# Token refresh: rotates like simplejwt and reissues current claims
+class StatelessTokenRefreshView(TokenRefreshView):
+    serializer_class = StatelessTokenRefreshSerializer
+
+
 # Email Verification
 @method_decorator(csrf_exempt, name='dispatch')
 class EmailVerificationView(APIView):
@@ -190,29 +194,23 @@ class EmailVerificationView(APIView):
         serializer = EmailVerificationSerializer(data=request.data)
         if serializer.is_valid():
             token = serializer.validated_data['token']
+            user = serializer.user
             
-            try:
-                user = User.objects.get(email_verification_token=token, is_email_verified=False)
+            if user.verify_email(token):
+                send_welcome_email(user)
                 
-                if user.verify_email(token):
-                    send_welcome_email(user)
-                    
-                    # Generate JWT tokens for immediate login
-                    refresh = RefreshToken.for_user(user)
-                    
-                    return Response({
-                        'message': 'Email verified successfully! Your account is now active.',
-                        'access': str(refresh.access_token),
-                        'refresh': str(refresh),
-                        'user': UserProfileSerializer(user).data
-                    }, status=status.HTTP_200_OK)
-                else:
-                    return Response({
-                        'error': 'Invalid or expired verification token.'
-                    }, status=status.HTTP_400_BAD_REQUEST)
-            except User.DoesNotExist:
+                # Generate JWT tokens for immediate login
+                refresh = tokens_for_user(user)
+                
+                return Response({
+                    'message': 'Email verified successfully! Your account is now active.',
+                    'access': str(refresh.access_token),
+                    'refresh': str(refresh),
+                    'user': UserProfileSerializer(user).data
+                }, status=status.HTTP_200_OK)
+            else:
                 return Response({
-                    'error': 'Invalid verification token.'
+                    'error': 'Invalid or expired verification token.'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -239,8 +237,7 @@ class ResendVerificationView(APIView):
                     }, status=status.HTTP_429_TOO_MANY_REQUESTS)
                 
                 # Generate new token and send email
-                user.generate_email_verification_token()
-                send_verification_email(user)
+                send_verification_email(user, user.generate_email_verification_token())
                 
                 return Response({
                     'message': 'Verification email sent successfully.'
@@ -575,9 +572,14 @@ class TeacherPasswordChangeView(APIView):
                 
                 logger.info(f"Teacher {request.user.email} changed their password")
                 
+                # Tokens issued before the change no longer authenticate
+                refresh = tokens_for_user(request.user)
+                
                 return Response({
                     'message': 'Password changed successfully. You can now access all teacher features.',
-                    'password_change_required': False
+                    'password_change_required': False,
+                    'access': str(refresh.access_token),
+                    'refresh': str(refresh)
                 }, status=status.HTTP_200_OK)
                 
             except Exception as e:
@@ -1043,8 +1045,13 @@ class ParentPasswordChangeView(APIView):
                 
                 logger.info(f"Parent {user.email} changed their password")
                 
+                # Tokens issued before the change no longer authenticate
+                refresh = tokens_for_user(user)
+                
                 return Response({
-                    'message': 'Password changed successfully.'
+                    'message': 'Password changed successfully.',
+                    'access': str(refresh.access_token),
+                    'refresh': str(refresh)
                 }, status=status.HTTP_200_OK)
                 
             except Exception as e:
@@ -0,0 +1,159 @@
+"""
+OpenAPI documentation.
+
+The schema is generated once, by `manage.py generate_api_schema` at deploy
+time (or on the first request in a process where that hasn't been run),
+and served as a file with an ETag instead of re-introspecting every view on
+each docs hit. With API_DOCS_ENABLED off, drf_yasg is never imported: the
+views' swagger_auto_schema decorators become no-ops and the UI pages are
+not routed, while a generated schema file is still served.
+"""
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import condition, require_safe
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_FORMATS = {'.json': 'application/json', '.yaml': 'application/yaml'}
+
+if getattr(settings, 'API_DOCS_ENABLED', True):
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema
+else:
+    class _Absent:
+        """Stands in for drf_yasg.openapi; absorbs the arguments built for swagger_auto_schema"""
+
+        def __getattr__(self, name):
+            return self
+
+        def __call__(self, *args, **kwargs):
+            return self
+
+    openapi = _Absent()
+
+    def swagger_auto_schema(*args, **kwargs):
+        return lambda view: view
+
+
+def api_info():
+    return openapi.Info(
+        title="Jamie Aale Abba Nursery Management API",
+        default_version='v1',
+        description="API for managing nursery operations including authentication, class management, attendance, and learning activities.",
+        terms_of_service="https://www.google.com/policies/terms/",
+        contact=openapi.Contact(email="support@jamiaaaleabba.co.uk"),
+        license=openapi.License(name="MIT License"),
+    )
+
+
+def api_docs_ui(renderer):
+    """
+    The Swagger UI or ReDoc page. The page itself only shows the API title
+    and version and fetches the spec from SPEC_URL (the schema-json route),
+    so it's rendered from api_info() without running the schema generator.
+    """
+    from drf_yasg.views import UI_RENDERERS, get_schema_view
+    from rest_framework import permissions
+    from rest_framework.response import Response
+
+    class UIView(get_schema_view(api_info(), public=True, permission_classes=(permissions.AllowAny,))):
+        def get(self, request, version='', format=None):
+            return Response(openapi.Swagger(info=api_info(), _prefix='/', _version=version, paths=openapi.Paths({})))
+
+    return UIView.as_view(renderer_classes=UI_RENDERERS[renderer])
+
+
+def schema_path(fmt):
+    return settings.API_SCHEMA_DIR / f'openapi{fmt}'
+
+
+def generate_schema():
+    """The full schema encoded in each of SCHEMA_FORMATS, as {format: bytes}"""
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    schema = OpenAPISchemaGenerator(api_info()).get_schema(request=None, public=True)
+    return {
+        '.json': OpenAPICodecJson(validators=[]).encode(schema),
+        '.yaml': OpenAPICodecYaml(validators=[]).encode(schema),
+    }
+
+
+def write_schema():
+    """Generate the schema into API_SCHEMA_DIR; returns the paths written"""
+    settings.API_SCHEMA_DIR.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for fmt, content in generate_schema().items():
+        path = schema_path(fmt)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        tmp_path.write_bytes(content)
+        tmp_path.replace(path)
+        paths.append(path)
+    return paths
+
+
+class _SchemaCache:
+    """
+    Schema bytes and ETag per format, re-read only when the file's mtime
+    changes so a regenerated schema is picked up without a restart
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generated = None
+
+    def get(self, fmt):
+        """(content, etag), or None if there is no file and drf_yasg is disabled"""
+        path = schema_path(fmt)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return self._fallback(fmt)
+        entry = self._entries.get(fmt)
+        if entry is None or entry[0] != mtime:
+            content = path.read_bytes()
+            entry = (mtime, content, hashlib.sha1(content).hexdigest())
+            self._entries[fmt] = entry
+        return entry[1], entry[2]
+
+    def _fallback(self, fmt):
+        if not getattr(settings, 'API_DOCS_ENABLED', True):
+            return None
+        with self._lock:
+            if self._generated is None:
+                logger.warning("API schema file missing; generating it in this process (run generate_api_schema at deploy)")
+                self._generated = {
+                    key: (content, hashlib.sha1(content).hexdigest())
+                    for key, content in generate_schema().items()
+                }
+        return self._generated[fmt]
+
+    def clear(self):
+        self._entries.clear()
+        self._generated = None
+
+
+schema_cache = _SchemaCache()
+
+
+def _schema_etag(request, format):
+    schema = schema_cache.get(format) if format in SCHEMA_FORMATS else None
+    return schema[1] if schema else None
+
+
+@require_safe
+@condition(etag_func=_schema_etag)
+def api_schema(request, format):
+    """The OpenAPI schema as swagger.json / swagger.yaml; conditional GETs get a 304"""
+    schema = schema_cache.get(format) if format in SCHEMA_FORMATS else None
+    if schema is None:
+        return JsonResponse({'error': 'API schema has not been generated'}, status=404)
+    response = HttpResponse(schema[0], content_type=SCHEMA_FORMATS[format])
+    # Let clients keep their copy but revalidate it against the ETag each time
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,91 @@
+import logging
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.permissions import IsAuthenticated
+
+from core.accounts.authentication import StatelessJWTAuthentication
+from core.renderers import FastJSONRenderer
+
+logger = logging.getLogger(__name__)
+
+
+async def alist(queryset):
+    """Evaluate a queryset (prefetches included) through the async ORM"""
+    return [obj async for obj in queryset]
+
+
+def json_response(data, status=200):
+    """Rendered with the API's default renderer, so async and sync responses match"""
+    return HttpResponse(FastJSONRenderer().render(data), content_type='application/json', status=status)
+
+
+def _authorize(request, permission_classes):
+    """
+    Set request.user from the bearer token (or the session) and check the
+    permissions. Runs in a worker thread; returns an error response or None.
+    """
+    try:
+        result = StatelessJWTAuthentication().authenticate(request)
+    except exceptions.AuthenticationFailed as e:
+        detail = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+        response = json_response(detail, status=401)
+        response['WWW-Authenticate'] = 'Bearer realm="api"'
+        return response
+    if result is not None:
+        request.user = result[0]
+    elif not hasattr(request, 'user'):
+        request.user = AnonymousUser()
+
+    for permission_class in permission_classes:
+        if not permission_class().has_permission(request, None):
+            if not request.user.is_authenticated:
+                response = json_response({'detail': exceptions.NotAuthenticated.default_detail}, status=401)
+                response['WWW-Authenticate'] = 'Bearer realm="api"'
+                return response
+            return json_response({'detail': exceptions.PermissionDenied.default_detail}, status=403)
+    return None
+
+
+def async_api_view(permission_classes=(IsAuthenticated,), error='An unexpected error occurred'):
+    """
+    Async counterpart of @api_view for read endpoints: authentication and
+    permissions as DRF would apply them, and unexpected errors reported as
+    {'error': '<error>: ...'} with a 500 like the sync views
+    """
+    def decorator(handler):
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            denied = await sync_to_async(_authorize)(request, permission_classes)
+            if denied is not None:
+                return denied
+            try:
+                return await handler(request, *args, **kwargs)
+            except Exception as e:
+                logger.error(f"{handler.__name__} failed: {str(e)}")
+                return json_response({'error': f'{error}: {str(e)}'}, status=500)
+        return view
+    return decorator
+
+
+def read_view(sync_view, async_view):
+    """
+    View for a URL with an async read path. With ASYNC_READ_VIEWS (set when
+    served through asgi.py) GETs go to async_view and other methods to
+    sync_view in a worker thread; otherwise sync_view is used unchanged.
+    """
+    if not getattr(settings, 'ASYNC_READ_VIEWS', False):
+        return sync_view
+    sync_dispatch = sync_to_async(sync_view)
+
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if request.method == 'GET':
+            return await async_view(request, *args, **kwargs)
+        return await sync_dispatch(request, *args, **kwargs)
+    return view
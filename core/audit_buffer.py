@@ -0,0 +1,233 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, InterfaceError, OperationalError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import AuditLog, DownloadLog, User
+
+logger = logging.getLogger(__name__)
+
+# Models the buffer writes; entries carry their label so the spool can hold both
+BUFFERED_MODELS = {model._meta.label: model for model in (AuditLog, DownloadLog)}
+
+
+def _buffer_size():
+    return getattr(settings, 'AUDIT_LOG_BUFFER_SIZE', 100)
+
+
+def spool_path():
+    return getattr(settings, 'AUDIT_LOG_SPOOL_PATH', os.path.join(settings.BASE_DIR, 'var', 'audit_spool.jsonl'))
+
+
+def rejected_path():
+    """Rows the database refused on their own; kept for inspection, never replayed"""
+    root, ext = os.path.splitext(spool_path())
+    return f'{root}.rejected{ext}'
+
+
+# Errors that mean the database couldn't be reached, not that a row was refused
+CONNECTION_ERRORS = (OperationalError, InterfaceError)
+
+
+def _encode(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _spool(entries, path=None):
+    """
+    Append entries to the local JSONL spool (or another JSONL file). A single
+    O_APPEND write keeps lines from different processes from interleaving.
+    """
+    path = path or spool_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = ''.join(
+        json.dumps({'model': label, 'fields': {k: _encode(v) for k, v in fields.items()}}) + '\n'
+        for label, fields in entries
+    )
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+    try:
+        os.write(fd, payload.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+def _write(entries):
+    """bulk_create entries grouped by model in one transaction"""
+    by_model = {}
+    for label, fields in entries:
+        by_model.setdefault(label, []).append(BUFFERED_MODELS[label](**fields))
+    with transaction.atomic():
+        for label, objects in by_model.items():
+            BUFFERED_MODELS[label].objects.bulk_create(objects, batch_size=500)
+
+
+def _write_rows(entries):
+    """
+    Write entries with _write. If the database refuses the batch for any
+    reason other than a lost connection, retry one row at a time so a single
+    bad row (an over-long value, a deleted user) doesn't take the rest with
+    it. Returns (rejected, unwritten): rows refused on their own, and rows
+    not written because the connection failed.
+    """
+    try:
+        _write(entries)
+        return [], []
+    except CONNECTION_ERRORS:
+        return [], entries
+    except DatabaseError as e:
+        logger.warning(f"Audit log batch of {len(entries)} refused, retrying row by row: {str(e)}")
+
+    rejected = []
+    for index, entry in enumerate(entries):
+        try:
+            _write([entry])
+        except CONNECTION_ERRORS:
+            return rejected, entries[index:]
+        except DatabaseError as e:
+            logger.error(f"Audit log row rejected ({entry[0]}): {str(e)}")
+            rejected.append(entry)
+    return rejected, []
+
+
+def _reject(entries):
+    try:
+        _spool(entries, rejected_path())
+    except OSError as e:
+        logger.error(f"Audit log rejected file write failed, {len(entries)} entries lost: {str(e)}")
+
+
+class LogBuffer:
+    """
+    Process-wide buffer of audit and download log rows. Rows are written
+    with bulk_create when a request finishes or the buffer fills; if the
+    database can't be reached they go to the spool for `manage.py
+    replay_audit_spool`, and rows it refuses go to rejected_path().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+
+    def add(self, model, **fields):
+        fields.setdefault('created_at', timezone.now())
+        with self._lock:
+            self._entries.append((model._meta.label, fields))
+            full = len(self._entries) >= _buffer_size()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            entries, self._entries = self._entries, []
+        if not entries:
+            return 0
+        rejected, unwritten = _write_rows(entries)
+        if rejected:
+            _reject(rejected)
+        if unwritten:
+            logger.error(f"Audit log write failed, spooling {len(unwritten)} entries")
+            try:
+                _spool(unwritten)
+            except OSError as spool_error:
+                logger.error(f"Audit log spool failed, {len(unwritten)} entries lost: {str(spool_error)}")
+        return len(entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+log_buffer = LogBuffer()
+atexit.register(log_buffer.flush)
+
+
+def record_audit(user, action, entity_type, entity_id=None, description='', ip_address=None):
+    log_buffer.add(
+        AuditLog, user_id=getattr(user, 'pk', user), action=action, entity_type=entity_type,
+        entity_id=entity_id, description=description, ip_address=ip_address
+    )
+
+
+def record_download(user, item_type, item_id, file_name='', file_url='', ip_address=None,
+                    disclaimer_accepted=False, download_purpose=''):
+    log_buffer.add(
+        DownloadLog, user_id=getattr(user, 'pk', user), downloaded_item_type=item_type,
+        downloaded_item_id=item_id, file_name=file_name, file_url=file_url, ip_address=ip_address,
+        disclaimer_accepted=disclaimer_accepted, download_purpose=download_purpose
+    )
+
+
+def _decode(label, fields):
+    model = BUFFERED_MODELS[label]
+    for field in model._meta.concrete_fields:
+        if field.get_internal_type() == 'DateTimeField' and fields.get(field.attname):
+            fields[field.attname] = parse_datetime(fields[field.attname])
+    return fields
+
+
+def _drop_missing_users(entries):
+    """Users deleted since spooling: audit rows keep the event without a user, download rows go"""
+    user_ids = {fields.get('user_id') for label, fields in entries} - {None}
+    existing = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+    kept = []
+    for label, fields in entries:
+        if fields.get('user_id') is not None and fields['user_id'] not in existing:
+            if BUFFERED_MODELS[label] is DownloadLog:
+                continue
+            fields['user_id'] = None
+        kept.append((label, fields))
+    return kept
+
+
+def replay_spool(batch_size=500):
+    """
+    Load spooled entries into the database. The spool is renamed first so
+    new failures start a fresh file; entries that can't be written because
+    the database is unreachable are appended back to it, and entries it
+    refuses go to rejected_path() instead of being retried forever.
+    Returns (loaded, requeued, rejected).
+    """
+    path = spool_path()
+    if os.path.exists(path):
+        os.replace(path, f'{path}.replaying-{int(time.time() * 1000)}')
+
+    loaded = requeued = rejected_count = 0
+    for replay_file in sorted(glob.glob(f'{glob.escape(path)}.replaying-*')):
+        entries = []
+        with open(replay_file, encoding='utf-8') as spool_file:
+            for line_number, line in enumerate(spool_file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    entries.append((record['model'], _decode(record['model'], record['fields'])))
+                except (ValueError, LookupError) as e:
+                    # A line cut short by a crash mid-write; nothing to recover
+                    logger.error(f"Skipping unreadable audit spool line {line_number} in {replay_file}: {str(e)}")
+
+        for start in range(0, len(entries), batch_size):
+            try:
+                batch = _drop_missing_users(entries[start:start + batch_size])
+            except CONNECTION_ERRORS:
+                batch, rejected, unwritten = [], [], entries[start:start + batch_size]
+            else:
+                rejected, unwritten = _write_rows(batch)
+            if rejected:
+                _reject(rejected)
+                rejected_count += len(rejected)
+            loaded += len(batch) - len(rejected) - len(unwritten)
+            if unwritten:
+                logger.error("Audit spool replay stopped: database unavailable")
+                rest = unwritten + entries[start + batch_size:]
+                _spool(rest)
+                requeued += len(rest)
+                break
+        os.remove(replay_file)
+    return loaded, requeued, rejected_count
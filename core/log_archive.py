@@ -0,0 +1,146 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import AuditLog, DownloadLog, UserSession
+
+logger = logging.getLogger(__name__)
+
+# Append-only tables that are moved out of the database once old enough
+ARCHIVED_MODELS = {model._meta.db_table: model for model in (AuditLog, DownloadLog, UserSession)}
+
+DEFAULT_RETENTION_DAYS = {
+    'audit_logs': 365,
+    'download_logs': 365,
+    'user_sessions': 90,
+}
+
+# Column a row's age is measured by; a session is only old once it has expired
+AGE_FIELDS = {
+    'user_sessions': 'expires_at',
+}
+
+# Secrets never written to the archive; they are kept as a SHA-256 hex digest instead
+HASHED_FIELDS = {
+    'user_sessions': ['session_token'],
+}
+
+
+def archive_dir():
+    return getattr(settings, 'LOG_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'var', 'log_archive'))
+
+
+def retention_days(table):
+    return getattr(settings, 'LOG_RETENTION_DAYS', DEFAULT_RETENTION_DAYS).get(table, DEFAULT_RETENTION_DAYS[table])
+
+
+def partition_path(table, day):
+    """One gzip file per table and day: <table>/<yyyy>/<mm>/<table>-<yyyy-mm-dd>.jsonl.gz"""
+    return os.path.join(archive_dir(), table, f'{day:%Y}', f'{day:%m}', f'{table}-{day:%Y-%m-%d}.jsonl.gz')
+
+
+def _serialize(table, row):
+    row = dict(row)
+    for field in HASHED_FIELDS.get(table, []):
+        value = row.pop(field)
+        row[f'{field}_sha256'] = hashlib.sha256(value.encode()).hexdigest() if value else None
+    return json.dumps({key: value.isoformat() if hasattr(value, 'isoformat') else value for key, value in row.items()})
+
+
+def _append_partition(table, day, rows):
+    """
+    Add rows to a day's archive as a new gzip member; gzip readers treat
+    concatenated members as one stream. Synced before the rows are deleted.
+    """
+    path = partition_path(table, day)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'ab') as raw_file:
+        with gzip.GzipFile(fileobj=raw_file, mode='wb') as archive:
+            archive.write(''.join(_serialize(table, row) + '\n' for row in rows).encode('utf-8'))
+        raw_file.flush()
+        os.fsync(raw_file.fileno())
+
+
+def archive_table(table, days=None, batch_size=1000, dry_run=False):
+    """
+    Move rows older than the retention period (by their AGE_FIELDS column,
+    created_at by default) into the day partitions and delete them,
+    batch_size rows per transaction. Returns the row count.
+
+    Rows are written before they are deleted, so an interrupted run can at
+    worst leave a batch both archived and in the table; the next run
+    archives it again rather than losing it.
+    """
+    model = ARCHIVED_MODELS[table]
+    cutoff = timezone.now() - timedelta(days=days if days is not None else retention_days(table))
+    age_field = AGE_FIELDS.get(table, 'created_at')
+    expired = model.objects.filter(**{f'{age_field}__lt': cutoff}).order_by('id')
+    if dry_run:
+        return expired.count()
+
+    archived = 0
+    last_id = 0
+    while True:
+        rows = list(expired.filter(id__gt=last_id).values()[:batch_size])
+        if not rows:
+            return archived
+        last_id = rows[-1]['id']
+
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(timezone.localtime(row['created_at']).date(), []).append(row)
+        for day, day_rows in sorted(by_day.items()):
+            _append_partition(table, day, day_rows)
+
+        with transaction.atomic():
+            model.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        archived += len(rows)
+
+
+def _partition_day(filename):
+    try:
+        return date.fromisoformat(filename[-len('yyyy-mm-dd.jsonl.gz'):-len('.jsonl.gz')])
+    except ValueError:
+        return None
+
+
+def iter_partitions(table, start=None, end=None):
+    """Archive files for table whose day falls within [start, end], oldest first"""
+    root = os.path.join(archive_dir(), table)
+    paths = []
+    for directory, dirs, files in os.walk(root):
+        for name in files:
+            day = _partition_day(name)
+            if day is None or (start and day < start) or (end and day > end):
+                continue
+            paths.append((day, os.path.join(directory, name)))
+    return [path for day, path in sorted(paths)]
+
+
+def search_archive(table, start=None, end=None, match=None, contains=None):
+    """
+    Yield archived rows (as dicts) from the partitions between start and
+    end, streaming one line at a time. `match` is a dict of exact field
+    values; `contains` a case-insensitive substring of the raw line.
+    """
+    match = match or {}
+    needle = contains.lower() if contains else None
+    for path in iter_partitions(table, start, end):
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            try:
+                for line in archive:
+                    if needle and needle not in line.lower():
+                        continue
+                    row = json.loads(line)
+                    if all(str(row.get(field)) == str(value) for field, value in match.items()):
+                        yield row
+            except (EOFError, gzip.BadGzipFile) as e:
+                # A member cut short by an interrupted archive run; its rows are still in the table
+                logger.warning(f"Stopped reading truncated archive {path}: {str(e)}")
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from core.log_archive import ARCHIVED_MODELS, archive_dir, archive_table, retention_days
+
+
+class Command(BaseCommand):
+    help = 'Move old audit, download and session rows into compressed daily JSONL archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table',
+            choices=sorted(ARCHIVED_MODELS),
+            action='append',
+            help='Only archive this table (repeatable; default: all)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Archive rows older than this many days (default: LOG_RETENTION_DAYS per table)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows archived and deleted per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count the rows that would be archived without moving anything'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for table in options['table'] or sorted(ARCHIVED_MODELS):
+            days = options['days'] if options['days'] is not None else retention_days(table)
+            count = archive_table(
+                table, days=days, batch_size=options['batch_size'], dry_run=options['dry_run']
+            )
+            total += count
+            self.stdout.write(f'  {table}: {count} rows older than {days} days')
+
+        prefix = 'DRY RUN: would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(f'{prefix} {total} rows to {archive_dir()}'))
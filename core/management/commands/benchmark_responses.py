@@ -0,0 +1,93 @@
+import gzip
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from core.accounts.authentication import tokens_for_user
+from core.middleware import brotli
+from core.models import ClassTeacherAssignment, ParentStudentRelationship, User
+from core.renderers import FastJSONRenderer, orjson
+
+
+def default_paths(user):
+    """The feeds, plus the year charts or class roster the user can read"""
+    paths = ['/api/v1/simple-newsfeed/stories/?page_size=50', reverse('v1_auth:announcements') + '?limit=50']
+    if user.user_type == 'parent':
+        relationship = ParentStudentRelationship.objects.filter(parent__user=user).first()
+        if relationship:
+            paths += [
+                reverse('v1_auth:parent_child_attendance', args=[relationship.student_id]),
+                reverse('v1_auth:parent_child_learning_activities', args=[relationship.student_id]),
+            ]
+    elif user.user_type == 'teacher':
+        assignment = ClassTeacherAssignment.objects.filter(teacher__user=user, is_active=True).first()
+        if assignment:
+            paths.append(reverse('v1_auth:get_class_students_with_parents', args=[assignment.class_obj_id]))
+    return paths
+
+
+def _time(renderer, data, iterations):
+    """Milliseconds per render"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        renderer.render(data)
+    return (time.perf_counter() - started) * 1000 / iterations
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON rendering time and compressed sizes for the largest API responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Email of the user whose view of the endpoints is measured'
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            help='API path to measure (repeatable; default: feeds plus the user\'s charts or roster)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Renders timed per renderer (default: 50)'
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(email=options['user']).first()
+        if user is None:
+            raise CommandError(f"No user with email {options['user']}")
+
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {tokens_for_user(user).access_token}')
+        self.stdout.write(
+            f"orjson: {'installed' if orjson else 'missing'}, brotli: {'installed' if brotli else 'missing'}"
+        )
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for path in options['path'] or default_paths(user):
+                response = client.get(path, HTTP_ACCEPT_ENCODING='identity')
+                if response.status_code != 200:
+                    self.stdout.write(self.style.WARNING(f'{path}: HTTP {response.status_code}, skipped'))
+                    continue
+                data = getattr(response, 'data', None)
+                if data is None:
+                    data = json.loads(response.content)
+
+                body = JSONRenderer().render(data)
+                drf_ms = _time(JSONRenderer(), data, options['iterations'])
+                fast_ms = _time(FastJSONRenderer(), data, options['iterations'])
+                sizes = f'{len(body)} B raw, {len(gzip.compress(body))} B gzip'
+                if brotli:
+                    sizes += f", {len(brotli.compress(body, quality=getattr(settings, 'RESPONSE_BROTLI_QUALITY', 5)))} B br"
+                self.stdout.write(
+                    f'{path}\n  render: DRF {drf_ms:.3f} ms, FastJSONRenderer {fast_ms:.3f} ms\n  size: {sizes}'
+                )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
@@ -0,0 +1,144 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete parent accounts that never verified their email, in small '
+        'primary-key batches so the live database stays responsive'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Delete unverified users older than this many days (default: 7)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be deleted without actually deleting'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Users deleted per transaction (default: 200)'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.5,
+            help='Seconds to pause between batches (default: 0.5)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.BASE_DIR, 'cleanup_unverified_users.checkpoint'),
+            help='File recording progress so an interrupted run resumes where it stopped'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore an existing checkpoint and start from the first user'
+        )
+
+    def _load_checkpoint(self, path, days):
+        """(cutoff, last_pk) from an unfinished run with the same --days, or None"""
+        try:
+            with open(path) as checkpoint_file:
+                state = json.load(checkpoint_file)
+        except (OSError, ValueError):
+            return None
+        if state.get('days') != days:
+            return None
+        return datetime.fromisoformat(state['cutoff']), state['last_pk']
+
+    def _save_checkpoint(self, path, days, cutoff, last_pk):
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as checkpoint_file:
+            json.dump({'days': days, 'cutoff': cutoff.isoformat(), 'last_pk': last_pk}, checkpoint_file)
+        os.replace(temp_path, path)
+
+    def handle(self, *args, **options):
+        days = options['days']
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        checkpoint = options['checkpoint']
+
+        cutoff_date = timezone.now() - timedelta(days=days)
+        last_pk = 0
+        resumed = None if options['restart'] or dry_run else self._load_checkpoint(checkpoint, days)
+        if resumed:
+            # Keep the original cutoff so a resumed run deletes the same set of users
+            cutoff_date, last_pk = resumed
+            self.stdout.write(f'Resuming after user id {last_pk} (cutoff {cutoff_date:%Y-%m-%d %H:%M})')
+
+        # Teachers and admins are created verified by an admin; only self-registered
+        # parents who never confirmed their address are removed
+        unverified_users = User.objects.filter(
+            user_type='parent',
+            is_email_verified=False,
+            is_active=False,
+            date_joined__lt=cutoff_date
+        )
+
+        remaining = unverified_users.filter(pk__gt=last_pk).count()
+        self.stdout.write(f'{remaining} unverified users older than {days} days to process')
+
+        processed = deleted_count = batches = 0
+        while True:
+            batch = list(
+                unverified_users.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'email', 'date_joined')[:batch_size]
+            )
+            if not batch:
+                break
+            ids = [pk for pk, email, date_joined in batch]
+            last_pk = ids[-1]
+            batches += 1
+
+            if dry_run:
+                if options['verbosity'] >= 2:
+                    for pk, email, date_joined in batch:
+                        self.stdout.write(f'  - {email} (created: {date_joined})')
+                processed += len(ids)
+            else:
+                # One short transaction per batch; the filter is re-applied so a
+                # user who verified after the batch was read is kept
+                with transaction.atomic():
+                    _, per_model = unverified_users.filter(pk__in=ids).delete()
+                deleted_count += per_model.get(User._meta.label, 0)
+                processed += len(ids)
+                self._save_checkpoint(checkpoint, days, cutoff_date, last_pk)
+
+            self.stdout.write(f'Batch {batches}: {processed}/{remaining} users processed')
+
+            if len(batch) < batch_size:
+                break
+            if options['sleep'] and not dry_run:
+                time.sleep(options['sleep'])
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'DRY RUN: Would delete {processed} unverified users older than {days} days'
+                )
+            )
+            return
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Deleted {deleted_count} unverified users older than {days} days in {batches} batches'
+            )
+        )
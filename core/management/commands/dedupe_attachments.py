@@ -0,0 +1,80 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import StoryAttachment, MediaBlob
+from core.simple_story_models import SimpleStoryAttachment
+from core.media_storage import store_local_file, blob_url
+
+
+class Command(BaseCommand):
+    help = 'Move story attachments stored before content addressing into the shared blob store'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the attachments that would be migrated'
+        )
+
+    def _media_path(self, url):
+        if not url.startswith(settings.MEDIA_URL):
+            return None
+        return os.path.join(settings.MEDIA_ROOT, url[len(settings.MEDIA_URL):])
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        migrated = missing = bytes_before = 0
+        blob_ids = set()
+
+        for attachment in StoryAttachment.objects.filter(blob__isnull=True).iterator():
+            path = self._media_path(attachment.file_url)
+            if not path or not os.path.exists(path):
+                missing += 1
+                continue
+            bytes_before += os.path.getsize(path)
+            if dry_run:
+                migrated += 1
+                continue
+            with transaction.atomic():
+                blob = store_local_file(path, attachment.mime_type)
+                attachment.blob = blob
+                attachment.file_url = blob_url(blob)
+                attachment.save(update_fields=['blob', 'file_url'])
+            blob_ids.add(blob.id)
+            migrated += 1
+
+        for attachment in SimpleStoryAttachment.objects.filter(blob__isnull=True).iterator():
+            if not attachment.file or not os.path.exists(attachment.file.path):
+                missing += 1
+                continue
+            bytes_before += os.path.getsize(attachment.file.path)
+            if dry_run:
+                migrated += 1
+                continue
+            with transaction.atomic():
+                blob = store_local_file(attachment.file.path)
+                attachment.blob = blob
+                attachment.file = blob.file_path
+                attachment.save(update_fields=['blob', 'file'])
+            blob_ids.add(blob.id)
+            migrated += 1
+
+        if dry_run:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'DRY RUN: would migrate {migrated} attachments ({bytes_before} bytes), '
+                    f'{missing} files missing'
+                )
+            )
+            return
+
+        bytes_after = sum(MediaBlob.objects.filter(id__in=blob_ids).values_list('size', flat=True))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Migrated {migrated} attachments into {len(blob_ids)} blobs; '
+                f'{bytes_before} bytes now stored as {bytes_after} bytes, {missing} files missing'
+            )
+        )
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.api_docs import write_schema
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI schema once into API_SCHEMA_DIR, where /swagger.json and /swagger.yaml serve it from'
+
+    def handle(self, *args, **options):
+        if not settings.API_DOCS_ENABLED:
+            raise CommandError('Generating the schema needs drf_yasg; run with DJANGO_API_DOCS_ENABLED=True')
+        paths = write_schema()
+        for path in paths:
+            self.stdout.write(f'  {path} ({path.stat().st_size} bytes)')
+        self.stdout.write(self.style.SUCCESS(f'Wrote API schema to {settings.API_SCHEMA_DIR}'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.models import MediaBlob
+from core.media_variants import process_blob
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail and medium variants for image attachments still pending'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Also retry images whose variants previously failed'
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            MediaBlob.objects.filter(
+                variants_status=MediaBlob.VARIANTS_FAILED
+            ).update(variants_status=MediaBlob.VARIANTS_PENDING)
+
+        pending_ids = list(
+            MediaBlob.objects.filter(variants_status=MediaBlob.VARIANTS_PENDING).values_list('id', flat=True)
+        )
+        for blob_id in pending_ids:
+            process_blob(blob_id)
+
+        failed = MediaBlob.objects.filter(id__in=pending_ids, variants_status=MediaBlob.VARIANTS_FAILED).count()
+        self.stdout.write(
+            self.style.SUCCESS(f'Processed {len(pending_ids)} images ({failed} failed)')
+        )
@@ -0,0 +1,68 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from core.accounts.student_import import import_students_csv
+
+
+class Command(BaseCommand):
+    help = 'Import students, class enrollments and parent links from a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', type=str, help='Path to the CSV file')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Rows validated and inserted per batch (default: 500)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without saving anything'
+        )
+        parser.add_argument(
+            '--report',
+            type=str,
+            help='Write the full JSON report to this path'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_path'], encoding='utf-8-sig', newline='') as csv_file:
+                report = import_students_csv(
+                    csv_file,
+                    chunk_size=options['chunk_size'],
+                    dry_run=options['dry_run']
+                )
+        except OSError as e:
+            raise CommandError(f'Cannot read {options["csv_path"]}: {e}')
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise CommandError(f'{options["csv_path"]} is not a UTF-8 encoded CSV: {e}')
+
+        for error in report['errors']:
+            self.stdout.write(
+                self.style.ERROR(f'  line {error["line"]} ({error["student_id"]}): {error["error"]}')
+            )
+        for warning in report['warnings']:
+            self.stdout.write(
+                self.style.WARNING(f'  line {warning["line"]} ({warning["student_id"]}): {warning["warning"]}')
+            )
+
+        if options['report']:
+            with open(options['report'], 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+
+        if report['stopped_at_line']:
+            self.stdout.write(
+                self.style.ERROR(f'Stopped reading at line {report["stopped_at_line"]}; later rows were not imported')
+            )
+
+        prefix = 'DRY RUN: would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{prefix} {report["created"]} of {report["total_rows"]} students '
+                f'({report["enrollments_created"]} enrollments, {report["parent_links_created"]} parent links, '
+                f'{report["failed"]} failed)'
+            )
+        )
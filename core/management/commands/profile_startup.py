@@ -0,0 +1,137 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.accounts.authentication import tokens_for_user
+from core.models import User
+
+# Loads what a worker loads before serving: settings, apps and the URLconf
+IMPORT_PROBE = 'import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns'
+
+# Runs in a fresh interpreter so the first request pays the same lazy imports a new worker would
+REQUEST_PROBE = '''
+import json, sys, time
+options = json.loads(sys.argv[1])
+started = time.perf_counter()
+import django
+django.setup()
+from django.conf import settings
+settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+result = {'setup_ms': (time.perf_counter() - started) * 1000}
+if options['warm']:
+    from core.warmup import warm_up
+    result['warm_up_ms'] = sum(warm_up().values())
+from django.test import Client
+client = Client(**({'HTTP_AUTHORIZATION': 'Bearer ' + options['token']} if options['token'] else {}))
+for key in ('first_ms', 'second_ms'):
+    started = time.perf_counter()
+    result['status'] = client.get(options['route']).status_code
+    result[key] = (time.perf_counter() - started) * 1000
+print(json.dumps(result))
+'''
+
+
+def default_routes():
+    return [
+        '/api/v1/simple-newsfeed/stories/',
+        reverse('v1_auth:announcements'),
+        reverse('v1_auth:unread_message_count'),
+        reverse('schema-json', kwargs={'format': '.json'}),
+    ]
+
+
+def parse_importtime(stderr):
+    """[(cumulative microseconds, module)] from `python -X importtime` output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), module.strip()))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Report module import times and first-request latency per route in a freshly started process'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=25,
+            help='Slowest top-level imports to list (default: 25; 0 to skip)'
+        )
+        parser.add_argument(
+            '--route',
+            action='append',
+            help='Path to time (repeatable; default: feeds, unread count and the API schema)'
+        )
+        parser.add_argument(
+            '--user',
+            help='Email of a user to authenticate the route requests as'
+        )
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Run the core.warmup hook before the first request'
+        )
+        parser.add_argument(
+            '--skip-routes',
+            action='store_true',
+            help='Only report import times'
+        )
+
+    def _run(self, args):
+        return subprocess.run(
+            [sys.executable, *args], cwd=settings.BASE_DIR, env=os.environ.copy(),
+            capture_output=True, text=True
+        )
+
+    def handle(self, *args, **options):
+        if options['top']:
+            self._report_imports(options['top'])
+        if not options['skip_routes']:
+            self._report_routes(options)
+        self.stdout.write(self.style.SUCCESS('Startup profile complete'))
+
+    def _report_imports(self, top):
+        result = self._run(['-X', 'importtime', '-c', IMPORT_PROBE])
+        if result.returncode:
+            raise CommandError(f'Import probe failed:\n{result.stderr[-2000:]}')
+        rows = parse_importtime(result.stderr)
+        # Top-level packages only, so nested imports aren't counted twice
+        top_level = {}
+        for cumulative, module in rows:
+            package = module.split('.')[0]
+            top_level[package] = max(top_level.get(package, 0), cumulative)
+        self.stdout.write(f'Import time by package ({sum(top_level.values()) / 1000:.1f} ms total):')
+        for package, cumulative in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:top]:
+            self.stdout.write(f'  {cumulative / 1000:8.1f} ms  {package}')
+
+    def _report_routes(self, options):
+        token = ''
+        if options['user']:
+            user = User.objects.filter(email=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user with email {options['user']}")
+            token = str(tokens_for_user(user).access_token)
+
+        mode = 'with warm-up' if options['warm'] else 'cold'
+        self.stdout.write(f'First request per route ({mode}, new process each):')
+        for route in options['route'] or default_routes():
+            probe = json.dumps({'route': route, 'token': token, 'warm': options['warm']})
+            result = self._run(['-c', REQUEST_PROBE, probe])
+            if result.returncode:
+                self.stdout.write(self.style.WARNING(f'  {route}: probe failed: {result.stderr.strip().splitlines()[-1]}'))
+                continue
+            timing = json.loads(result.stdout.strip().splitlines()[-1])
+            warm_up = f", warm-up {timing['warm_up_ms']:.1f} ms" if 'warm_up_ms' in timing else ''
+            self.stdout.write(
+                f"  {route}  HTTP {timing['status']}  first {timing['first_ms']:.1f} ms, "
+                f"second {timing['second_ms']:.1f} ms (setup {timing['setup_ms']:.1f} ms{warm_up})"
+            )
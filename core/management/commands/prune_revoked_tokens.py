@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.accounts.token_blacklist import prune_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete revoked refresh tokens that have expired in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count expired entries without deleting them'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per query (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        count = prune_expired(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        prefix = 'DRY RUN: would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{prefix} {count} expired revoked tokens'))
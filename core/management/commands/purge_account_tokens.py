@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import AccountToken
+
+
+class Command(BaseCommand):
+    help = 'Delete used and expired email verification and password reset tokens in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count the tokens that would be deleted without deleting them'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per query (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        stale = AccountToken.objects.filter(Q(is_used=True) | Q(expires_at__lt=timezone.now()))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'DRY RUN: would delete {stale.count()} tokens'))
+            return
+
+        deleted = 0
+        while True:
+            ids = list(stale.values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += AccountToken.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} used or expired tokens'))
@@ -0,0 +1,59 @@
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.log_archive import ARCHIVED_MODELS, search_archive
+
+
+class Command(BaseCommand):
+    help = 'Search archived audit, download and session logs without loading them back into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(ARCHIVED_MODELS))
+        parser.add_argument('--from', dest='start', help='First day to scan (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', help='Last day to scan (YYYY-MM-DD)')
+        parser.add_argument('--user-id', type=int, help='Only rows for this user')
+        parser.add_argument(
+            '--field',
+            action='append',
+            default=[],
+            metavar='NAME=VALUE',
+            help='Exact match on a column, e.g. action=delete (repeatable)'
+        )
+        parser.add_argument('--contains', help='Case-insensitive text anywhere in the row')
+        parser.add_argument('--limit', type=int, help='Stop after this many matches')
+
+    def _parse_day(self, value, option):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'{option} must be a date in YYYY-MM-DD format')
+
+    def handle(self, *args, **options):
+        match = {}
+        if options['user_id'] is not None:
+            match['user_id'] = options['user_id']
+        for condition in options['field']:
+            name, sep, value = condition.partition('=')
+            if not sep:
+                raise CommandError(f'--field expects NAME=VALUE, got "{condition}"')
+            match[name] = value
+
+        rows = search_archive(
+            options['table'],
+            start=self._parse_day(options['start'], '--from'),
+            end=self._parse_day(options['end'], '--to'),
+            match=match,
+            contains=options['contains'],
+        )
+
+        found = 0
+        for row in rows:
+            self.stdout.write(json.dumps(row))
+            found += 1
+            if options['limit'] and found >= options['limit']:
+                break
+        self.stderr.write(f'{found} matching rows')
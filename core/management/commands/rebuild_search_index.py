@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from core.accounts.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the student, class and teacher search index'
+
+    def handle(self, *args, **options):
+        total = rebuild_search_index()
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {total} search documents')
+        )
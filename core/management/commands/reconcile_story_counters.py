@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Story, StoryComment, StoryLike
+from core.simple_story_models import SimpleStory, SimpleStoryComment, SimpleStoryLike
+from core.story_counters import reconcile_counts
+
+COUNTED_MODELS = [
+    (Story, StoryLike, StoryComment),
+    (SimpleStory, SimpleStoryLike, SimpleStoryComment),
+]
+
+
+class Command(BaseCommand):
+    help = 'Recount story likes_count / comments_count where they drifted from the like and comment tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Stories compared per query (default: 500)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count the stories with wrong counters without fixing them'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, like_model, comment_model in COUNTED_MODELS:
+            count = reconcile_counts(
+                model, like_model, comment_model,
+                batch_size=options['batch_size'], dry_run=options['dry_run']
+            )
+            total += count
+            self.stdout.write(f'  {model.__name__}: {count} stories with drifted counters')
+
+        prefix = 'DRY RUN: would fix' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{prefix} counters on {total} stories'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from core.audit_buffer import rejected_path, replay_spool, spool_path
+
+
+class Command(BaseCommand):
+    help = 'Load audit and download log entries spooled while the database was unavailable'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows inserted per transaction (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        loaded, requeued, rejected = replay_spool(batch_size=options['batch_size'])
+
+        if rejected:
+            self.stdout.write(
+                self.style.WARNING(f'{rejected} entries were refused by the database and moved to {rejected_path()}')
+            )
+        if requeued:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Loaded {loaded} entries; {requeued} could not be written and were returned to {spool_path()}'
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Loaded {loaded} spooled entries'))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from core.media_gc import sweep_media
+
+
+class Command(BaseCommand):
+    help = 'Remove deleted, unreferenced and orphaned story media files and report the space reclaimed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be removed without deleting anything'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Files checked against the database per query batch (default: 500)'
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            help='Keep media of soft-deleted stories this long (default: MEDIA_DELETED_STORY_RETENTION_DAYS)'
+        )
+        parser.add_argument(
+            '--skip-orphans',
+            action='store_true',
+            help='Skip walking the media directories for unreferenced files'
+        )
+
+    def handle(self, *args, **options):
+        report = sweep_media(
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+            retention_days=options['retention_days'],
+            orphans=not options['skip_orphans'],
+        )
+
+        for kind in sorted(report.counts):
+            self.stdout.write(
+                f'  {kind}: {report.counts[kind]} files, {report.bytes[kind] / (1024 * 1024):.1f}MB'
+            )
+
+        prefix = 'DRY RUN: would reclaim' if options['dry_run'] else 'Reclaimed'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{prefix} {report.total_bytes} bytes ({report.total_bytes / (1024 * 1024):.1f}MB) '
+                f'from {report.total_files} files'
+            )
+        )
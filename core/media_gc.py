@@ -0,0 +1,236 @@
+import logging
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import MediaBlob, MediaDeletion, StoryAttachment, UploadSession
+from core.media_storage import BLOB_DIR, TMP_DIR, release_blob, upload_temp_path
+from core.media_variants import variant_paths
+from core.simple_story_models import SimpleStoryAttachment
+
+logger = logging.getLogger(__name__)
+
+# <sha256>, <sha256>.ext or <sha256>_<variant>.jpg
+BLOB_NAME_RE = re.compile(r'^([0-9a-f]{64})(?:_[a-z]+)?(?:\.\w+)?$')
+UPLOAD_TEMP_RE = re.compile(r'^upload-([0-9a-f]{32})')
+
+# Only directories written by story attachments are swept for orphans
+SWEPT_DIRS = ('stories', BLOB_DIR)
+
+
+class MediaSweepReport:
+    """What a sweep removed (or would remove in a dry run), by source"""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.counts = {}
+        self.bytes = {}
+        # A dry run leaves files in place; don't count one twice across steps
+        self.seen = set()
+
+    def add(self, kind, size):
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        self.bytes[kind] = self.bytes.get(kind, 0) + size
+
+    @property
+    def total_bytes(self):
+        return sum(self.bytes.values())
+
+    @property
+    def total_files(self):
+        return sum(self.counts.values())
+
+
+def _grace_cutoff():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'MEDIA_GC_GRACE_PERIOD', 60 * 60))
+
+
+def _remove(relative_path, kind, report):
+    """Delete a file under MEDIA_ROOT and record its size; missing files count as nothing"""
+    if relative_path in report.seen:
+        return
+    path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    try:
+        size = os.path.getsize(path)
+        if not report.dry_run:
+            os.remove(path)
+    except FileNotFoundError:
+        return
+    except OSError as e:
+        logger.error(f"Failed to delete media file {relative_path}: {str(e)}")
+        return
+    report.seen.add(relative_path)
+    report.add(kind, size)
+
+
+def process_deletion_queue(report, batch_size=500):
+    """Remove files queued by attachment deletes"""
+    last_id = 0
+    while True:
+        batch = list(MediaDeletion.objects.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not batch:
+            return
+        last_id = batch[-1].id
+        for deletion in batch:
+            _remove(deletion.file_path, 'queued', report)
+        if not report.dry_run:
+            MediaDeletion.objects.filter(id__in=[d.id for d in batch]).delete()
+
+
+def purge_deleted_stories(report, retention_days):
+    """
+    Drop attachments of stories soft-deleted more than retention_days ago.
+    Their blobs lose a reference and are collected by collect_unreferenced_blobs.
+    """
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    for model in (StoryAttachment, SimpleStoryAttachment):
+        stale = model.objects.filter(story__is_active=False, story__updated_at__lt=cutoff)
+        if report.dry_run:
+            for size in stale.values_list('file_size', flat=True):
+                report.add('deleted_stories', size)
+            continue
+        # Per-object delete so post_delete releases blobs / queues legacy files
+        for attachment in stale.iterator():
+            with transaction.atomic():
+                attachment.delete()
+
+
+def expire_upload_sessions(report):
+    """Release abandoned resumable uploads and their partial files"""
+    now = timezone.now()
+    expired = UploadSession.objects.filter(expires_at__lt=now).exclude(status='attached')
+    for session in expired.iterator():
+        if session.status == 'uploading':
+            _remove(os.path.relpath(upload_temp_path(session), settings.MEDIA_ROOT), 'expired_uploads', report)
+        if report.dry_run:
+            continue
+        with transaction.atomic():
+            if session.status == 'complete':
+                # Completed but never attached: the session's reference is the only one it owns
+                release_blob(session.blob_id)
+            session.delete()
+
+
+def collect_unreferenced_blobs(report, batch_size=500):
+    """Delete blobs whose last reference was dropped before the grace period"""
+    cutoff = _grace_cutoff()
+    candidates = MediaBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).order_by('id')
+    last_id = 0
+    while True:
+        ids = list(candidates.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        last_id = ids[-1]
+        for blob_id in ids:
+            with transaction.atomic():
+                # Lock so a concurrent repost either revives the row first or recreates it after
+                blob = MediaBlob.objects.select_for_update().filter(
+                    pk=blob_id, ref_count=0, updated_at__lt=cutoff
+                ).first()
+                if blob is None:
+                    continue
+                referenced = (
+                    blob.story_attachments.exists() or blob.simple_story_attachments.exists()
+                    or blob.upload_sessions.exclude(status='attached').exists()
+                )
+                if referenced:
+                    logger.error(f"Media blob {blob.sha256} has ref_count 0 but is still referenced")
+                    continue
+                for relative_path in [blob.file_path] + variant_paths(blob):
+                    _remove(relative_path, 'unreferenced_blobs', report)
+                if not report.dry_run:
+                    blob.upload_sessions.all().delete()
+                    blob.delete()
+
+
+def _referenced_paths(relative_paths):
+    """Subset of relative_paths that the database still points at (a few queries per batch)"""
+    referenced = set()
+    blob_hashes = {}
+    other_paths = []
+    upload_ids = {}
+    for path in relative_paths:
+        name = os.path.basename(path)
+        if path.startswith(TMP_DIR + os.sep):
+            match = UPLOAD_TEMP_RE.match(name)
+            if match:
+                upload_ids.setdefault(match.group(1), []).append(path)
+            continue
+        match = BLOB_NAME_RE.match(name)
+        if path.startswith(BLOB_DIR + os.sep) and match:
+            blob_hashes.setdefault(match.group(1), []).append(path)
+        else:
+            other_paths.append(path)
+
+    if blob_hashes:
+        for sha256 in MediaBlob.objects.filter(sha256__in=blob_hashes).values_list('sha256', flat=True):
+            referenced.update(blob_hashes[sha256])
+
+    if upload_ids:
+        active = UploadSession.objects.filter(
+            id__in=list(upload_ids), status='uploading', expires_at__gte=timezone.now()
+        ).values_list('id', flat=True)
+        for upload_id in active:
+            referenced.update(upload_ids[upload_id.hex])
+
+    if other_paths:
+        url_paths = [p.replace(os.sep, '/') for p in other_paths]
+        referenced.update(
+            SimpleStoryAttachment.objects.filter(file__in=url_paths).values_list('file', flat=True)
+        )
+        urls = {f"{settings.MEDIA_URL}{p}": p for p in url_paths}
+        for url in StoryAttachment.objects.filter(file_url__in=list(urls)).values_list('file_url', flat=True):
+            referenced.add(urls[url])
+        referenced = {p.replace('/', os.sep) for p in referenced}
+    return referenced
+
+
+def sweep_orphan_files(report, batch_size=500):
+    """
+    Walk the story media directories and remove files no attachment, blob
+    or live upload refers to. Files younger than the grace period are left alone so
+    in-flight uploads are never touched.
+    """
+    cutoff = _grace_cutoff().timestamp()
+    batch = []
+
+    def flush():
+        referenced = _referenced_paths(batch)
+        for path in batch:
+            if path not in referenced:
+                _remove(path, 'orphans', report)
+        batch.clear()
+
+    for directory in SWEPT_DIRS:
+        for root, dirs, files in os.walk(os.path.join(settings.MEDIA_ROOT, directory)):
+            for name in files:
+                full_path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(full_path) >= cutoff:
+                        continue
+                except OSError:
+                    continue
+                batch.append(os.path.relpath(full_path, settings.MEDIA_ROOT))
+                if len(batch) >= batch_size:
+                    flush()
+    if batch:
+        flush()
+
+
+def sweep_media(dry_run=False, batch_size=500, retention_days=None, orphans=True):
+    """Run every collection step and return a MediaSweepReport"""
+    report = MediaSweepReport(dry_run=dry_run)
+    if retention_days is None:
+        retention_days = getattr(settings, 'MEDIA_DELETED_STORY_RETENTION_DAYS', 30)
+
+    purge_deleted_stories(report, retention_days)
+    expire_upload_sessions(report)
+    process_deletion_queue(report, batch_size)
+    collect_unreferenced_blobs(report, batch_size)
+    if orphans:
+        sweep_orphan_files(report, batch_size)
+    return report
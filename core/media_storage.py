@@ -0,0 +1,144 @@
+import hashlib
+import mimetypes
+import os
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import MediaBlob, MediaDeletion
+from core.media_variants import schedule_variants
+
+BLOB_DIR = 'blobs'
+TMP_DIR = os.path.join(BLOB_DIR, 'tmp')
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Image types that get thumbnail/medium variants; SVG cannot be rasterized by Pillow
+VARIANT_MIME_TYPES = {'image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/bmp', 'image/tiff'}
+
+
+def _absolute(relative_path):
+    return os.path.join(settings.MEDIA_ROOT, relative_path)
+
+
+def clean_extension(filename):
+    ext = os.path.splitext(filename or '')[1].lower()
+    if len(ext) > 10 or not ext[1:].isalnum():
+        return ''
+    return ext
+
+
+def blob_relative_path(sha256, ext=''):
+    """blobs/ab/cd/abcd...ef.jpg - two fan-out levels keep directories small"""
+    return os.path.join(BLOB_DIR, sha256[:2], sha256[2:4], f"{sha256}{ext}")
+
+
+def upload_temp_path(session):
+    """Partial file of a resumable upload; kept under the temp dir, which is never served"""
+    return os.path.join(
+        settings.MEDIA_ROOT, TMP_DIR, f"upload-{session.id.hex}{clean_extension(session.file_name)}"
+    )
+
+
+def blob_url(blob):
+    return f"{settings.MEDIA_URL}{blob.file_path.replace(os.sep, '/')}"
+
+
+def _commit_blob(temp_path, sha256, size, ext, mime_type):
+    """
+    Move a fully written temp file into the blob store (or drop it if the
+    content is already stored) and take one reference on the blob.
+    """
+    while True:
+        blob = MediaBlob.objects.filter(sha256=sha256).first()
+        if blob is None:
+            relative_path = blob_relative_path(sha256, ext)
+            final_path = _absolute(relative_path)
+            if os.path.exists(temp_path):
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                # Atomic on the same filesystem; identical content makes a concurrent replace harmless
+                os.replace(temp_path, final_path)
+            elif not os.path.exists(final_path):
+                # Moved on an earlier pass, then removed with a concurrent upload's released blob
+                raise FileNotFoundError(f'Content {sha256} was removed before it could be stored')
+            try:
+                with transaction.atomic():
+                    blob = MediaBlob.objects.create(
+                        sha256=sha256, file_path=relative_path, size=size,
+                        mime_type=mime_type or '', ref_count=1,
+                        variants_status=(
+                            MediaBlob.VARIANTS_PENDING if mime_type in VARIANT_MIME_TYPES
+                            else MediaBlob.VARIANTS_NONE
+                        )
+                    )
+                schedule_variants(blob)
+                return blob
+            except IntegrityError:
+                # Another upload of the same content won the insert; reference theirs
+                continue
+
+        if MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1, updated_at=timezone.now()):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            blob.ref_count += 1
+            return blob
+        # The blob was released and deleted between the lookup and the update
+
+
+def store_upload(uploaded_file, mime_type=None):
+    """
+    Stream an uploaded file to disk, hashing it on the way, and return the
+    MediaBlob holding its content with one reference taken for the caller.
+    """
+    temp_dir = _absolute(TMP_DIR)
+    os.makedirs(temp_dir, exist_ok=True)
+    temp_path = os.path.join(temp_dir, uuid.uuid4().hex)
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, 'wb') as destination:
+            for chunk in uploaded_file.chunks():
+                digest.update(chunk)
+                size += len(chunk)
+                destination.write(chunk)
+        return _commit_blob(
+            temp_path, digest.hexdigest(), size,
+            clean_extension(uploaded_file.name),
+            mime_type or getattr(uploaded_file, 'content_type', '')
+        )
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def store_local_file(path, mime_type=''):
+    """Move an existing file under MEDIA_ROOT into the blob store"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    mime_type = mime_type or mimetypes.guess_type(path)[0] or ''
+    return _commit_blob(path, digest.hexdigest(), size, clean_extension(path), mime_type)
+
+
+def release_blob(blob_id):
+    """
+    Drop one reference. Unreferenced blobs are not deleted here; they are
+    removed by `manage.py sweep_media` once MEDIA_GC_GRACE_PERIOD has passed,
+    so a repost in the meantime simply revives the blob.
+    """
+    if blob_id is None:
+        return
+    MediaBlob.objects.filter(pk=blob_id, ref_count__gt=0).update(
+        ref_count=F('ref_count') - 1, updated_at=timezone.now()
+    )
+
+
+def queue_file_deletion(relative_path):
+    """Record a non-blob media file for removal outside the request"""
+    MediaDeletion.objects.create(file_path=relative_path)
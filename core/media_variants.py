@@ -0,0 +1,135 @@
+import logging
+import os
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from core.models import MediaBlob
+
+logger = logging.getLogger(__name__)
+
+# Long edge in pixels for each derived variant
+DEFAULT_VARIANT_SIZES = {
+    'thumbnail': 320,
+    'medium': 1280,
+}
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _variant_sizes():
+    return getattr(settings, 'IMAGE_VARIANT_SIZES', DEFAULT_VARIANT_SIZES)
+
+
+def _quality():
+    return getattr(settings, 'IMAGE_VARIANT_QUALITY', 80)
+
+
+def variant_relative_path(blob, name):
+    base = os.path.splitext(blob.file_path)[0]
+    return f"{base}_{name}.jpg"
+
+
+def variant_paths(blob):
+    """Relative paths of any variants that may exist for a blob"""
+    if blob.variants_status == MediaBlob.VARIANTS_NONE:
+        return []
+    return [variant_relative_path(blob, name) for name in _variant_sizes()]
+
+
+def variant_url(blob, name):
+    """URL of a ready variant, or None while it is pending or not an image"""
+    if blob is None or blob.variants_status != MediaBlob.VARIANTS_READY:
+        return None
+    return f"{settings.MEDIA_URL}{variant_relative_path(blob, name).replace(os.sep, '/')}"
+
+
+def _to_rgb(image):
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def generate_variants(blob):
+    """
+    Write a recompressed JPEG per size in IMAGE_VARIANT_SIZES next to the
+    blob. Orientation is applied from EXIF and the metadata is dropped.
+    """
+    source_path = os.path.join(settings.MEDIA_ROOT, blob.file_path)
+    sizes = _variant_sizes()
+    largest = max(sizes.values())
+
+    with Image.open(source_path) as image:
+        # Let the JPEG decoder downscale while reading; much cheaper for phone photos
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        image = _to_rgb(image)
+
+        # Largest first so each smaller variant resizes the previous result
+        for name, size in sorted(sizes.items(), key=lambda item: -item[1]):
+            image.thumbnail((size, size), Image.LANCZOS)
+            target = os.path.join(settings.MEDIA_ROOT, variant_relative_path(blob, name))
+            temp_target = f"{target}.tmp"
+            # No exif argument, so no metadata (GPS, camera serials) is written
+            image.save(temp_target, 'JPEG', quality=_quality(), optimize=True, progressive=True)
+            os.replace(temp_target, target)
+
+
+def process_blob(blob_id):
+    blob = MediaBlob.objects.filter(pk=blob_id).first()
+    if blob is None or blob.variants_status != MediaBlob.VARIANTS_PENDING:
+        return
+    try:
+        generate_variants(blob)
+        status = MediaBlob.VARIANTS_READY
+    except Exception as e:
+        logger.error(f"Failed to generate image variants for blob {blob.sha256}: {str(e)}")
+        status = MediaBlob.VARIANTS_FAILED
+    MediaBlob.objects.filter(pk=blob_id).update(variants_status=status)
+
+
+def _run_worker():
+    while True:
+        blob_id = _queue.get()
+        try:
+            process_blob(blob_id)
+        except Exception as e:
+            logger.error(f"Image variant worker error for blob {blob_id}: {str(e)}")
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name='image-variants', daemon=True)
+            _worker.start()
+
+
+def schedule_variants(blob):
+    """
+    Queue variant generation for an image blob once the current transaction
+    commits. Anything lost on a restart is picked up by
+    `manage.py generate_image_variants`.
+    """
+    if blob.variants_status != MediaBlob.VARIANTS_PENDING:
+        return
+
+    def enqueue():
+        if getattr(settings, 'IMAGE_VARIANTS_ASYNC', True):
+            _ensure_worker()
+            _queue.put(blob.pk)
+        else:
+            process_blob(blob.pk)
+
+    transaction.on_commit(enqueue)
@@ -0,0 +1,149 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+
+from core.media_storage import BLOB_DIR, TMP_DIR
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_CHUNK_SIZE = 64 * 1024
+# Blob names contain the SHA-256 of their content, so they never change
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Directories under MEDIA_ROOT that hold partial files and must never be served
+PRIVATE_MEDIA_DIRS = (TMP_DIR,)
+
+
+def _serve_mode():
+    return getattr(settings, 'MEDIA_SERVE_MODE', 'django')
+
+
+def _etag(relative_path, stat):
+    if relative_path.startswith(BLOB_DIR + '/'):
+        # Content hash plus variant suffix, e.g. "<sha256>_thumbnail"
+        name = os.path.splitext(os.path.basename(relative_path))[0]
+        return f'"{name}"'
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _cache_control(relative_path):
+    if relative_path.startswith(BLOB_DIR + '/'):
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 24 * 60 * 60)}"
+
+
+def _parse_range(header, size):
+    """
+    Return (start, end) inclusive for a single byte range, None to serve the
+    whole file (no/unsupported header) or 'invalid' when unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        # Multiple ranges are allowed to be answered with the full body
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return 'invalid'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'invalid'
+    return start, end
+
+
+def _file_range_iterator(path, start, length):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = source.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve uploaded media with Range, ETag and cache headers.
+
+    MEDIA_SERVE_MODE 'x-sendfile' (Apache mod_xsendfile) or 'x-accel-redirect'
+    (nginx, under MEDIA_ACCEL_REDIRECT_PREFIX) hands the transfer, including
+    ranges, to the web server so no Python worker is held while bytes stream.
+    """
+    path = path.lstrip('/')
+    if any(path == d or path.startswith(d + '/') for d in PRIVATE_MEDIA_DIRS):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    stat = os.stat(full_path)
+    etag = _etag(path, stat)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = _cache_control(path)
+        return response
+
+    mode = _serve_mode()
+    if mode in ('x-sendfile', 'x-accel-redirect'):
+        response = HttpResponse(content_type=content_type)
+        if mode == 'x-sendfile':
+            response['X-Sendfile'] = full_path
+        else:
+            prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + path
+    else:
+        byte_range = None
+        if_range = request.headers.get('If-Range')
+        # A stale If-Range validator means the client must get the whole new file
+        if not if_range or if_range.strip() == etag:
+            byte_range = _parse_range(request.headers.get('Range'), stat.st_size)
+
+        if byte_range == 'invalid':
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            response['Accept-Ranges'] = 'bytes'
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _file_range_iterator(full_path, start, length),
+                status=206, content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = str(length)
+        else:
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+            response['Content-Length'] = str(stat.st_size)
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = _cache_control(path)
+    return response
@@ -1,6 +1,20 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
 from django.views.decorators.csrf import csrf_exempt
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+# Media, archives and the event stream are left alone
+COMPRESSIBLE_CONTENT_TYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
 
 class DisableCSRFForAPIMiddleware(MiddlewareMixin):
     """Disable CSRF protection for API endpoints"""
@@ -8,4 +22,39 @@ class DisableCSRFForAPIMiddleware(MiddlewareMixin):
     def process_view(self, request, view_func, view_args, view_kwargs):
         if request.path.startswith('/api/'):
             setattr(view_func, 'csrf_exempt', True)
-        return None
\ No newline at end of file
+        return None
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress API and page responses of at least RESPONSE_COMPRESSION_MIN_SIZE
+    bytes: brotli for clients that accept it when the brotli package is
+    installed, gzip otherwise. Streaming responses (notification streams,
+    media downloads) and binary content types are passed through untouched.
+    """
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith(COMPRESSIBLE_CONTENT_TYPES)
+            or len(response.content) < getattr(settings, 'RESPONSE_COMPRESSION_MIN_SIZE', 1024)
+        ):
+            return response
+
+        if brotli is None or not re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed_content = brotli.compress(
+            response.content, quality=getattr(settings, 'RESPONSE_BROTLI_QUALITY', 5)
+        )
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers['Content-Length'] = str(len(response.content))
+        # A strong ETag must not survive a change of encoding, as in GZipMiddleware
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:12
+
+from django.db import migrations, models
+
+
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE search_documents_fts USING fts5(
+        title, body, content='search_documents', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER search_documents_ai AFTER INSERT ON search_documents BEGIN
+        INSERT INTO search_documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER search_documents_ad AFTER DELETE ON search_documents BEGIN
+        INSERT INTO search_documents_fts(search_documents_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER search_documents_au AFTER UPDATE ON search_documents BEGIN
+        INSERT INTO search_documents_fts(search_documents_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO search_documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS search_documents_au",
+    "DROP TRIGGER IF EXISTS search_documents_ad",
+    "DROP TRIGGER IF EXISTS search_documents_ai",
+    "DROP TABLE IF EXISTS search_documents_fts",
+]
+
+MYSQL_FORWARD = ["ALTER TABLE search_documents ADD FULLTEXT INDEX search_documents_ft (title, body)"]
+MYSQL_REVERSE = ["ALTER TABLE search_documents DROP INDEX search_documents_ft"]
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_FORWARD, 'mysql': MYSQL_FORWARD}.get(vendor, [])
+    for statement in statements:
+        try:
+            schema_editor.execute(statement)
+        except Exception:
+            # SQLite builds without FTS5 fall back to scanning search_documents
+            if vendor != 'sqlite':
+                raise
+            return
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for statement in {'sqlite': SQLITE_REVERSE, 'mysql': MYSQL_REVERSE}.get(vendor, []):
+        schema_editor.execute(statement)
+
+
+def populate_search_documents(apps, schema_editor):
+    SearchDocument = apps.get_model('core', 'SearchDocument')
+    Student = apps.get_model('core', 'Student')
+    Class = apps.get_model('core', 'Class')
+    Teacher = apps.get_model('core', 'Teacher')
+
+    documents = []
+    for student in Student.objects.all():
+        documents.append(SearchDocument(
+            entity_type='student', entity_id=student.pk,
+            title=student.student_name, subtitle=student.student_id,
+            body=f"{student.student_name} {student.student_id}",
+            is_active=student.is_active,
+        ))
+    for class_obj in Class.objects.all():
+        documents.append(SearchDocument(
+            entity_type='class', entity_id=class_obj.pk,
+            title=class_obj.class_name, subtitle=class_obj.class_code,
+            body=f"{class_obj.class_name} {class_obj.class_code} {class_obj.age_group}",
+            is_active=class_obj.is_active,
+        ))
+    for teacher in Teacher.objects.select_related('user'):
+        user = teacher.user
+        documents.append(SearchDocument(
+            entity_type='teacher', entity_id=teacher.pk,
+            title=f"{user.first_name} {user.last_name}".strip() or user.email,
+            subtitle=teacher.employee_id,
+            body=f"{user.first_name} {user.last_name} {user.email} {teacher.employee_id}",
+            is_active=teacher.is_active,
+        ))
+    SearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_simplestory_simplestoryattachment_simplestorycomment_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('student', 'Student'), ('class', 'Class'), ('teacher', 'Teacher')], max_length=20)),
+                ('entity_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('subtitle', models.CharField(blank=True, max_length=255)),
+                ('body', models.TextField(blank=True, help_text='Searchable text (names, codes, email)')),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'search_documents',
+                'unique_together': {('entity_type', 'entity_id')},
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_search_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file_path', models.CharField(help_text='Path relative to MEDIA_ROOT', max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='File size in bytes')),
+                ('mime_type', models.CharField(blank=True, max_length=100)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'media_blobs',
+            },
+        ),
+        migrations.AddField(
+            model_name='simplestoryattachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='simple_story_attachments', to='core.mediablob'),
+        ),
+        migrations.AddField(
+            model_name='storyattachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='story_attachments', to='core.mediablob'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:21
+
+from django.db import migrations, models
+
+IMAGE_MIME_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/bmp', 'image/tiff']
+
+
+def mark_existing_images_pending(apps, schema_editor):
+    """Existing image blobs get variants from `manage.py generate_image_variants`"""
+    MediaBlob = apps.get_model('core', 'MediaBlob')
+    MediaBlob.objects.filter(mime_type__in=IMAGE_MIME_TYPES).update(variants_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_media_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='variants_status',
+            field=models.CharField(choices=[('none', 'Not an image'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='none', help_text='Thumbnail/medium image variants (see core/media_variants.py)', max_length=10),
+        ),
+        migrations.RunPython(mark_existing_images_pending, migrations.RunPython.noop),
+    ]
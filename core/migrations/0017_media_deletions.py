@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(help_text='Path relative to MEDIA_ROOT', max_length=255)),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'media_deletions',
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import datetime
+import hashlib
+
+
+def copy_outstanding_tokens(apps, schema_editor):
+    """Keep links from emails sent before the upgrade working until they expire"""
+    User = apps.get_model('core', 'User')
+    AccountToken = apps.get_model('core', 'AccountToken')
+    now = timezone.now()
+    tokens = []
+
+    pending_verification = User.objects.filter(
+        is_email_verified=False, email_verification_token__isnull=False,
+        email_verification_sent_at__gt=now - datetime.timedelta(hours=24)
+    ).values_list('id', 'email_verification_token', 'email_verification_sent_at')
+    for user_id, token, sent_at in pending_verification.iterator():
+        tokens.append(AccountToken(
+            user_id=user_id, purpose='email_verification',
+            token_hash=hashlib.sha256(str(token).encode()).hexdigest(),
+            expires_at=sent_at + datetime.timedelta(hours=24)
+        ))
+
+    pending_reset = User.objects.filter(
+        is_active=True, password_reset_token__isnull=False,
+        password_reset_sent_at__gt=now - datetime.timedelta(hours=1)
+    ).values_list('id', 'password_reset_token', 'password_reset_sent_at')
+    for user_id, token, sent_at in pending_reset.iterator():
+        tokens.append(AccountToken(
+            user_id=user_id, purpose='password_reset',
+            token_hash=hashlib.sha256(str(token).encode()).hexdigest(),
+            expires_at=sent_at + datetime.timedelta(hours=1)
+        ))
+
+    AccountToken.objects.bulk_create(tokens, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_revoked_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purpose', models.CharField(choices=[('email_verification', 'Email verification'), ('password_reset', 'Password reset')], max_length=20)),
+                ('token_hash', models.CharField(max_length=64, unique=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('is_used', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='account_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'account_tokens',
+                'indexes': [models.Index(fields=['user', 'purpose'], name='account_tok_user_id_1607d3_idx')],
+            },
+        ),
+        migrations.RunPython(copy_outstanding_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='user',
+            name='email_verification_token',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='password_reset_sent_at',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='password_reset_token',
+        ),
+    ]
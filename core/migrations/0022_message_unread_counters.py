@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:45
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def merge_duplicate_threads(apps, schema_editor):
+    """
+    Put the lower user id in participant1 and fold threads left for the same
+    pair into the most recently active one, so the unique constraint can be added
+    """
+    MessageThread = apps.get_model('core', 'MessageThread')
+    Message = apps.get_model('core', 'Message')
+    for thread in MessageThread.objects.filter(participant1_user_id__gt=F('participant2_user_id')).iterator():
+        MessageThread.objects.filter(pk=thread.pk).update(
+            participant1_user_id=thread.participant2_user_id,
+            participant2_user_id=thread.participant1_user_id,
+            participant1_type=thread.participant2_type,
+            participant2_type=thread.participant1_type,
+        )
+
+    pairs = (
+        MessageThread.objects.values('participant1_user_id', 'participant2_user_id')
+        .annotate(threads=Count('id')).filter(threads__gt=1)
+    )
+    for pair in list(pairs):
+        threads = list(
+            MessageThread.objects.filter(
+                participant1_user_id=pair['participant1_user_id'],
+                participant2_user_id=pair['participant2_user_id'],
+            ).order_by(F('last_message_at').desc(nulls_last=True), '-id')
+        )
+        kept, duplicates = threads[0], [thread.pk for thread in threads[1:]]
+        Message.objects.filter(thread_id__in=duplicates).update(thread_id=kept.pk)
+        MessageThread.objects.filter(pk__in=duplicates).delete()
+
+
+def count_unread_messages(apps, schema_editor):
+    """Fill the counters from messages sent before they were maintained"""
+    MessageThread = apps.get_model('core', 'MessageThread')
+    Message = apps.get_model('core', 'Message')
+    unread = Message.objects.filter(is_read=False).values('thread_id', 'recipient_user_id').annotate(total=Count('id'))
+    for row in unread.iterator():
+        thread = MessageThread.objects.filter(pk=row['thread_id']).values('participant1_user_id').first()
+        field = 'participant1_unread_count' if thread['participant1_user_id'] == row['recipient_user_id'] else 'participant2_unread_count'
+        MessageThread.objects.filter(pk=row['thread_id']).update(**{field: row['total']})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_buffered_log_timestamps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messagethread',
+            name='participant1_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='messagethread',
+            name='participant2_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(merge_duplicate_threads, migrations.RunPython.noop),
+        migrations.RunPython(count_unread_messages, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['thread', '-id'], name='messages_thread__37ea1f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['thread', 'recipient_user', 'is_read'], name='messages_thread__1784a6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messagethread',
+            index=models.Index(fields=['participant1_user', '-last_message_at', '-id'], name='message_thr_partici_9e211a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messagethread',
+            index=models.Index(fields=['participant2_user', '-last_message_at', '-id'], name='message_thr_partici_5202c2_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='messagethread',
+            constraint=models.UniqueConstraint(fields=('participant1_user', 'participant2_user'), name='unique_thread_participants'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count_of(rows):
+    return Coalesce(Subquery(
+        rows.filter(story=OuterRef('pk')).order_by().values('story').annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def count_existing(apps, schema_editor):
+    """Fill the counters from the like and comment tables"""
+    for story_name, like_name, comment_name in [
+        ('Story', 'StoryLike', 'StoryComment'),
+        ('SimpleStory', 'SimpleStoryLike', 'SimpleStoryComment'),
+    ]:
+        apps.get_model('core', story_name).objects.update(
+            likes_count=_count_of(apps.get_model('core', like_name).objects.all()),
+            comments_count=_count_of(apps.get_model('core', comment_name).objects.filter(is_deleted=False)),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_message_unread_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simplestory',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='simplestory',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='story',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='story',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing, migrations.RunPython.noop),
+    ]
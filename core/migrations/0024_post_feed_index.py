@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_story_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['visibility', 'target_class', 'is_deleted', '-created_at', '-id'], name='posts_visibility_feed_idx'),
+        ),
+    ]
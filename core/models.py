@@ -1,4 +1,6 @@
+import hashlib
 import uuid
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 
 # Simple story models will be imported after all other models are defined
@@ -47,15 +49,12 @@ class User(AbstractUser):
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     email = models.EmailField(unique=True)  # Make email unique for USERNAME_FIELD
     
-    # Email verification
+    # Email verification (tokens live in AccountToken)
     is_email_verified = models.BooleanField(default=False)
-    email_verification_token = models.UUIDField(default=uuid.uuid4, null=True, blank=True)
     email_verification_sent_at = models.DateTimeField(null=True, blank=True)
     
     # Password management
     must_change_password = models.BooleanField(default=False, help_text="True if user must change password on next login")
-    password_reset_token = models.UUIDField(default=uuid.uuid4, null=True, blank=True)
-    password_reset_sent_at = models.DateTimeField(null=True, blank=True)
     
     # Override is_active to require email verification for parents
     # Teachers and admins are active by default
@@ -76,24 +75,36 @@ class User(AbstractUser):
         super().save(*args, **kwargs)
     
     def generate_email_verification_token(self):
-        """Generate a new verification token"""
-        self.email_verification_token = uuid.uuid4()
+        """Issue a new verification token, replacing any earlier one, and return it"""
+        token = AccountToken.objects.issue(
+            self, AccountToken.EMAIL_VERIFICATION,
+            getattr(settings, 'EMAIL_VERIFICATION_TOKEN_LIFETIME', timedelta(hours=24))
+        )
         self.email_verification_sent_at = timezone.now()
         self.save()
-        return self.email_verification_token
+        return token
+    
+    def generate_password_reset_token(self):
+        """Issue a new password reset token, replacing any earlier one, and return it"""
+        return AccountToken.objects.issue(
+            self, AccountToken.PASSWORD_RESET,
+            getattr(settings, 'PASSWORD_RESET_TOKEN_LIFETIME', timedelta(hours=1))
+        )
     
     def verify_email(self, token):
         """Verify email with token"""
-        if str(self.email_verification_token) == str(token):
-            if not self.is_verification_token_expired():
-                self.is_email_verified = True
-                if self.user_type == 'parent':  # Parents need email verification to be active
-                    self.is_active = True
-                self.email_verification_token = None
-                self.email_verification_sent_at = None
-                self.save()
-                return True
-        return False
+        account_token = AccountToken.objects.lookup(token, AccountToken.EMAIL_VERIFICATION)
+        if account_token is None or account_token.user_id != self.pk or account_token.is_expired:
+            return False
+        # Only one concurrent request can use the token
+        if not account_token.consume():
+            return False
+        self.is_email_verified = True
+        if self.user_type == 'parent':  # Parents need email verification to be active
+            self.is_active = True
+        self.email_verification_sent_at = None
+        self.save()
+        return True
     
     def is_verification_token_expired(self):
         """Check if verification token is expired (24 hours)"""
@@ -110,6 +121,81 @@ class User(AbstractUser):
         return True
 
 
+class AccountTokenManager(models.Manager):
+    def issue(self, user, purpose, lifetime):
+        """Invalidate the user's outstanding tokens for purpose and return a new raw token"""
+        token = str(uuid.uuid4())
+        self.filter(user=user, purpose=purpose, is_used=False).update(is_used=True)
+        self.create(
+            user=user, purpose=purpose, token_hash=AccountToken.hash_token(token),
+            expires_at=timezone.now() + lifetime
+        )
+        return token
+
+    def lookup(self, token, purpose):
+        """Unused token row (expired or not) for a raw token, with its user, or None"""
+        return self.filter(
+            token_hash=AccountToken.hash_token(token), purpose=purpose, is_used=False
+        ).select_related('user').first()
+
+
+class AccountToken(models.Model):
+    """
+    Single-use email verification and password reset tokens. Only a SHA-256
+    of the token sent by email is stored, under a unique index.
+    """
+    EMAIL_VERIFICATION = 'email_verification'
+    PASSWORD_RESET = 'password_reset'
+    PURPOSES = [
+        (EMAIL_VERIFICATION, 'Email verification'),
+        (PASSWORD_RESET, 'Password reset'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='account_tokens')
+    purpose = models.CharField(max_length=20, choices=PURPOSES)
+    token_hash = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    is_used = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = AccountTokenManager()
+
+    class Meta:
+        db_table = 'account_tokens'
+        indexes = [
+            models.Index(fields=['user', 'purpose']),
+        ]
+
+    @staticmethod
+    def hash_token(token):
+        return hashlib.sha256(str(token).encode()).hexdigest()
+
+    @property
+    def is_expired(self):
+        return timezone.now() >= self.expires_at
+
+    def consume(self):
+        """Mark used; False if another request used it first"""
+        return AccountToken.objects.filter(pk=self.pk, is_used=False).update(is_used=True) == 1
+
+
+class ClaimsUser(User):
+    """
+    User built from access token claims by StatelessJWTAuthentication.
+    Columns not carried in the token are deferred; touching any of them
+    loads all the missing ones in a single query.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred_fields = self.get_deferred_fields()
+        if fields and deferred_fields.issuperset(fields):
+            fields = deferred_fields
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+
 class Teacher(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='teacher_profile')
     employee_id = models.CharField(max_length=50, unique=True)
@@ -281,6 +367,13 @@ class Post(models.Model):
 
     class Meta:
         db_table = 'posts'
+        indexes = [
+            # Announcements feed: one ordered range per visibility branch
+            models.Index(
+                fields=['visibility', 'target_class', 'is_deleted', '-created_at', '-id'],
+                name='posts_visibility_feed_idx'
+            ),
+        ]
 
 
 class PostAttachment(models.Model):
@@ -334,12 +427,23 @@ class MessageThread(models.Model):
     last_message_at = models.DateTimeField(null=True, blank=True)
     last_message_by_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
                                              related_name='last_messages')
+    # Unread messages per participant, kept in step with Message.is_read by core.accounts.messaging
+    participant1_unread_count = models.PositiveIntegerField(default=0)
+    participant2_unread_count = models.PositiveIntegerField(default=0)
     is_archived = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'message_threads'
+        constraints = [
+            # participant1 is always the lower user id, so a pair has one thread
+            models.UniqueConstraint(fields=['participant1_user', 'participant2_user'], name='unique_thread_participants'),
+        ]
+        indexes = [
+            models.Index(fields=['participant1_user', '-last_message_at', '-id']),
+            models.Index(fields=['participant2_user', '-last_message_at', '-id']),
+        ]
 
 
 class Message(models.Model):
@@ -362,6 +466,10 @@ class Message(models.Model):
 
     class Meta:
         db_table = 'messages'
+        indexes = [
+            models.Index(fields=['thread', '-id']),
+            models.Index(fields=['thread', 'recipient_user', 'is_read']),
+        ]
 
 
 class AllowedMessageContact(models.Model):
@@ -481,7 +589,8 @@ class DownloadLog(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     disclaimer_accepted = models.BooleanField(default=False)
     download_purpose = models.CharField(max_length=255, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when the buffered row is written (see core/audit_buffer.py)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = 'download_logs'
@@ -499,6 +608,20 @@ class UserSession(models.Model):
         db_table = 'user_sessions'
 
 
+class RevokedToken(models.Model):
+    """
+    A refresh token that may no longer be used, by its jti. Rows are only
+    needed until the token would have expired anyway; `manage.py
+    prune_revoked_tokens` deletes them after that.
+    """
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'revoked_tokens'
+
+
 class AuditLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs')
     action = models.CharField(max_length=100)
@@ -506,12 +629,104 @@ class AuditLog(models.Model):
     entity_id = models.PositiveBigIntegerField(null=True, blank=True)
     description = models.TextField(blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when the buffered row is written (see core/audit_buffer.py)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = 'audit_logs'
 
 
+class MediaBlob(models.Model):
+    """
+    A stored file identified by the SHA-256 of its content. Attachments
+    point at blobs, so identical uploads share one file on disk; ref_count
+    tracks how many attachments use it (see core/media_storage.py).
+    """
+    VARIANTS_NONE = 'none'
+    VARIANTS_PENDING = 'pending'
+    VARIANTS_READY = 'ready'
+    VARIANTS_FAILED = 'failed'
+    VARIANT_STATUSES = [
+        (VARIANTS_NONE, 'Not an image'),
+        (VARIANTS_PENDING, 'Pending'),
+        (VARIANTS_READY, 'Ready'),
+        (VARIANTS_FAILED, 'Failed'),
+    ]
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file_path = models.CharField(max_length=255, help_text="Path relative to MEDIA_ROOT")
+    size = models.PositiveBigIntegerField(help_text="File size in bytes")
+    mime_type = models.CharField(max_length=100, blank=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    variants_status = models.CharField(
+        max_length=10, choices=VARIANT_STATUSES, default=VARIANTS_NONE,
+        help_text="Thumbnail/medium image variants (see core/media_variants.py)"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'media_blobs'
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
+
+
+class MediaDeletion(models.Model):
+    """A media file queued for removal by `manage.py sweep_media`"""
+    file_path = models.CharField(max_length=255, help_text="Path relative to MEDIA_ROOT")
+    requested_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'media_deletions'
+
+    def __str__(self):
+        return self.file_path
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload: the client PUTs numbered chunks that are written
+    to a temp file, then completes the session, which moves the file into
+    the blob store. A completed session is consumed when a story attaches it.
+    """
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+        ('attached', 'Attached'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    file_name = models.CharField(max_length=255)
+    mime_type = models.CharField(max_length=100)
+    total_size = models.PositiveBigIntegerField(help_text="File size in bytes")
+    chunk_size = models.PositiveIntegerField()
+    received_chunks = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='uploading')
+    blob = models.ForeignKey(MediaBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='upload_sessions')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'upload_sessions'
+
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    def expected_chunk_size(self, index):
+        return min(self.chunk_size, self.total_size - index * self.chunk_size)
+
+    @property
+    def is_expired(self):
+        return timezone.now() >= self.expires_at
+
+
 class Story(models.Model):
     STORY_TYPES = [
         ('photo', 'Photo'),
@@ -525,6 +740,9 @@ class Story(models.Model):
     content = models.TextField(blank=True, help_text="Story description/content")
     story_type = models.CharField(max_length=10, choices=STORY_TYPES, default='journal')
     target_classes = models.ManyToManyField(Class, related_name='stories', blank=True, help_text="Classes that can view this story")
+    # Maintained by core.story_counters; `manage.py reconcile_story_counters` repairs drift
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -550,6 +768,7 @@ class StoryAttachment(models.Model):
     file_type = models.CharField(max_length=20, choices=ATTACHMENT_TYPES)
     file_size = models.PositiveBigIntegerField(help_text="File size in bytes")
     mime_type = models.CharField(max_length=100)
+    blob = models.ForeignKey(MediaBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='story_attachments')
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -586,4 +805,28 @@ class StoryComment(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"Comment by {self.user.get_full_name()} on {self.story.title}"
\ No newline at end of file
+        return f"Comment by {self.user.get_full_name()} on {self.story.title}"
+
+class SearchDocument(models.Model):
+    """
+    Denormalized search text for students, classes and teachers.
+    Kept current by save signals and indexed by SQLite FTS5 or MySQL FULLTEXT
+    (see migration 0013); rebuild with `manage.py rebuild_search_index`.
+    """
+    ENTITY_TYPES = [
+        ('student', 'Student'),
+        ('class', 'Class'),
+        ('teacher', 'Teacher'),
+    ]
+
+    entity_type = models.CharField(max_length=20, choices=ENTITY_TYPES)
+    entity_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True, help_text="Searchable text (names, codes, email)")
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'search_documents'
+        unique_together = ['entity_type', 'entity_id']
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework import exceptions
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from core.accounts.authentication import StatelessJWTAuthentication
+from core.notifications import broker
+
+
+def _authenticate(request):
+    """
+    User for the Authorization header or, since EventSource can't set
+    headers, an ?access_token= query parameter; None if neither is valid
+    """
+    authentication = StatelessJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else request.GET.get('access_token', '').encode()
+    if not raw_token:
+        return None
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, exceptions.AuthenticationFailed):
+        return None
+
+
+def _format(event):
+    return f"id: {event['key']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def _event_stream(user):
+    """
+    Events for one client, with a comment line as heartbeat so proxies keep
+    the connection open. The stream ends after NOTIFICATION_STREAM_MAX_AGE
+    and EventSource reconnects, which re-checks the token.
+    """
+    heartbeat = getattr(settings, 'NOTIFICATION_HEARTBEAT_INTERVAL', 15)
+    closes_at = time.monotonic() + getattr(settings, 'NOTIFICATION_STREAM_MAX_AGE', 300)
+    subscription = broker.subscribe(user.pk, user.user_type)
+    try:
+        yield f"retry: {getattr(settings, 'NOTIFICATION_RETRY_MS', 5000)}\n: connected\n\n"
+        while True:
+            remaining = closes_at - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield _format(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@require_safe
+async def notification_stream(request):
+    """
+    Server-Sent Events for new stories, comments and messages. Each event
+    carries ids only; clients fetch what changed from the usual endpoints.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI Django buffers async streams whole, and each open tab would hold a worker
+        return JsonResponse(
+            {'error': 'Notification stream is only available when served over ASGI'},
+            status=503
+        )
+
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse(
+            {'error': 'Authentication credentials were not provided or are invalid'},
+            status=401
+        )
+
+    response = StreamingHttpResponse(_event_stream(user), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx/Apache proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from core.models import Message, StoryComment
+from core.simple_story_models import SimpleStory, SimpleStoryComment
+
+logger = logging.getLogger(__name__)
+
+# Keys of recently published events; the signal and the poller can both see a row
+RECENT_EVENT_LIMIT = 10000
+
+
+def _poll_interval():
+    return getattr(settings, 'NOTIFICATION_POLL_INTERVAL', 2)
+
+
+def simple_story_event(story_id, teacher_id):
+    return {'event': 'story.created', 'key': f'simple_story:{story_id}',
+            'data': {'id': story_id, 'teacher_id': teacher_id}}
+
+
+def simple_story_comment_event(comment_id, story_id):
+    return {'event': 'comment.created', 'key': f'simple_story_comment:{comment_id}',
+            'data': {'id': comment_id, 'story_id': story_id, 'feed': 'simple'}}
+
+
+def story_comment_event(comment_id, story_id):
+    # Legacy stories are only shown to teachers and admins (see StoryViewSet)
+    return {'event': 'comment.created', 'key': f'story_comment:{comment_id}',
+            'data': {'id': comment_id, 'story_id': story_id, 'feed': 'stories'},
+            'user_types': ('teacher', 'admin')}
+
+
+def message_event(message_id, thread_id, sender_id, recipient_id):
+    return {'event': 'message.created', 'key': f'message:{message_id}',
+            'data': {'id': message_id, 'thread_id': str(thread_id), 'sender_user_id': sender_id},
+            'user_ids': (recipient_id,)}
+
+
+class Subscription:
+    """One open stream; events are handed to its asyncio queue from any thread"""
+
+    def __init__(self, user_id, user_type, maxsize=100):
+        self.user_id = user_id
+        self.user_type = user_type
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def wants(self, event):
+        user_ids = event.get('user_ids')
+        user_types = event.get('user_types')
+        return (user_ids is None or self.user_id in user_ids) and (user_types is None or self.user_type in user_types)
+
+    def _offer(self, event):
+        # A client too slow to drain 100 events just misses some; events are only refresh hints
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self._offer, event)
+
+
+class EventBroker:
+    """
+    In-process pub/sub for notification streams. Events are published by
+    signals after commit and by the poller for rows other processes wrote;
+    each event is delivered once, to the subscriptions it is meant for.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._recent = OrderedDict()
+
+    def subscribe(self, user_id, user_type):
+        subscription = Subscription(user_id, user_type)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        poller.ensure_running()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def has_subscribers(self):
+        return bool(self._subscriptions)
+
+    def publish(self, event):
+        with self._lock:
+            if event['key'] in self._recent:
+                return
+            self._recent[event['key']] = True
+            if len(self._recent) > RECENT_EVENT_LIMIT:
+                self._recent.popitem(last=False)
+            targets = [subscription for subscription in self._subscriptions if subscription.wants(event)]
+        for subscription in targets:
+            try:
+                subscription.deliver(event)
+            except RuntimeError:
+                # The stream's event loop has closed; it unsubscribes on its way out
+                pass
+
+
+broker = EventBroker()
+
+
+def publish_on_commit(event):
+    """Publish once the row is committed, so clients never fetch something not yet visible"""
+    if broker.has_subscribers():
+        transaction.on_commit(lambda: broker.publish(event))
+
+
+class NotificationPoller:
+    """
+    Fallback for rows written by other worker processes: while this process
+    has open streams, one thread reads rows with ids above the last seen
+    every NOTIFICATION_POLL_INTERVAL seconds (an indexed primary-key range
+    per table, however many streams are open) and publishes them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_ids = {}
+
+    def _sources(self):
+        return [
+            ('simple_story', SimpleStory.objects.values_list('id', 'teacher_id'),
+             lambda row: simple_story_event(*row)),
+            ('simple_story_comment', SimpleStoryComment.objects.values_list('id', 'story_id'),
+             lambda row: simple_story_comment_event(*row)),
+            ('story_comment', StoryComment.objects.values_list('id', 'story_id'),
+             lambda row: story_comment_event(*row)),
+            ('message', Message.objects.values_list('id', 'thread__thread_id', 'sender_user_id', 'recipient_user_id'),
+             lambda row: message_event(*row)),
+        ]
+
+    def poll_once(self, batch_size=500):
+        """Publish events for rows created since the previous poll; returns how many"""
+        published = 0
+        for name, rows, to_event in self._sources():
+            last_id = self._last_ids.get(name)
+            if last_id is None:
+                # Start from what exists now; earlier rows are already on the clients' first fetch
+                self._last_ids[name] = rows.order_by('-id').values_list('id', flat=True).first() or 0
+                continue
+            for row in rows.filter(id__gt=last_id).order_by('id')[:batch_size]:
+                broker.publish(to_event(row))
+                self._last_ids[name] = row[0]
+                published += 1
+        return published
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not broker.has_subscribers():
+                    self._thread = None
+                    # Rows written while nobody was listening are not replayed to the next stream
+                    self._last_ids = {}
+                    return
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Notification poll failed: {str(e)}")
+            finally:
+                close_old_connections()
+            time.sleep(_poll_interval())
+
+    def ensure_running(self):
+        if not _poll_interval():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='notification-poller', daemon=True)
+                self._thread.start()
+
+
+poller = NotificationPoller()
@@ -0,0 +1,33 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed. Falls back
+    to DRF's encoder when orjson is missing, for indented or non-compact
+    output (orjson can't match DRF's separators there) and for anything
+    orjson refuses to encode, such as integers past 64 bits.
+    """
+    _options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # Dates, Decimals, lazy strings etc. go through DRF's encoder so they render as before
+            ret = orjson.dumps(data, default=JSONEncoder().default, option=self._options)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping DRF applies: both are valid JSON but break JavaScript string literals
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
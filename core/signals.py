@@ -1,10 +1,27 @@
-
-from django.db.models.signals import post_save
+from django.core.signals import request_finished
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from core.models import User, Admin
+from core.models import (
+    User, Admin, AllowedMessageContact, ClaimsUser, Class, Parent, Student, Teacher,
+    ClassStudentEnrollment, ClassTeacherAssignment, Message, Post, StoryAttachment, StoryComment
+)
+from core.simple_story_models import SimpleStory, SimpleStoryComment
+from core.accounts.authentication import invalidate_version
+from core.accounts.messaging import invalidate_contacts
+from core.accounts.announcements import invalidate_featured
+from core.accounts.dashboard_stats import mark_dashboard_stats_dirty
+from core.audit_buffer import log_buffer
+from core.accounts.search import index_entity, remove_entity
+from core.media_storage import release_blob
+from core.notifications import (
+    message_event, publish_on_commit, simple_story_comment_event, simple_story_event, story_comment_event
+)
 
 
+# request.user is a ClaimsUser (see StatelessJWTAuthentication), and saving a proxy
+# instance sends the signal with the proxy as sender, so User receivers connect to both
 @receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
 def create_user_profile(sender, instance, created, **kwargs):
     """
     Create related profiles when a user is created
@@ -16,4 +33,137 @@ def create_user_profile(sender, instance, created, **kwargs):
                 user=instance,
                 admin_level='super_admin' if instance.is_superuser else 'admin',
                 is_active=True
-            )
\ No newline at end of file
+            )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+@receiver(post_delete, sender=ClaimsUser)
+def invalidate_user_token_version(sender, instance, **kwargs):
+    """
+    Drop the cached token version so tokens issued before a password,
+    status or role change stop authenticating
+    """
+    invalidate_version(instance.pk)
+
+
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_save, sender=Parent)
+@receiver(post_delete, sender=Parent)
+@receiver(post_save, sender=Admin)
+@receiver(post_delete, sender=Admin)
+def invalidate_profile_token_version(sender, instance, **kwargs):
+    """Profile ids and flags are carried in tokens too"""
+    invalidate_version(instance.user_id)
+
+
+@receiver(post_save, sender=ClassStudentEnrollment)
+@receiver(post_delete, sender=ClassStudentEnrollment)
+@receiver(post_save, sender=ClassTeacherAssignment)
+@receiver(post_delete, sender=ClassTeacherAssignment)
+@receiver(post_save, sender=Class)
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Teacher)
+def invalidate_dashboard_statistics(sender, **kwargs):
+    """
+    Mark the admin dashboard snapshot dirty when enrollments,
+    assignments or the entities they count change
+    """
+    mark_dashboard_stats_dirty()
+
+
+@receiver(post_save, sender=Student)
+def index_student(sender, instance, **kwargs):
+    index_entity('student', instance)
+
+
+@receiver(post_save, sender=Class)
+def index_class(sender, instance, **kwargs):
+    index_entity('class', instance)
+
+
+@receiver(post_save, sender=Teacher)
+def index_teacher(sender, instance, **kwargs):
+    index_entity('teacher', instance)
+
+
+TEACHER_DOCUMENT_USER_FIELDS = {'first_name', 'last_name', 'email', 'is_active'}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def reindex_teacher_user(sender, instance, created, update_fields=None, **kwargs):
+    """Teacher names and email live on the user row"""
+    # Saves such as update_last_login touch none of the indexed columns
+    if update_fields is not None and not TEACHER_DOCUMENT_USER_FIELDS.intersection(update_fields):
+        return
+    if not created and instance.user_type == 'teacher':
+        teacher = Teacher.objects.filter(user=instance).first()
+        if teacher:
+            index_entity('teacher', teacher)
+
+
+@receiver(post_delete, sender=Student)
+def unindex_student(sender, instance, **kwargs):
+    remove_entity('student', instance.pk)
+
+
+@receiver(post_delete, sender=Class)
+def unindex_class(sender, instance, **kwargs):
+    remove_entity('class', instance.pk)
+
+
+@receiver(post_delete, sender=Teacher)
+def unindex_teacher(sender, instance, **kwargs):
+    remove_entity('teacher', instance.pk)
+
+
+@receiver(post_delete, sender=StoryAttachment)
+def release_story_attachment_blob(sender, instance, **kwargs):
+    """Drop the attachment's reference on its shared media blob"""
+    release_blob(instance.blob_id)
+
+
+@receiver(request_finished)
+def flush_audit_buffer(sender, **kwargs):
+    """
+    Write buffered audit/download rows once the response has been sent,
+    so logging adds no round trip to the request itself
+    """
+    if len(log_buffer):
+        log_buffer.flush()
+
+
+@receiver(post_save, sender=AllowedMessageContact)
+@receiver(post_delete, sender=AllowedMessageContact)
+def invalidate_message_contacts(sender, instance, **kwargs):
+    """Drop both sides' cached contact sets when a contact is granted or withdrawn"""
+    invalidate_contacts(instance.parent_id, instance.teacher_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_featured_posts(sender, instance, **kwargs):
+    """Drop the cached featured list; a post may have been pinned, unpinned, hidden or deleted"""
+    invalidate_featured()
+
+
+@receiver(post_save, sender=SimpleStory)
+@receiver(post_save, sender=SimpleStoryComment)
+@receiver(post_save, sender=StoryComment)
+@receiver(post_save, sender=Message)
+def publish_notification(sender, instance, created, **kwargs):
+    """Push a lightweight event to open notification streams in this process"""
+    if not created:
+        return
+    if sender is SimpleStory:
+        event = simple_story_event(instance.pk, instance.teacher_id)
+    elif sender is SimpleStoryComment:
+        event = simple_story_comment_event(instance.pk, instance.story_id)
+    elif sender is StoryComment:
+        event = story_comment_event(instance.pk, instance.story_id)
+    else:
+        event = message_event(instance.pk, instance.thread.thread_id, instance.sender_user_id, instance.recipient_user_id)
+    publish_on_commit(event)
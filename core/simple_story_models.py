@@ -1,10 +1,10 @@
 from django.db import models
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
-from core.models import Teacher, User
+from core.models import Teacher, User, MediaBlob
+from core.media_storage import release_blob, queue_file_deletion
 import uuid
 import os
-import logging
 
 
 def story_file_path(instance, filename):
@@ -26,6 +26,9 @@ class SimpleStory(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     story_type = models.CharField(max_length=20, choices=STORY_TYPES, default='journal')
+    # Maintained by core.story_counters; `manage.py reconcile_story_counters` repairs drift
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -44,6 +47,7 @@ class SimpleStoryAttachment(models.Model):
     file_name = models.CharField(max_length=255)
     file_size = models.PositiveBigIntegerField()
     file_type = models.CharField(max_length=50)
+    blob = models.ForeignKey(MediaBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='simple_story_attachments')
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -53,15 +57,14 @@ class SimpleStoryAttachment(models.Model):
         return f"{self.file_name} - {self.story.title}"
     
     def delete_file(self):
-        """Delete the associated file from filesystem"""
-        if self.file and os.path.exists(self.file.path):
-            try:
-                os.remove(self.file.path)
-                logging.info(f"Deleted media file: {self.file.path}")
-                return True
-            except Exception as e:
-                logging.error(f"Failed to delete media file {self.file.path}: {str(e)}")
-                return False
+        """Queue the associated file for removal by `manage.py sweep_media`"""
+        if self.blob_id:
+            # Shared content-addressed file; swept once nothing references it
+            release_blob(self.blob_id)
+            return True
+        if self.file:
+            queue_file_deletion(self.file.name)
+            return True
         return False
 
 
@@ -1,25 +1,47 @@
 from rest_framework import serializers
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import transaction
 from core.simple_story_models import SimpleStory, SimpleStoryAttachment, SimpleStoryLike, SimpleStoryComment
+from core.media_storage import store_upload
+from core.media_variants import variant_url
+from core.upload_serializers import CompletedUploadsField, attachment_file_type, consume_uploads
+from core.story_counters import comment_added
 
 
 class SimpleStoryAttachmentSerializer(serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    medium_url = serializers.SerializerMethodField()
     mime_type = serializers.SerializerMethodField()
     
     class Meta:
         model = SimpleStoryAttachment
-        fields = ['id', 'file_name', 'file_url', 'file_size', 'file_type', 'mime_type', 'created_at']
+        fields = [
+            'id', 'file_name', 'file_url', 'thumbnail_url', 'medium_url',
+            'file_size', 'file_type', 'mime_type', 'created_at'
+        ]
+    
+    def _absolute_url(self, url):
+        request = self.context.get('request')
+        if url and request:
+            return request.build_absolute_uri(url)
+        return url
     
     def get_file_url(self, obj):
         if obj.file:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.file.url)
-            return obj.file.url
+            return self._absolute_url(obj.file.url)
         return None
     
+    # Null until the background worker has produced the variant; fall back to file_url
+    def get_thumbnail_url(self, obj):
+        return self._absolute_url(variant_url(obj.blob, 'thumbnail'))
+    
+    def get_medium_url(self, obj):
+        return self._absolute_url(variant_url(obj.blob, 'medium'))
+    
     def get_mime_type(self, obj):
+        if obj.blob and obj.blob.mime_type:
+            return obj.blob.mime_type
         # Derive mime type from file_type
         if obj.file_type == 'image':
             return 'image/jpeg'  # Default, could be more specific
@@ -52,10 +74,10 @@ class SimpleStoryListSerializer(serializers.ModelSerializer):
         return obj.teacher.user.get_full_name()
     
     def get_likes_count(self, obj):
-        return obj.likes.count()
+        return obj.likes_count
     
     def get_comments_count(self, obj):
-        return obj.comments.filter(is_deleted=False).count()
+        return obj.comments_count
     
     def get_user_has_liked(self, obj):
         request = self.context.get('request')
@@ -113,10 +135,16 @@ class SimpleStoryCreateSerializer(serializers.ModelSerializer):
         allow_empty=True,
         write_only=True
     )
+    upload_ids = CompletedUploadsField()
     
     class Meta:
         model = SimpleStory
-        fields = ['title', 'content', 'story_type', 'attachments']
+        fields = ['title', 'content', 'story_type', 'attachments', 'upload_ids']
+    
+    def validate(self, attrs):
+        if len(attrs.get('attachments', [])) + len(attrs.get('upload_ids', [])) > 5:
+            raise serializers.ValidationError("Maximum 5 files can be attached.")
+        return attrs
     
     def validate_attachments(self, files):
         if not files:
@@ -142,8 +170,10 @@ class SimpleStoryCreateSerializer(serializers.ModelSerializer):
         
         return files
     
+    @transaction.atomic
     def create(self, validated_data):
         attachments = validated_data.pop('attachments', [])
+        uploads = validated_data.pop('upload_ids', [])
         
         # Get user from request
         request = self.context.get('request')
@@ -185,12 +215,26 @@ class SimpleStoryCreateSerializer(serializers.ModelSerializer):
             else:
                 file_type = 'document'
             
+            blob = store_upload(file)
             SimpleStoryAttachment.objects.create(
                 story=story,
-                file=file,
+                file=blob.file_path,
                 file_name=file.name,
                 file_size=file.size,
-                file_type=file_type
+                file_type=file_type,
+                blob=blob
+            )
+        
+        # Files sent earlier through resumable uploads are already in the blob store
+        consume_uploads(uploads)
+        for upload in uploads:
+            SimpleStoryAttachment.objects.create(
+                story=story,
+                file=upload.blob.file_path,
+                file_name=upload.file_name,
+                file_size=upload.total_size,
+                file_type=attachment_file_type(upload.mime_type),
+                blob=upload.blob
             )
         
         return story
@@ -222,12 +266,15 @@ class SimpleStoryCommentCreateSerializer(serializers.ModelSerializer):
         model = SimpleStoryComment
         fields = ['comment_text']
     
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get('request')
         story = self.context.get('story')
         
-        return SimpleStoryComment.objects.create(
+        comment = SimpleStoryComment.objects.create(
             story=story,
             user=request.user,
             **validated_data
-        )
\ No newline at end of file
+        )
+        comment_added(comment)
+        return comment
\ No newline at end of file
@@ -1,8 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from core.simple_story_views import SimpleStoryViewSet
+from core.async_views import read_view
+from core.simple_story_views import SimpleStoryViewSet, story_feed
 
 router = DefaultRouter()
 router.register(r'stories', SimpleStoryViewSet, basename='simple-stories')
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = [
+    # Feed listing served by the async view under ASGI; POST still creates through the viewset
+    path('stories/', read_view(SimpleStoryViewSet.as_view({'get': 'list', 'post': 'create'}), story_feed),
+         name='simple-stories-list'),
+] + router.urls
@@ -4,9 +4,14 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
-import logging
+from django.db.models import Prefetch
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from asgiref.sync import sync_to_async
+import asyncio
 
-from core.simple_story_models import SimpleStory, SimpleStoryLike, SimpleStoryComment
+from core.async_views import alist, async_api_view, json_response
+from core.story_counters import soft_delete_comment, toggle_like
+from core.simple_story_models import SimpleStory, SimpleStoryAttachment, SimpleStoryComment
 from core.simple_story_serializers import (
     SimpleStoryListSerializer, SimpleStoryCreateSerializer,
     SimpleStoryCommentSerializer, SimpleStoryCommentCreateSerializer
@@ -43,24 +48,31 @@ class IsTeacherOrAdminPermission(permissions.BasePermission):
         )
 
 
+def feed_queryset(request):
+    """Active stories, newest first; ?mine=true limits teachers and admins to their own"""
+    queryset = SimpleStory.objects.filter(is_active=True).select_related('teacher__user').prefetch_related(
+        Prefetch('attachments', queryset=SimpleStoryAttachment.objects.select_related('blob'))
+    ).order_by('-created_at')
+    
+    # Filter for "My Stories" if mine=true parameter is provided
+    if request.GET.get('mine') == 'true':
+        if request.user.user_type == 'teacher':
+            # For teachers, filter by their teacher profile
+            queryset = queryset.filter(teacher__user=request.user)
+        elif request.user.user_type == 'admin':
+            # For admins, filter by stories they created (using their virtual teacher profile)
+            queryset = queryset.filter(teacher__user=request.user)
+    
+    return queryset
+
+
 class SimpleStoryViewSet(viewsets.ModelViewSet):
     """Simple ViewSet for managing stories"""
     permission_classes = [IsAuthenticated]
     pagination_class = StoryPagination
     
     def get_queryset(self):
-        queryset = SimpleStory.objects.filter(is_active=True).select_related('teacher__user').order_by('-created_at')
-        
-        # Filter for "My Stories" if mine=true parameter is provided
-        if self.request.GET.get('mine') == 'true':
-            if self.request.user.user_type == 'teacher':
-                # For teachers, filter by their teacher profile
-                queryset = queryset.filter(teacher__user=self.request.user)
-            elif self.request.user.user_type == 'admin':
-                # For admins, filter by stories they created (using their virtual teacher profile)
-                queryset = queryset.filter(teacher__user=self.request.user)
-        
-        return queryset
+        return feed_queryset(self.request)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -105,16 +117,9 @@ class SimpleStoryViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Delete associated attachments (which will trigger file cleanup via signal)
-        try:
-            attachments = story.attachments.all()
-            for attachment in attachments:
-                # This will trigger the post_delete signal to clean up files
-                attachment.delete()
-        except Exception as e:
-            logging.error(f"Error deleting attachments for story {story.id}: {str(e)}")
-        
-        # Soft delete - mark as inactive instead of actually deleting
+        # Soft delete - mark as inactive instead of actually deleting.
+        # Attachment files are reclaimed later by `manage.py sweep_media`
+        # (MEDIA_DELETED_STORY_RETENTION_DAYS), not inside this request.
         story.is_active = False
         story.save()
         
@@ -128,23 +133,19 @@ class SimpleStoryViewSet(viewsets.ModelViewSet):
         """Like or unlike a story"""
         story = get_object_or_404(SimpleStory, pk=pk, is_active=True)
         
-        like, created = SimpleStoryLike.objects.get_or_create(
-            story=story,
-            user=request.user
-        )
+        liked, likes_count = toggle_like(story, request.user)
         
-        if not created:
-            like.delete()
+        if not liked:
             return Response({
                 'message': 'Story unliked',
                 'liked': False,
-                'likes_count': story.likes.count()
+                'likes_count': likes_count
             })
         else:
             return Response({
                 'message': 'Story liked',
                 'liked': True,
-                'likes_count': story.likes.count()
+                'likes_count': likes_count
             })
     
     @action(detail=True, methods=['get'])
@@ -197,10 +198,56 @@ class SimpleStoryViewSet(viewsets.ModelViewSet):
             )
         
         # Soft delete - mark as deleted instead of actually deleting
-        comment.is_deleted = True
-        comment.save()
+        soft_delete_comment(comment)
         
         return Response(
             {'message': 'Comment deleted successfully'},
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+
+@async_api_view([IsAuthenticated])
+async def story_feed(request):
+    """
+    Async version of SimpleStoryViewSet.list: the page and the total count
+    are read concurrently, with the same page links as StoryPagination
+    """
+    pagination = StoryPagination
+    try:
+        page_size = min(int(request.GET[pagination.page_size_query_param]), pagination.max_page_size)
+        if page_size <= 0:
+            raise ValueError
+    except (KeyError, ValueError):
+        page_size = pagination.page_size
+    try:
+        page_number = int(request.GET.get('page', 1))
+        if page_number <= 0:
+            raise ValueError
+    except ValueError:
+        return json_response({'detail': 'Invalid page.'}, status=404)
+
+    queryset = feed_queryset(request)
+    offset = (page_number - 1) * page_size
+    count, stories = await asyncio.gather(
+        queryset.acount(),
+        alist(queryset[offset:offset + page_size])
+    )
+    if not stories and page_number > 1:
+        return json_response({'detail': 'Invalid page.'}, status=404)
+
+    url = request.build_absolute_uri()
+    next_link = replace_query_param(url, 'page', page_number + 1) if offset + page_size < count else None
+    if page_number == 1:
+        previous_link = None
+    elif page_number == 2:
+        previous_link = remove_query_param(url, 'page')
+    else:
+        previous_link = replace_query_param(url, 'page', page_number - 1)
+
+    serializer = SimpleStoryListSerializer(stories, many=True, context={'request': request})
+    return json_response({
+        'count': count,
+        'next': next_link,
+        'previous': previous_link,
+        'results': await sync_to_async(lambda: serializer.data)(),
+    })
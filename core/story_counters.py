@@ -0,0 +1,103 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def _story_model(comment):
+    return type(comment)._meta.get_field('story').related_model
+
+
+def _add(model, story_id, field, delta):
+    value = F(field) + delta
+    if delta < 0:
+        # Only subtract when the result stays >= 0: the columns are unsigned on
+        # MySQL, where a drifted 0 - 1 errors out before GREATEST could clamp it
+        value = Case(When(**{f'{field}__gte': -delta}, then=value), default=Value(0))
+    model.objects.filter(pk=story_id).update(**{field: value})
+
+
+def toggle_like(story, user):
+    """
+    Like the story, or unlike it if the user already does, adjusting
+    likes_count in the same transaction. Returns (liked, likes_count).
+    """
+    model = type(story)
+    with transaction.atomic():
+        unliked, _ = story.likes.filter(user=user).delete()
+        if unliked:
+            _add(model, story.pk, 'likes_count', -1)
+            liked = False
+        else:
+            try:
+                with transaction.atomic():
+                    story.likes.create(user=user)
+                _add(model, story.pk, 'likes_count', 1)
+            except IntegrityError:
+                # A concurrent request from the same user liked it first
+                pass
+            liked = True
+    return liked, model.objects.filter(pk=story.pk).values_list('likes_count', flat=True).get()
+
+
+def comment_added(comment):
+    """Count a newly created comment; call inside the transaction that created it"""
+    _add(_story_model(comment), comment.story_id, 'comments_count', 1)
+
+
+def soft_delete_comment(comment):
+    """
+    Mark the comment deleted and take it off comments_count. The flag is
+    flipped with a conditional UPDATE, so deleting twice counts once.
+    """
+    with transaction.atomic():
+        flipped = type(comment).objects.filter(pk=comment.pk, is_deleted=False).update(
+            is_deleted=True, updated_at=timezone.now()
+        )
+        if flipped:
+            _add(_story_model(comment), comment.story_id, 'comments_count', -1)
+    comment.is_deleted = True
+    return bool(flipped)
+
+
+def _count_of(rows):
+    return Coalesce(Subquery(
+        rows.filter(story=OuterRef('pk')).order_by().values('story').annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def actual_counts(like_model, comment_model):
+    """likes_count / comments_count expressions counted from the like and comment tables"""
+    return {
+        'likes_count': _count_of(like_model.objects.all()),
+        'comments_count': _count_of(comment_model.objects.filter(is_deleted=False)),
+    }
+
+
+def reconcile_counts(model, like_model, comment_model, batch_size=500, dry_run=False):
+    """
+    Compare likes_count / comments_count with the like and comment tables
+    in primary-key batches and recount the rows that drifted. Returns the
+    number of stories whose counters were (or, with dry_run, would be) fixed.
+    """
+    actual = actual_counts(like_model, comment_model)
+    fixed = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            model.objects.filter(pk__gt=last_pk)
+            .annotate(actual_likes=actual['likes_count'], actual_comments=actual['comments_count'])
+            .order_by('pk')
+            .values('pk', 'likes_count', 'comments_count', 'actual_likes', 'actual_comments')[:batch_size]
+        )
+        if not batch:
+            return fixed
+        last_pk = batch[-1]['pk']
+        drifted = [
+            row['pk'] for row in batch
+            if (row['likes_count'], row['comments_count']) != (row['actual_likes'], row['actual_comments'])
+        ]
+        fixed += len(drifted)
+        if drifted and not dry_run:
+            # Recount inside the UPDATE so likes made since the read aren't lost
+            model.objects.filter(pk__in=drifted).update(**actual)
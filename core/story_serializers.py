@@ -1,19 +1,64 @@
 from rest_framework import serializers
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.conf import settings
+from django.db import transaction
 from core.models import Story, StoryAttachment, StoryLike, StoryComment, Teacher, Class, User
+from core.media_storage import store_upload, blob_url
+from core.media_variants import variant_url
+from core.upload_serializers import CompletedUploadsField, attachment_file_type, consume_uploads
+from core.story_counters import comment_added
 import mimetypes
-import os
-import uuid
 
 
 class StoryAttachmentSerializer(serializers.ModelSerializer):
+    thumbnail_url = serializers.SerializerMethodField()
+    medium_url = serializers.SerializerMethodField()
+
     class Meta:
         model = StoryAttachment
-        fields = ['id', 'file_name', 'file_url', 'file_type', 'file_size', 'mime_type', 'created_at']
+        fields = [
+            'id', 'file_name', 'file_url', 'thumbnail_url', 'medium_url',
+            'file_type', 'file_size', 'mime_type', 'created_at'
+        ]
         read_only_fields = ['id', 'created_at']
 
+    # Null until the background worker has produced the variant; fall back to file_url
+    def get_thumbnail_url(self, obj):
+        return variant_url(obj.blob, 'thumbnail')
+
+    def get_medium_url(self, obj):
+        return variant_url(obj.blob, 'medium')
+
+
+def top_level_comments(story):
+    """A story's non-deleted top-level comments, newest first, for paginating in the database"""
+    return StoryComment.objects.filter(
+        story=story, parent_comment__isnull=True, is_deleted=False
+    ).select_related('user').order_by('-created_at', '-id')
+
+
+def attach_replies(comments):
+    """
+    Attach each top-level comment's non-deleted replies (oldest first) as
+    loaded_replies, loading them and their users in one query
+    """
+    comments = list(comments)
+    by_id = {comment.id: comment for comment in comments}
+    for comment in comments:
+        comment.loaded_replies = []
+    if by_id:
+        replies = StoryComment.objects.filter(
+            parent_comment_id__in=by_id, is_deleted=False
+        ).select_related('user').order_by('created_at', 'id')
+        for reply in replies:
+            by_id[reply.parent_comment_id].loaded_replies.append(reply)
+    return comments
+
+
+def comment_tree(story):
+    """Every top-level comment of a story, newest first, with its replies attached"""
+    return attach_replies(top_level_comments(story))
+
 
 class StoryCommentSerializer(serializers.ModelSerializer):
     user_name = serializers.SerializerMethodField()
@@ -34,8 +79,10 @@ class StoryCommentSerializer(serializers.ModelSerializer):
         return obj.user.get_full_name()
 
     def get_replies(self, obj):
-        if obj.parent_comment is None:
-            replies = obj.replies.filter(is_deleted=False).order_by('created_at')
+        if obj.parent_comment_id is None:
+            replies = getattr(obj, 'loaded_replies', None)
+            if replies is None:
+                replies = obj.replies.filter(is_deleted=False).select_related('user').order_by('created_at')
             return StoryCommentSerializer(replies, many=True, context=self.context).data
         return []
 
@@ -94,16 +141,10 @@ class StoryListSerializer(serializers.ModelSerializer):
             return []
 
     def get_likes_count(self, obj):
-        try:
-            return obj.likes.count()
-        except AttributeError:
-            return 0
+        return getattr(obj, 'likes_count', 0)
 
     def get_comments_count(self, obj):
-        try:
-            return obj.comments.filter(is_deleted=False).count()
-        except AttributeError:
-            return 0
+        return getattr(obj, 'comments_count', 0)
 
     def get_user_has_liked(self, obj):
         try:
@@ -149,14 +190,13 @@ class StoryDetailSerializer(serializers.ModelSerializer):
     def get_comments(self, obj):
         # Only return top-level comments (parent_comment=None)
         # Replies will be nested within each comment
-        comments = obj.comments.filter(parent_comment=None, is_deleted=False).order_by('-created_at')
-        return StoryCommentSerializer(comments, many=True, context=self.context).data
+        return StoryCommentSerializer(comment_tree(obj), many=True, context=self.context).data
 
     def get_likes_count(self, obj):
-        return obj.likes.count()
+        return obj.likes_count
 
     def get_comments_count(self, obj):
-        return obj.comments.filter(is_deleted=False).count()
+        return obj.comments_count
 
     def get_user_has_liked(self, obj):
         request = self.context.get('request')
@@ -195,10 +235,11 @@ class StoryCreateSerializer(serializers.ModelSerializer):
         allow_empty=True,
         help_text="List of files to attach (max 5)"
     )
+    upload_ids = CompletedUploadsField()
 
     class Meta:
         model = Story
-        fields = ['title', 'content', 'story_type', 'target_class_ids', 'attachments']
+        fields = ['title', 'content', 'story_type', 'target_class_ids', 'attachments', 'upload_ids']
     
     def to_representation(self, instance):
         # Don't try to serialize the created instance - let the view handle it
@@ -281,6 +322,9 @@ class StoryCreateSerializer(serializers.ModelSerializer):
         if not request or not hasattr(request.user, 'teacher_profile'):
             raise serializers.ValidationError("Only teachers can create stories.")
 
+        if len(attrs.get('attachments', [])) + len(attrs.get('upload_ids', [])) > 5:
+            raise serializers.ValidationError("Maximum 5 files can be attached.")
+
         # Validate that teacher has access to specified classes
         if 'target_class_ids' in attrs and attrs['target_class_ids']:
             teacher = request.user.teacher_profile
@@ -296,12 +340,14 @@ class StoryCreateSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get('request')
         teacher = request.user.teacher_profile
         
         target_class_ids = validated_data.pop('target_class_ids', [])
         attachments = validated_data.pop('attachments', [])
+        uploads = validated_data.pop('upload_ids', [])
 
         # Create the story
         story = Story.objects.create(
@@ -325,32 +371,32 @@ class StoryCreateSerializer(serializers.ModelSerializer):
             else:
                 file_type = 'document'
 
-            # Create media directory if it doesn't exist
-            media_dir = os.path.join(settings.BASE_DIR, 'media', 'stories', str(story.id))
-            os.makedirs(media_dir, exist_ok=True)
-            
-            # Generate unique filename to avoid conflicts
-            file_extension = os.path.splitext(file.name)[1]
-            unique_filename = f"{uuid.uuid4().hex}{file_extension}"
-            file_path = os.path.join(media_dir, unique_filename)
-            
-            # Save file to disk
-            with open(file_path, 'wb+') as destination:
-                for chunk in file.chunks():
-                    destination.write(chunk)
-            
-            # Create URL for file (relative to media root)
-            file_url = f"/media/stories/{story.id}/{unique_filename}"
+            # Stored once per distinct content; reposts share the blob
+            blob = store_upload(file, mime_type=file.content_type)
 
             StoryAttachment.objects.create(
                 story=story,
                 file_name=file.name,
-                file_url=file_url,
+                file_url=blob_url(blob),
                 file_type=file_type,
                 file_size=file.size,
+                blob=blob,
                 mime_type=file.content_type
             )
 
+        # Files sent earlier through resumable uploads are already in the blob store
+        consume_uploads(uploads)
+        for upload in uploads:
+            StoryAttachment.objects.create(
+                story=story,
+                file_name=upload.file_name,
+                file_url=blob_url(upload.blob),
+                file_type=attachment_file_type(upload.mime_type),
+                file_size=upload.total_size,
+                blob=upload.blob,
+                mime_type=upload.mime_type
+            )
+
         # Refresh from database to get all related objects
         story.refresh_from_db()
         return story
@@ -479,10 +525,13 @@ class CommentCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Parent comment must belong to the same story.")
         return value
 
+    @transaction.atomic
     def create(self, validated_data):
         validated_data['story'] = self.context['story']
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
+        comment = super().create(validated_data)
+        comment_added(comment)
+        return comment
 
 
 class CommentUpdateSerializer(serializers.ModelSerializer):
@@ -2,14 +2,27 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from core.models import Story, StoryLike, StoryComment, Teacher, Class
+from django.db.models import Q, Prefetch
+from core.models import Story, StoryAttachment, StoryComment, Teacher, Class
 from core.story_serializers import (
     StoryListSerializer, StoryDetailSerializer, StoryCreateSerializer,
     StoryUpdateSerializer, CommentCreateSerializer, CommentUpdateSerializer,
-    StoryCommentSerializer, SimpleStoryResponseSerializer
+    StoryCommentSerializer, SimpleStoryResponseSerializer, attach_replies, top_level_comments
 )
+from core.story_counters import soft_delete_comment, toggle_like
+
+
+# Attachment serializers read blob variant status; load both with the stories
+ATTACHMENTS_WITH_BLOBS = Prefetch('attachments', queryset=StoryAttachment.objects.select_related('blob'))
+
+
+class CommentPagination(PageNumberPagination):
+    """Pages of top-level comments; replies are always returned with their comment"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
 
 
 class IsTeacherPermission(permissions.BasePermission):
@@ -66,7 +79,7 @@ class StoryViewSet(viewsets.ModelViewSet):
                 Q(teacher=teacher) |
                 Q(target_classes=None),  # Stories with no specific target classes
                 is_active=True
-            ).distinct().order_by('-created_at')
+            ).distinct().prefetch_related(ATTACHMENTS_WITH_BLOBS).order_by('-created_at')
             
         elif user.user_type == 'parent':
             # Parents can see stories from their children's classes
@@ -76,7 +89,9 @@ class StoryViewSet(viewsets.ModelViewSet):
             
         else:
             # Admins can see all stories
-            return Story.objects.filter(is_active=True).order_by('-created_at')
+            return Story.objects.filter(is_active=True).prefetch_related(
+                ATTACHMENTS_WITH_BLOBS
+            ).order_by('-created_at')
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -142,24 +157,20 @@ class StoryViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        like, created = StoryLike.objects.get_or_create(
-            story=story,
-            user=user
-        )
+        # Unlikes if already liked
+        liked, likes_count = toggle_like(story, user)
         
-        if not created:
-            # Unlike if already liked
-            like.delete()
+        if not liked:
             return Response({
                 'message': 'Story unliked successfully.',
                 'liked': False,
-                'likes_count': story.likes.count()
+                'likes_count': likes_count
             }, status=status.HTTP_200_OK)
         else:
             return Response({
                 'message': 'Story liked successfully.',
                 'liked': True,
-                'likes_count': story.likes.count()
+                'likes_count': likes_count
             }, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
@@ -176,14 +187,12 @@ class StoryViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Get top-level comments (parent_comment=None)
-        comments = story.comments.filter(
-            parent_comment=None,
-            is_deleted=False
-        ).order_by('-created_at')
+        # Paginate the top-level comments in the database, then load the page's replies in one query
+        paginator = CommentPagination()
+        page = attach_replies(paginator.paginate_queryset(top_level_comments(story), request, view=self))
         
-        serializer = StoryCommentSerializer(comments, many=True, context={'request': request})
-        return Response(serializer.data)
+        serializer = StoryCommentSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def add_comment(self, request, pk=None):
@@ -280,8 +289,7 @@ class StoryCommentViewSet(viewsets.ModelViewSet):
         """
         Soft delete a comment by setting is_deleted to True.
         """
-        instance.is_deleted = True
-        instance.save()
+        soft_delete_comment(instance)
 
 
 class IsCommentOwner(permissions.BasePermission):
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.models import UploadSession
+from core.media_variants import variant_url
+
+ALLOWED_DOCUMENT_TYPES = [
+    'application/pdf', 'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.ms-excel',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'application/vnd.ms-powerpoint',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'text/plain', 'application/rtf'
+]
+
+
+def attachment_file_type(content_type):
+    if content_type.startswith('image/'):
+        return 'image'
+    if content_type.startswith('video/'):
+        return 'video'
+    return 'document'
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    upload_id = serializers.UUIDField(source='id', read_only=True)
+    total_chunks = serializers.IntegerField(read_only=True)
+    next_chunk = serializers.IntegerField(source='received_chunks', read_only=True)
+    thumbnail_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'upload_id', 'file_name', 'mime_type', 'total_size', 'chunk_size',
+            'total_chunks', 'next_chunk', 'status', 'thumbnail_url', 'expires_at'
+        ]
+        read_only_fields = fields
+
+    def get_thumbnail_url(self, obj):
+        return variant_url(obj.blob, 'thumbnail')
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=255)
+    mime_type = serializers.CharField(max_length=100)
+    total_size = serializers.IntegerField(min_value=1)
+
+    def validate(self, attrs):
+        mime_type = attrs['mime_type']
+        file_type = attachment_file_type(mime_type)
+
+        # Same limits as direct multipart attachments
+        if file_type == 'video':
+            max_size, label = 20 * 1024 * 1024, 'Video'
+        elif file_type == 'image':
+            max_size, label = 3 * 1024 * 1024, 'Image'
+        else:
+            if mime_type not in ALLOWED_DOCUMENT_TYPES:
+                raise serializers.ValidationError(
+                    f"File type {mime_type} is not allowed. Please upload images, videos, or common document formats."
+                )
+            max_size, label = 3 * 1024 * 1024, 'Document'
+
+        if attrs['total_size'] > max_size:
+            raise serializers.ValidationError(
+                f"{label} files must be smaller than {max_size // (1024 * 1024)}MB. "
+                f"File {attrs['file_name']} is {attrs['total_size'] / (1024 * 1024):.1f}MB."
+            )
+        return attrs
+
+    def create(self, validated_data):
+        ttl = getattr(settings, 'UPLOAD_SESSION_TTL', 24 * 60 * 60)
+        return UploadSession.objects.create(
+            user=self.context['request'].user,
+            chunk_size=getattr(settings, 'UPLOAD_CHUNK_SIZE', 1024 * 1024),
+            expires_at=timezone.now() + timedelta(seconds=ttl),
+            **validated_data
+        )
+
+
+class CompletedUploadsField(serializers.ListField):
+    """
+    upload_ids of completed resumable uploads owned by the requesting user.
+    Validates to a list of UploadSession rows with their blobs loaded.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('child', serializers.UUIDField())
+        kwargs.setdefault('required', False)
+        kwargs.setdefault('allow_empty', True)
+        kwargs.setdefault('write_only', True)
+        kwargs.setdefault('help_text', "IDs of completed resumable uploads to attach")
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        upload_ids = set(super().to_internal_value(data))
+        if not upload_ids:
+            return []
+        request = self.context.get('request')
+        sessions = list(
+            UploadSession.objects.filter(
+                id__in=upload_ids, user=request.user, status='complete',
+                expires_at__gt=timezone.now()
+            ).select_related('blob')
+        )
+        if len(sessions) != len(upload_ids):
+            raise serializers.ValidationError("Some uploads are unknown, unfinished, expired or already attached.")
+        return sessions
+
+
+def consume_uploads(sessions):
+    """
+    Claim completed sessions for a new story; each session's blob reference
+    passes to the attachment created from it. Call inside the story's transaction.
+    """
+    if not sessions:
+        return
+    claimed = UploadSession.objects.filter(
+        id__in=[session.id for session in sessions], status='complete'
+    ).update(status='attached', updated_at=timezone.now())
+    if claimed != len(sessions):
+        raise serializers.ValidationError("An upload was attached to another story at the same time.")
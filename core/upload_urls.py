@@ -0,0 +1,7 @@
+from rest_framework.routers import SimpleRouter
+from core.upload_views import UploadSessionViewSet
+
+router = SimpleRouter()
+router.register(r'', UploadSessionViewSet, basename='upload')
+
+urlpatterns = router.urls
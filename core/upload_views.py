@@ -0,0 +1,120 @@
+import os
+
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from core.models import UploadSession
+from core.media_storage import store_local_file, upload_temp_path
+from core.simple_story_views import IsTeacherOrAdminPermission
+from core.upload_serializers import UploadSessionSerializer, UploadSessionCreateSerializer
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class UploadSessionViewSet(viewsets.ViewSet):
+    """
+    Resumable uploads for story attachments.
+
+    POST   /uploads/                      start a session (file_name, mime_type, total_size)
+    GET    /uploads/{id}/                 session state; next_chunk tells a client where to resume
+    PUT    /uploads/{id}/chunks/{n}/      raw bytes of chunk n (chunk_size bytes, the last may be shorter)
+    POST   /uploads/{id}/complete/        finish; then pass upload_ids when creating the story
+    """
+    permission_classes = [IsTeacherOrAdminPermission]
+
+    def _get_session(self, request, pk):
+        return get_object_or_404(UploadSession, pk=pk, user=request.user)
+
+    def create(self, request):
+        serializer = UploadSessionCreateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        session = serializer.save()
+
+        temp_path = upload_temp_path(session)
+        os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+        open(temp_path, 'wb').close()
+
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return Response(UploadSessionSerializer(self._get_session(request, pk)).data)
+
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<index>\d+)')
+    def chunk(self, request, pk=None, index=None):
+        """Write one chunk. Re-sending an already stored chunk is a no-op, so retries are safe."""
+        index = int(index)
+        with transaction.atomic():
+            session = get_object_or_404(
+                UploadSession.objects.select_for_update(), pk=pk, user=request.user
+            )
+            if session.status != 'uploading' or session.is_expired:
+                return Response(
+                    {'error': 'This upload is no longer accepting chunks'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if index >= session.total_chunks:
+                return Response(
+                    {'error': f'Chunk index must be below {session.total_chunks}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if index > session.received_chunks:
+                return Response(
+                    {'error': 'Chunks must be sent in order', 'next_chunk': session.received_chunks},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if index < session.received_chunks:
+                # Client did not see our earlier response; acknowledge again
+                return Response(UploadSessionSerializer(session).data)
+
+            expected = session.expected_chunk_size(index)
+            data = bytearray()
+            while len(data) <= expected:
+                block = request.stream.read(READ_CHUNK_SIZE) if request.stream else b''
+                if not block:
+                    break
+                data.extend(block)
+            if len(data) != expected:
+                return Response(
+                    {'error': f'Chunk {index} must be exactly {expected} bytes, got {len(data)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            temp_path = upload_temp_path(session)
+            # Write at the chunk's offset and truncate, so a half-written earlier attempt is overwritten
+            with open(temp_path, 'r+b') as destination:
+                destination.seek(index * session.chunk_size)
+                destination.write(data)
+                destination.truncate()
+
+            session.received_chunks = index + 1
+            session.save(update_fields=['received_chunks', 'updated_at'])
+
+        return Response(UploadSessionSerializer(session).data)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        with transaction.atomic():
+            session = get_object_or_404(
+                UploadSession.objects.select_for_update(), pk=pk, user=request.user
+            )
+            if session.status != 'uploading':
+                return Response(UploadSessionSerializer(session).data)
+            if session.is_expired:
+                return Response({'error': 'This upload has expired'}, status=status.HTTP_409_CONFLICT)
+
+            temp_path = upload_temp_path(session)
+            if session.received_chunks < session.total_chunks or os.path.getsize(temp_path) != session.total_size:
+                return Response(
+                    {'error': 'Upload is incomplete', 'next_chunk': session.received_chunks},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            # Hashes the assembled file and moves it into the blob store (one reference, owned by the session)
+            session.blob = store_local_file(temp_path, session.mime_type)
+            session.status = 'complete'
+            session.save(update_fields=['blob', 'status', 'updated_at'])
+
+        return Response(UploadSessionSerializer(session).data)
@@ -1,4 +1,5 @@
 from django.urls import path, include
+from core.notification_views import notification_stream
 from core.template_views import (
     home_view, dashboard_view, teacher_dashboard, 
     parent_dashboard, admin_dashboard
@@ -10,6 +11,8 @@ urlpatterns = [
     # Core app URLs - authentication is now handled by core.accounts app
     path('api/v1/newsfeed/', include('core.story_urls')),  # Original news feed / Stories API  
     path('api/v1/simple-newsfeed/', include('core.simple_story_urls')),  # New simple news feed API
+    path('api/v1/uploads/', include('core.upload_urls')),  # Resumable attachment uploads
+    path('api/v1/notifications/stream/', notification_stream, name='notification_stream'),  # Server-Sent Events (ASGI only)
     
     # Template views
     path('', home_view, name='home'),
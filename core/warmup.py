@@ -0,0 +1,87 @@
+"""
+Worker warm-up. Passenger and gunicorn spawn workers on demand, so work
+Django would otherwise do lazily on the first request (importing every
+view module through the URLconf, building serializer fields from model
+metadata, connecting to the database) is done here when the worker starts.
+Called from wsgi.py / asgi.py when WARMUP_ON_STARTUP is set; measured by
+`manage.py profile_startup`.
+"""
+import logging
+import time
+
+from django.db import connections
+from django.urls import get_resolver
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve_urls(resolver):
+    """Import every included URLconf and build each resolver's reverse lookup tables"""
+    count = 0
+    for pattern in resolver.url_patterns:
+        if hasattr(pattern, 'url_patterns'):
+            count += _resolve_urls(pattern)
+        else:
+            count += 1
+    resolver.reverse_dict
+    return count
+
+
+def _project_serializers(base=serializers.BaseSerializer):
+    for subclass in base.__subclasses__():
+        if subclass.__module__.startswith('core.'):
+            yield subclass
+        yield from _project_serializers(subclass)
+
+
+def _build_serializer_fields():
+    """
+    Instantiate every project serializer and build its fields, which fills
+    the model _meta caches DRF reads. Serializers that need arguments or
+    context to construct are skipped.
+    """
+    built = 0
+    for serializer_class in set(_project_serializers()):
+        try:
+            serializer_class().fields
+        except Exception:
+            continue
+        built += 1
+    return built
+
+
+def _connect_databases():
+    """
+    Load each database driver and run the backend's connection setup, then
+    close the connections again. With gunicorn --preload this runs in the
+    master before it forks, and a socket opened there would be shared by
+    every worker; each worker opens its own on its first query instead.
+    """
+    for alias in connections:
+        connections[alias].ensure_connection()
+    connections.close_all()
+
+
+def warm_up():
+    """
+    Resolve URLconfs, build serializer fields and load the database
+    drivers. Never raises; returns a {step: milliseconds} report.
+    No connection is left open (see _connect_databases), so only the
+    driver import and backend setup are saved.
+    """
+    report = {}
+    steps = [
+        ('urls', lambda: _resolve_urls(get_resolver())),
+        ('serializers', _build_serializer_fields),
+        ('database', _connect_databases),
+    ]
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {str(e)}")
+        report[name] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"Worker warmed up: {report}")
+    return report